@@ -0,0 +1,26 @@
+Feature: Bulk provisioning and cleanup of cloud accounts
+
+@bulk
+Scenario Outline: Bulk provision and tear down cloud accounts
+  When I concurrently create the bulk <cloud> accounts
+  Then all <cloud> bulk creations should succeed
+  And every bulk <cloud> account should be listed
+  When I concurrently delete the bulk <cloud> accounts
+  Then all <cloud> bulk deletions should succeed
+  And the <cloud> bulk throughput and latency should be reported
+
+  Examples:
+  | cloud |
+  | aws   |
+  | azure |
+
+@sweep
+Scenario Outline: Sweep orphaned test cloud accounts
+  When I delete every orphaned <cloud> test account in parallel
+  Then all <cloud> sweep deletions should succeed
+  And no orphaned <cloud> test accounts should remain
+
+  Examples:
+  | cloud |
+  | aws   |
+  | azure |
@@ -1,28 +1,30 @@
 Feature: Validate API endpoints for Cloud Account Registration
 
-@setup @sanity
+@setup @sanity @requires:pulumi-org @provides:cloud-<cloud>
 Scenario Outline: Register a cloud account
   When I send a POST request to register an <cloud> account
   Then the <cloud> registration API response should be 200
   And the <cloud> registration API response body must contain a cloud ID
+  And the response should match the cloud account schema
 
   Examples:
   | cloud |
   | aws   |
   | azure |
 
-@sanity
+@sanity @requires:cloud-<cloud>
 Scenario Outline: Rerieve a cloud account
   When I send a GET request to retrieve an <cloud> account
   Then the <cloud> retrieval API response should be 200
   And the <cloud> retrieval API response body must contain the cloud ID
+  And the response should match the cloud account list schema
 
   Examples:
   | cloud |
   | aws   |
   | azure |
 
-@test
+@test @releases:cloud-<cloud>
 Scenario Outline: Delete a cloud account
   When I send a DELETE request to delete an <cloud> account
   Then the <cloud> deletion API response should be 200
@@ -0,0 +1,152 @@
+# api/cloud/steps/cloud_bulk.py
+
+import re
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from api.common import client, jsonio
+from api.common.stats import summarize
+
+CREDENTIAL_FIXTURES = {
+    "aws": {"accessKey": "aws_key", "secretKey": "aws_secret"},
+    "azure": {"clientId": "azure_clientId", "clientSecret": "azure_clientSecret",
+              "tenantId": "azure_tenantId", "subscriptionId": "azure_subscriptionId"},
+}
+
+
+def qa_account_name(cloud):
+    return f"Test{cloud}fromAPI"
+
+
+def bulk_account_names(cloud, count):
+    # The run id starts with the creation time (epoch seconds, 8 hex digits) so the sweeper can tell its age.
+    run = f"{int(time.time()):08x}{uuid.uuid4().hex[:4]}"
+    return [f"{qa_account_name(cloud)}-bulk-{run}-{i}" for i in range(count)]
+
+
+def orphan_pattern(cloud):
+    # Only the bulk names above; the bare name belongs to cloud_register.feature and may be in use.
+    return re.compile(rf"^{re.escape(qa_account_name(cloud))}-bulk-(?P<created>[0-9a-f]{{8}})[0-9a-f]{{4}}-\d+$")
+
+
+def credentials(cloud, request):
+    """Resolve only the credential fixtures the given cloud needs."""
+    return {field_name: request.getfixturevalue(fixture)
+            for field_name, fixture in CREDENTIAL_FIXTURES[cloud].items()}
+
+
+def account_payload(cloud, name, creds):
+    return {**creds, "accountName": name, "ownerEmailId": f"qa-{cloud}@mcn.in"}
+
+
+@dataclass
+class OpResult:
+    name: str
+    status: int | None
+    latency: float
+    resource_id: object = None  # id of the account or tunnel the call created
+    error: str | None = None
+
+    @property
+    def ok(self):
+        return self.status is not None and 200 <= self.status < 300
+
+
+@dataclass
+class BulkRun:
+    op: str
+    results: list = field(default_factory=list)
+    wall: float = 0.0
+
+    @property
+    def failures(self):
+        return [r for r in self.results if not r.ok]
+
+    @property
+    def throughput(self):
+        return len(self.results) / self.wall if self.wall else 0.0
+
+    def summary(self):
+        return {"op": self.op, "throughput_per_s": self.throughput, "wall_s": self.wall,
+                "failures": len(self.failures), "latency": summarize([r.latency for r in self.results])}
+
+
+def run_bounded(op, fn, items, workers):
+    """Apply fn to every item with at most `workers` requests in flight."""
+    run = BulkRun(op)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix=f"cloud-{op}") as pool:
+        run.results = list(pool.map(fn, items))
+    run.wall = time.perf_counter() - start
+    return run
+
+
+def timed(name, call):
+    """Run one API call, returning its status and latency and the `id` of a created resource."""
+    start = time.perf_counter()
+    try:
+        resp = call()
+    except Exception as e:
+        return OpResult(name, None, time.perf_counter() - start, error=str(e))
+    latency = time.perf_counter() - start
+    resource_id = None
+    if resp.ok and resp.content:
+        try:
+            body = jsonio.response_json(resp)
+            resource_id = body.get("id") if isinstance(body, dict) else None
+        except ValueError:
+            pass
+    return OpResult(name, resp.status_code, latency, resource_id,
+                    error=None if resp.ok else resp.text[:200])
+
+
+def create_accounts(base_url, headers, cloud, names, org_name, creds, workers):
+    url = f"{base_url}/cloud/{cloud}/account"
+
+    def create(name):
+        return timed(name, lambda: client.post(url, params={"organizationName": org_name}, headers=headers,
+                                                data=jsonio.dumps(account_payload(cloud, name, creds))))
+
+    return run_bounded("create", create, names, workers)
+
+
+def list_accounts(base_url, headers, cloud):
+    resp = client.get(f"{base_url}/cloud/{cloud}/account", headers=headers)
+    resp.raise_for_status()
+    return jsonio.response_json(resp)
+
+
+def timed_listing(base_url, headers, cloud):
+    """List accounts once, returning the entries and a BulkRun holding the listing latency."""
+    start = time.perf_counter()
+    accounts = list_accounts(base_url, headers, cloud)
+    latency = time.perf_counter() - start
+    return accounts, BulkRun("list", [OpResult(f"{cloud}-listing", 200, latency)], latency)
+
+
+def delete_accounts(base_url, headers, cloud, accounts, workers):
+    """Delete (name, id) pairs concurrently."""
+
+    def delete(account):
+        name, account_id = account
+        return timed(name, lambda: client.delete(f"{base_url}/cloud/{cloud}/account/{account_id}",
+                                                  headers=headers))
+
+    return run_bounded("delete", delete, accounts, workers)
+
+
+def find_orphans(accounts, cloud, min_age, keep=()):
+    """Bulk accounts created more than `min_age` seconds ago whose id is not in `keep`.
+
+    Younger ones may belong to a bulk run still in progress; `keep` holds ids other runs still use.
+    """
+    pattern = orphan_pattern(cloud)
+    cutoff = time.time() - min_age
+    orphans = []
+    for entry in accounts:
+        match = pattern.match(entry.get("accountName", ""))
+        if match and int(match["created"], 16) <= cutoff and entry["id"] not in keep:
+            orphans.append((entry["accountName"], entry["id"]))
+    return orphans
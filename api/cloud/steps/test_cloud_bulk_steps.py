@@ -0,0 +1,104 @@
+import logging
+import pytest
+from pytest_bdd import scenarios, parsers, when, then
+from api.cloud.steps import cloud_bulk
+from api.common import warmstate
+from api.common.stats import format_summary
+
+logger = logging.getLogger(__name__)
+
+scenarios("../cloud_bulk.feature")
+
+bulk = {}
+
+
+@pytest.fixture
+def bulk_created_accounts(izo_mcn_url, default_headers, bulk_workers):
+    """(cloud, name, id) of the bulk accounts a scenario created and has not deleted yet. They are deleted
+    when the scenario ends, so a failed step does not leave them for the next sweep."""
+    created = []
+    yield created
+    for cloud in sorted({cloud for cloud, _, _ in created}):
+        accounts = [(name, account_id) for c, name, account_id in created if c == cloud]
+        run = cloud_bulk.delete_accounts(izo_mcn_url, default_headers, cloud, accounts, bulk_workers)
+        failed = [(r.name, r.status, r.error) for r in run.failures]
+        logger.info(f"Cleaned up {len(accounts) - len(failed)} of {len(accounts)} leftover bulk {cloud} accounts")
+        if failed:
+            logger.warning(f"Could not delete bulk {cloud} accounts: {failed}")
+
+
+################################################################################################################
+#   Bulk Cloud Account Provisioning                                                                            #
+################################################################################################################
+
+@when(parsers.cfparse("I concurrently create the bulk {cloud} accounts"))
+def bulk_create_cloud_accs(request, izo_mcn_url, default_headers, pulumi_org_name, bulk_account_count,
+                           bulk_workers, bulk_created_accounts, cloud):
+    names = cloud_bulk.bulk_account_names(cloud, bulk_account_count)
+    creds = cloud_bulk.credentials(cloud, request)
+    bulk[cloud] = {"create": cloud_bulk.create_accounts(izo_mcn_url, default_headers, cloud, names,
+                                                        pulumi_org_name, creds, bulk_workers)}
+    bulk_created_accounts.extend((cloud, r.name, r.resource_id) for r in bulk[cloud]["create"].results
+                                 if r.resource_id is not None)
+
+@then(parsers.cfparse("all {cloud} bulk creations should succeed"))
+def check_bulk_create_cloud_accs(cloud):
+    failures = bulk[cloud]["create"].failures
+    assert not failures, f"{len(failures)} {cloud} creations failed: {[(f.name, f.status, f.error) for f in failures]}"
+
+@then(parsers.cfparse("every bulk {cloud} account should be listed"))
+def check_bulk_cloud_accs_listed(izo_mcn_url, default_headers, cloud):
+    accounts, bulk[cloud]["list"] = cloud_bulk.timed_listing(izo_mcn_url, default_headers, cloud)
+    listed = {entry["accountName"]: entry["id"] for entry in accounts}
+    created = bulk[cloud]["create"].results
+    missing = [r.name for r in created if listed.get(r.name) != r.resource_id]
+    assert not missing, f"Bulk {cloud} accounts missing from listing: {missing}"
+
+
+################################################################################################################
+#   Bulk Cloud Account Teardown                                                                                #
+################################################################################################################
+
+@when(parsers.cfparse("I concurrently delete the bulk {cloud} accounts"))
+def bulk_delete_cloud_accs(izo_mcn_url, default_headers, bulk_workers, bulk_created_accounts, cloud):
+    accounts = [(r.name, r.resource_id) for r in bulk[cloud]["create"].results if r.resource_id is not None]
+    bulk[cloud]["delete"] = cloud_bulk.delete_accounts(izo_mcn_url, default_headers, cloud, accounts, bulk_workers)
+    deleted = {r.name for r in bulk[cloud]["delete"].results if r.ok}
+    bulk_created_accounts[:] = [entry for entry in bulk_created_accounts if entry[0] != cloud or entry[1] not in deleted]
+
+@then(parsers.cfparse("all {cloud} bulk deletions should succeed"))
+def check_bulk_delete_cloud_accs(cloud):
+    failures = bulk[cloud]["delete"].failures
+    assert not failures, f"{len(failures)} {cloud} deletions failed: {[(f.name, f.status, f.error) for f in failures]}"
+
+@then(parsers.cfparse("the {cloud} bulk throughput and latency should be reported"))
+def report_bulk_cloud_accs(cloud, record_property):
+    for op, run in bulk[cloud].items():
+        summary = run.summary()
+        record_property(f"{cloud}_{op}", summary)
+        logger.info(f"{cloud} {op}: {summary['throughput_per_s']:.2f} ops/s over {summary['wall_s']:.2f}s, "
+                    f"latency {format_summary(summary['latency'])}")
+
+
+################################################################################################################
+#   Orphaned Test Account Sweeper                                                                              #
+################################################################################################################
+
+@when(parsers.cfparse("I delete every orphaned {cloud} test account in parallel"))
+def sweep_orphaned_cloud_accs(izo_mcn_url, default_headers, bulk_workers, sweep_min_age, cloud):
+    orphans = cloud_bulk.find_orphans(cloud_bulk.list_accounts(izo_mcn_url, default_headers, cloud), cloud,
+                                      sweep_min_age, keep=warmstate.state.recorded_ids())
+    logger.info(f"Sweeping {len(orphans)} orphaned {cloud} accounts")
+    bulk[f"sweep_{cloud}"] = cloud_bulk.delete_accounts(izo_mcn_url, default_headers, cloud, orphans, bulk_workers)
+
+@then(parsers.cfparse("all {cloud} sweep deletions should succeed"))
+def check_sweep_cloud_accs(cloud):
+    run = bulk[f"sweep_{cloud}"]
+    logger.info(f"Swept {len(run.results)} {cloud} accounts at {run.throughput:.2f} ops/s")
+    assert not run.failures, f"Sweep failed for: {[(f.name, f.status, f.error) for f in run.failures]}"
+
+@then(parsers.cfparse("no orphaned {cloud} test accounts should remain"))
+def check_no_orphaned_cloud_accs(izo_mcn_url, default_headers, sweep_min_age, cloud):
+    remaining = cloud_bulk.find_orphans(cloud_bulk.list_accounts(izo_mcn_url, default_headers, cloud), cloud,
+                                        sweep_min_age, keep=warmstate.state.recorded_ids())
+    assert not remaining, f"Orphaned {cloud} accounts still present: {remaining}"
@@ -1,8 +1,7 @@
-import requests
 import logging
-import json
 from pytest_bdd import scenarios, parsers, when, then
 from api.urlpaths.paths import Paths
+from api.common import client, jsonio, warmstate
 from api.pulumi.steps import pulumi
 
 logger = logging.getLogger(__name__)
@@ -13,6 +12,11 @@ response_data = {}
 mcn = {}
 
 
+def cloud_id(cloud):
+    """ID registered by this run, or the one reused from an earlier run's warm state."""
+    return mcn.get(f"{cloud}_id") or warmstate.state.resource_id(f"cloud-{cloud}")
+
+
 ################################################################################################################
 #   Test Cloud Account Registration API Endpoint                                                               #
 ################################################################################################################
@@ -22,14 +26,14 @@ def send_post_req_register_cloud_acc(izo_mcn_url, default_headers, cloud, aws_ke
                                      azure_clientId, azure_clientSecret, azure_tenantId, azure_subscriptionId):
     match cloud:
         case "aws":
-            data = json.dumps({
+            data = jsonio.dumps({
                 "accessKey": aws_key,
                 "secretKey": aws_secret,
                 "accountName": f"Test{cloud}fromAPI",
                 "ownerEmailId": f"qa-{cloud}@mcn.in"
             })
         case "azure":
-            data = json.dumps({
+            data = jsonio.dumps({
                 "clientId": azure_clientId,
                 "clientSecret": azure_clientSecret,
                 "tenantId": azure_tenantId,
@@ -37,7 +41,7 @@ def send_post_req_register_cloud_acc(izo_mcn_url, default_headers, cloud, aws_ke
                 "accountName": f"Test{cloud}fromAPI",
                 "ownerEmailId": f"qa-{cloud}@mcn.in"
             })
-    response_data["response"] = requests.post(f"{izo_mcn_url}/cloud/{cloud}/account?organizationName={pulumi["org_name"]}", 
+    response_data["response"] = client.post(f"{izo_mcn_url}/cloud/{cloud}/account?organizationName={pulumi["org_name"]}", 
                                               headers=default_headers, data=data)
 
 @then(parsers.cfparse("the {cloud} registration API response should be {status_code}"))
@@ -45,8 +49,8 @@ def check_response_code_register_cloud_acc(status_code):
     assert response_data["response"].status_code == int(status_code)
 
 @then(parsers.cfparse("the {cloud} registration API response body must contain a cloud ID"))
-def check_response_body_register_cloud_acc(cloud):
-    resp = response_data["response"].json()
+def check_response_body_register_cloud_acc(izo_mcn_url, default_headers, cloud):
+    resp = jsonio.response_json(response_data["response"])
     match cloud:
         case "aws":
             mcn["aws_id"] = resp["id"]
@@ -54,6 +58,8 @@ def check_response_body_register_cloud_acc(cloud):
         case "azure":
             mcn["azure_id"] = resp["id"]
             assert "azure_id" in mcn.keys()
+    warmstate.state.remember(f"cloud-{cloud}", resp["id"], f"{izo_mcn_url}{Paths.CLOUD_ACCOUNT.format(cloud=cloud)}",
+                             default_headers)
 
 
 ################################################################################################################
@@ -67,7 +73,7 @@ def send_get_req_retrieve_cloud_acc(izo_mcn_url, default_headers, cloud):
             url = f'{izo_mcn_url}/cloud/{cloud}/account'
         case "azure":
             url = f'{izo_mcn_url}/cloud/{cloud}/account'
-    response_data["response"] = requests.get(url, headers=default_headers)
+    response_data["response"] = client.get(url, headers=default_headers)
 
 @then(parsers.cfparse("the {cloud} retrieval API response should be {status_code}"))
 def check_response_code_retrieve_cloud_acc(status_code):
@@ -75,14 +81,14 @@ def check_response_code_retrieve_cloud_acc(status_code):
 
 @then(parsers.cfparse("the {cloud} retrieval API response body must contain the cloud ID"))
 def check_response_body_retrieve_cloud_acc(cloud):
-    resp = response_data["response"].json()
+    resp = jsonio.response_json(response_data["response"])
     for entry in resp:
         if entry["accountName"] == f"Test{cloud}fromAPI":
             match cloud:
                 case "aws":
-                    assert mcn["aws_id"] == entry["id"]
+                    assert cloud_id("aws") == entry["id"]
                 case "azure":
-                    assert mcn["azure_id"] == entry["id"]
+                    assert cloud_id("azure") == entry["id"]
 
 
 ################################################################################################################
@@ -93,10 +99,12 @@ def check_response_body_retrieve_cloud_acc(cloud):
 def send_delete_req_delete_cloud_acc(izo_mcn_url, default_headers, cloud):
     match cloud:
         case "aws":
-            url = f'{izo_mcn_url}/cloud/{cloud}/account/{mcn["aws_id"]}'
+            url = f'{izo_mcn_url}/cloud/{cloud}/account/{cloud_id("aws")}'
         case "azure":
-            url = f'{izo_mcn_url}/cloud/{cloud}/account/{mcn["azure_id"]}'
-    response_data["response"] = requests.delete(url, headers=default_headers)
+            url = f'{izo_mcn_url}/cloud/{cloud}/account/{cloud_id("azure")}'
+    response_data["response"] = client.delete(url, headers=default_headers)
+    if response_data["response"].ok:
+        warmstate.state.forget(f"cloud-{cloud}")
 
 @then(parsers.cfparse("the {cloud} deletion API response should be {status_code}"))
 def check_response_code_delete_cloud_acc(status_code):
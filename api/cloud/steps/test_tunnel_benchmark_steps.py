@@ -0,0 +1,66 @@
+import logging
+import time
+from pytest_bdd import scenarios, when, then, parsers
+from api.cloud.steps import tunnel
+from api.common.stats import format_summary, summarize
+
+logger = logging.getLogger(__name__)
+
+scenarios("../tunnel_benchmark.feature")
+
+# State shared by the steps of the running scenario; each scenario's run is reported at session end.
+benchmark = {}
+
+
+################################################################################################################
+#   Concurrent Tunnel Creation                                                                                 #
+################################################################################################################
+
+@when(parsers.parse("I create {tunnels:d} tunnels across the configured vrouter pairs with {concurrency:d} concurrent requests"))
+def create_benchmark_tunnels(izo_mcn_url, default_headers, tunnel_vrouter_pairs, created_tunnel_ids, tunnels,
+                             concurrency):
+    benchmark["tunnels"], benchmark["concurrency"] = tunnels, concurrency
+    # With more tunnels than pairs, convergence has to be read per tunnel, not per pair.
+    benchmark["shared_pairs"] = tunnels > len(set(tunnel_vrouter_pairs))
+    benchmark["started"] = time.time()
+    benchmark["create"], benchmark["watches"] = tunnel.create_tunnels(
+        izo_mcn_url, default_headers, tunnel.cycle_pairs(tunnel_vrouter_pairs, tunnels), concurrency)
+    created_tunnel_ids.extend(w.tunnel_id for w in benchmark["watches"])
+
+@then("every benchmark tunnel creation should succeed")
+def check_benchmark_tunnels_created():
+    failures = [(r.name, r.status, r.error) for r in benchmark["create"].failures]
+    assert not failures, f"{len(failures)} of {benchmark['tunnels']} tunnel creations failed: {failures}"
+
+
+################################################################################################################
+#   WireGuard Convergence                                                                                      #
+################################################################################################################
+
+@when("I wait for WireGuard metrics to show every benchmark tunnel connected")
+def wait_for_benchmark_tunnels(wireguard_metrics_url, wireguard_headers, tunnel_timeout, tunnel_poll_concurrency):
+    pairs = {w.tunnel_id: (w.source, w.peer) for w in benchmark["watches"]}
+    since = benchmark["started"]
+    per_tunnel = benchmark["shared_pairs"]
+    tunnel.wait_until_up(benchmark["watches"],
+                         lambda tunnel_id: tunnel.wireguard_state(wireguard_metrics_url, wireguard_headers,
+                                                                  *pairs[tunnel_id], since,
+                                                                  tunnel_id if per_tunnel else None),
+                         timeout=tunnel_timeout, max_in_flight=tunnel_poll_concurrency)
+
+@then("every benchmark tunnel should be connected within the timeout")
+def check_benchmark_tunnels_connected():
+    down = [(w.tunnel_id, w.source, w.peer, w.error) for w in benchmark["watches"] if w.up_at is None]
+    assert not down, f"{len(down)} tunnels never showed as connected: {down}"
+
+@then("the tunnel creation throughput and convergence time should be recorded")
+def record_benchmark_run(record_property):
+    create, watches = benchmark["create"], benchmark["watches"]
+    convergence = summarize([w.time_to_up for w in watches])
+    run = {"tunnels": benchmark["tunnels"], "concurrency": benchmark["concurrency"],
+           "throughput_per_s": create.throughput, "create_wall_s": create.wall,
+           "create_latency": create.summary()["latency"], "time_to_connected": convergence,
+           "metric_polls": sum(w.polls for w in watches)}
+    record_property("tunnel_benchmark", run)
+    logger.info(f"K={run['tunnels']} concurrency={run['concurrency']}: {create.throughput:.2f} tunnels/s, "
+                f"time-to-connected {format_summary(convergence)}")
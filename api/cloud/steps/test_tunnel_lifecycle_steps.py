@@ -0,0 +1,58 @@
+import logging
+import time
+from pytest_bdd import scenarios, when, then
+from api.cloud.steps import tunnel
+from api.common import jsonio
+from api.common.stats import format_summary, summarize
+
+logger = logging.getLogger(__name__)
+
+scenarios("../tunnel_lifecycle.feature")
+
+tunnels = {}
+
+
+################################################################################################################
+#   Gateway-vrouter Tunnel Creation                                                                            #
+################################################################################################################
+
+@when("I create a tunnel for every configured vrouter pair")
+def create_tunnels(izo_mcn_url, default_headers, tunnel_vrouter_pairs, created_tunnel_ids):
+    tunnels["created"], tunnels["failed"] = [], []
+    for source, peer in tunnel_vrouter_pairs:
+        created_at = time.monotonic()
+        resp = tunnel.create_tunnel(izo_mcn_url, default_headers, source, peer)
+        body = jsonio.response_json(resp) if resp.ok else None
+        if isinstance(body, dict) and "id" in body:
+            tunnels["created"].append(tunnel.TunnelWatch(body["id"], created_at))
+            created_tunnel_ids.append(body["id"])
+        else:
+            tunnels["failed"].append((source, peer, resp.status_code, resp.text[:200]))
+
+@then("every tunnel creation should succeed")
+def check_tunnels_created():
+    assert not tunnels["failed"], f"Tunnel creation failed for: {tunnels['failed']}"
+
+
+################################################################################################################
+#   Gateway-vrouter Tunnel Status                                                                              #
+################################################################################################################
+
+@when("I wait for all tunnels to report up")
+def wait_for_tunnels(izo_mcn_url, default_headers, tunnel_timeout, tunnel_poll_concurrency):
+    tunnel.wait_until_up(tunnels["created"],
+                         lambda tunnel_id: tunnel.tunnel_state(izo_mcn_url, default_headers, tunnel_id),
+                         timeout=tunnel_timeout, max_in_flight=tunnel_poll_concurrency)
+
+@then("every tunnel should be up within the timeout")
+def check_tunnels_up():
+    down = [(w.tunnel_id, w.error) for w in tunnels["created"] if w.up_at is None]
+    assert not down, f"{len(down)} tunnels did not come up: {down}"
+
+@then("the tunnel time-to-up distribution should be reported")
+def report_time_to_up(record_property):
+    watches = tunnels["created"]
+    summary = summarize([w.time_to_up for w in watches if w.time_to_up is not None])
+    record_property("tunnel_time_to_up", summary)
+    record_property("tunnel_status_polls", sum(w.polls for w in watches))
+    logger.info(f"Tunnel time-to-up: {format_summary(summary)} ({sum(w.polls for w in watches)} status polls)")
@@ -0,0 +1,186 @@
+# api/cloud/steps/tunnel.py
+
+import asyncio
+import itertools
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from api.cloud.steps.cloud_bulk import run_bounded, timed
+from api.common import client, jsonio
+from api.urlpaths.paths import Paths
+
+UP_STATES = {"up", "connected", "active"}
+FAILED_STATES = {"failed", "error"}
+
+
+def parse_pairs(value):
+    """'1:2,3:4' -> [("1", "2"), ("3", "4")]"""
+    pairs = []
+    for item in filter(None, (part.strip() for part in (value or "").split(","))):
+        source, _, peer = item.partition(":")
+        if not peer:
+            raise ValueError(f"Invalid vrouter pair '{item}', expected <source>:<peer>")
+        pairs.append((source, peer))
+    return pairs
+
+
+def create_tunnel(base_url, headers, source, peer):
+    data = jsonio.dumps({"sourceVrouterID": source, "peerVrouterID": peer})
+    return client.post(f"{base_url}{Paths.CREATE_TUNNEL}", headers=headers, data=data)
+
+
+def delete_tunnel(base_url, headers, tunnel_id):
+    return client.delete(f"{base_url}{Paths.TUNNEL_ID.format(id=tunnel_id)}", headers=headers)
+
+
+def delete_tunnels(base_url, headers, tunnel_ids, workers):
+    """Delete tunnels with at most `workers` requests in flight."""
+    return run_bounded("tunnel-delete", lambda tunnel_id: timed(str(tunnel_id), lambda: delete_tunnel(
+        base_url, headers, tunnel_id)), list(tunnel_ids), workers)
+
+
+def tunnel_state(base_url, headers, tunnel_id):
+    resp = client.get(f"{base_url}{Paths.VROUTER_STATUS}", headers=headers, params={"tunnelId": tunnel_id})
+    resp.raise_for_status()
+    body = jsonio.response_json(resp)
+    if isinstance(body, list):
+        body = next((entry for entry in body if str(entry.get("id", entry.get("tunnelId"))) == str(tunnel_id)), {})
+    return str(body.get("status") or body.get("state") or "").lower()
+
+
+def cycle_pairs(pairs, count):
+    """Spread `count` tunnels round-robin over the configured vrouter pairs."""
+    return list(itertools.islice(itertools.cycle(pairs), count))
+
+
+def _iso(ts):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts))
+
+
+def latest_value(series):
+    """Value of the newest [timestamp, value] point of a metrics series, or None."""
+    points = series.get("values") or []
+    if not points:
+        return None
+    try:
+        return float(max(points, key=lambda point: float(point[0]))[1])
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class SeriesNotPerTunnel(ValueError):
+    """The metrics API reports one series per vrouter pair, so tunnels sharing a pair can't be told apart."""
+
+
+def _series_tunnel(series):
+    return series.get("tunnelId", series.get("tunnelID"))
+
+
+def wireguard_state(metrics_url, headers, source, peer, since, tunnel_id=None):
+    """'connected' once every wireguard_connection_status series for the pair reports 1 since `since` (epoch).
+
+    With `tunnel_id`, only that tunnel's series counts; needed when several tunnels share the pair, and an
+    error if the series carry no tunnel id.
+    """
+    params = {"query": "wireguard_connection_status", "sourceVrouterID": source, "peerVrouterID": peer,
+              "timeFrom": _iso(since - 60), "timeTo": _iso(time.time())}
+    resp = client.get(metrics_url, params=params, headers=headers)
+    resp.raise_for_status()
+    data = jsonio.response_json(resp)
+    if isinstance(data, list) and len(data) == 1 and isinstance(data[0], list):
+        data = data[0]
+    series = [s for s in data or [] if str(s.get("sourceVrouterID")) == str(source)
+              and str(s.get("peerVrouterID")) == str(peer)]
+    if tunnel_id is not None:
+        if series and all(_series_tunnel(s) is None for s in series):
+            raise SeriesNotPerTunnel(f"WireGuard series for {source}:{peer} carry no tunnel id; create at most "
+                                     f"one tunnel per vrouter pair")
+        series = [s for s in series if str(_series_tunnel(s)) == str(tunnel_id)]
+    return "connected" if series and all(latest_value(s) == 1 for s in series) else "pending"
+
+
+@dataclass
+class Backoff:
+    """Decorrelated-jitter backoff: each delay is drawn from [initial, 3 * previous], capped."""
+    initial: float = 0.25
+    cap: float = 5.0
+
+    def next(self, previous):
+        return min(self.cap, random.uniform(self.initial, max(self.initial, previous * 3)))
+
+
+@dataclass
+class TunnelWatch:
+    tunnel_id: object
+    created_at: float
+    up_at: float = None
+    state: str = ""
+    polls: int = 0
+    error: str = None
+    source: str = None
+    peer: str = None
+
+    @property
+    def time_to_up(self):
+        return None if self.up_at is None else self.up_at - self.created_at
+
+
+async def _watch(watch, fetch_state, backoff, deadline, in_flight):
+    delay = backoff.initial
+    while True:
+        try:
+            async with in_flight:
+                state = await asyncio.to_thread(fetch_state, watch.tunnel_id)
+        except SeriesNotPerTunnel:
+            raise
+        except Exception as e:
+            state, watch.error = watch.state, str(e)
+        watch.polls += 1
+        now = time.monotonic()
+        if state in UP_STATES:
+            watch.state, watch.up_at, watch.error = state, now, None
+            return
+        if state in FAILED_STATES:
+            watch.state, watch.error = state, f"tunnel reported '{state}'"
+            return
+        if now >= deadline:
+            watch.error = f"not up after {watch.polls} polls (last state '{state}')"
+            return
+        # A state transition means provisioning is progressing, so poll eagerly again.
+        delay = backoff.initial if state != watch.state else backoff.next(delay)
+        watch.state = state
+        await asyncio.sleep(min(delay, deadline - now))
+
+
+def wait_until_up(watches, fetch_state, timeout, max_in_flight=16, backoff=None):
+    """Watch every tunnel from a single event loop; at most `max_in_flight` status requests run at once."""
+    backoff = backoff or Backoff()
+
+    async def main():
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_in_flight, "tunnel-status"))
+        in_flight = asyncio.Semaphore(max_in_flight)
+        deadline = time.monotonic() + timeout
+        await asyncio.gather(*(_watch(w, fetch_state, backoff, deadline, in_flight) for w in watches))
+
+    asyncio.run(main())
+    return watches
+
+
+def create_tunnels(base_url, headers, pairs, workers):
+    """Create one tunnel per pair with at most `workers` requests in flight; returns (BulkRun, watches)."""
+    watches = {}
+
+    def create(item):
+        index, (source, peer) = item
+        created_at = time.monotonic()
+        result = timed(f"{source}:{peer}#{index}", lambda: create_tunnel(base_url, headers, source, peer))
+        if result.ok and result.resource_id is not None:
+            watches[index] = TunnelWatch(result.resource_id, created_at, source=source, peer=peer)
+        elif result.ok:
+            result.status, result.error = None, "response carried no tunnel id"
+        return result
+
+    run = run_bounded("tunnel-create", create, list(enumerate(pairs)), workers)
+    return run, [watches[index] for index in sorted(watches)]
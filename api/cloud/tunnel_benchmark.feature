@@ -0,0 +1,15 @@
+Feature: Gateway-vrouter tunnel creation throughput
+
+@benchmark
+Scenario Outline: Create <tunnels> tunnels with <concurrency> concurrent requests
+  When I create <tunnels> tunnels across the configured vrouter pairs with <concurrency> concurrent requests
+  Then every benchmark tunnel creation should succeed
+  When I wait for WireGuard metrics to show every benchmark tunnel connected
+  Then every benchmark tunnel should be connected within the timeout
+  And the tunnel creation throughput and convergence time should be recorded
+
+  Examples:
+    | tunnels | concurrency |
+    | 4       | 1           |
+    | 16      | 4           |
+    | 64      | 16          |
@@ -0,0 +1,9 @@
+Feature: Gateway-vrouter tunnel lifecycle
+
+@tunnel
+Scenario: Tunnels between configured vrouter pairs come up
+  When I create a tunnel for every configured vrouter pair
+  Then every tunnel creation should succeed
+  When I wait for all tunnels to report up
+  Then every tunnel should be up within the timeout
+  And the tunnel time-to-up distribution should be reported
@@ -0,0 +1,374 @@
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable
+from urllib.parse import urlsplit
+
+import requests
+from urllib3.util import make_headers
+
+from api.common.latency import LatencyHistory
+from api.common.ratelimit import RateLimiter
+from api.urlpaths.paths import Paths
+
+LOG = logging.getLogger("http-client")
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "DELETE"}
+
+# gzip and deflate always; br/zstd only when urllib3 finds a decoder (brotli, zstandard) installed.
+ACCEPT_ENCODING = ", ".join(re.split(r",\s*", make_headers(accept_encoding=True)["accept-encoding"]))
+
+
+@dataclass
+class RequestEvent:
+    method: str
+    url: str
+    endpoint: str
+    params: dict
+    status: int | None
+    started: float
+    elapsed: float
+    request_bytes: int
+    response_bytes: int
+    retries: int = 0
+    error: str | None = None
+    wire_bytes: int = 0
+    content_encoding: str | None = None
+    throttled: float = 0.0
+    response: requests.Response | None = field(default=None, repr=False)
+
+    @property
+    def host(self) -> str:
+        return urlsplit(self.url).netloc
+
+    @property
+    def query(self) -> str | None:
+        return self.params.get("query") if self.params else None
+
+    @property
+    def compression_ratio(self) -> float | None:
+        return self.response_bytes / self.wire_bytes if self.wire_bytes else None
+
+
+@dataclass
+class Settings:
+    retries: int = 0
+    retry_backoff: float = 0.2
+    compression: bool = True
+    timeout_floor: float = 2.0
+    timeout_ceiling: float = 60.0
+    timeout_p99_factor: float = 3.0
+    hedge: bool = False
+    history: LatencyHistory = field(default_factory=LatencyHistory)
+    breaker_threshold: int = 3
+    rate_limiter: RateLimiter | None = None
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised without touching the network once a host's circuit breaker is open."""
+
+
+@dataclass
+class Breaker:
+    """Opens after `threshold` consecutive connection failures and stays open for the rest of the session."""
+    failures: int = 0
+    reason: str | None = None
+    probed: bool = False
+
+    @property
+    def open(self) -> bool:
+        return settings.breaker_threshold > 0 and self.failures >= settings.breaker_threshold
+
+
+@dataclass
+class HedgeStats:
+    sent: int = 0
+    won: int = 0
+    wasted: int = 0
+
+
+settings = Settings()
+hedging = HedgeStats()
+
+_listeners: list[Callable[[RequestEvent], None]] = []
+_local = threading.local()
+_hedge_lock = threading.Lock()
+_hedge_pool: ThreadPoolExecutor | None = None
+_breakers: dict[str, Breaker] = {}
+_breaker_lock = threading.Lock()
+# Reason of the most recent short-circuited request; the preflight plugin clears it per test.
+last_short_circuit: str | None = None
+
+
+def _template_regex(template: str) -> re.Pattern:
+    pattern = re.sub(r"\\{\w+\\}", r"[^/]+", re.escape(template))
+    return re.compile(f"{pattern}$")
+
+
+# Most specific first: deeper paths, then concrete ones ("/cloud/aws/account") before templated ones.
+_ENDPOINTS = sorted(
+    ((value, _template_regex(value)) for name, value in vars(Paths).items() if name.isupper()),
+    key=lambda item: (-item[0].count("/"), item[0].count("{")),
+)
+
+
+def endpoint_for(url: str) -> str:
+    """Map a URL to its Paths template, falling back to the path with numeric IDs masked."""
+    path = urlsplit(url).path.rstrip("/") or "/"
+    for template, regex in _ENDPOINTS:
+        if regex.search(path):
+            return template
+    return re.sub(r"/\d+(?=/|$)", "/{id}", path)
+
+
+class _Preview:
+    """Renders the head of a response body only if the DEBUG record is actually emitted."""
+
+    def __init__(self, resp: requests.Response, limit: int = 200) -> None:
+        self.resp = resp
+        self.limit = limit
+
+    def __str__(self) -> str:
+        return self.resp.content[:self.limit].decode("utf-8", "replace").replace("\n", " ")
+
+
+def add_listener(listener: Callable[[RequestEvent], None]) -> None:
+    _listeners.append(listener)
+
+
+def remove_listener(listener: Callable[[RequestEvent], None]) -> None:
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def session() -> requests.Session:
+    """Per-thread pooled session, so concurrent callers never share a connection pool lock."""
+    sess = getattr(_local, "session", None)
+    if sess is None:
+        sess = _local.session = requests.Session()
+        sess.headers["Accept-Encoding"] = ACCEPT_ENCODING if settings.compression else "identity"
+    return sess
+
+
+def last_response() -> requests.Response | None:
+    """The most recent response received on the calling thread, for steps shared across modules."""
+    return getattr(_local, "last_response", None)
+
+
+def clear_last_response() -> None:
+    _local.last_response = None
+
+
+def _body_size(kwargs: dict) -> int:
+    body = kwargs.get("data")
+    if isinstance(body, str):
+        return len(body.encode("utf-8"))
+    if isinstance(body, bytes):
+        return len(body)
+    return 0
+
+
+def breaker(host: str) -> Breaker:
+    with _breaker_lock:
+        return _breakers.setdefault(host, Breaker())
+
+
+def trip(host: str, reason: str) -> None:
+    """Open the host's breaker immediately, e.g. when the preflight probe failed."""
+    state = breaker(host)
+    with _breaker_lock:
+        state.failures = max(state.failures, settings.breaker_threshold)
+        state.reason = reason
+
+
+def _short_circuit(host: str, state: Breaker) -> CircuitOpenError:
+    global last_short_circuit
+    last_short_circuit = f"{host} is unreachable, circuit open: {state.reason}"
+    return CircuitOpenError(last_short_circuit)
+
+
+def probe(url: str, timeout: float) -> str | None:
+    """None if the host answered at all (any status code), otherwise the connection error."""
+    try:
+        session().get(url, timeout=timeout, allow_redirects=False, stream=True).close()
+    except requests.RequestException as e:
+        return str(e)
+    return None
+
+
+def require_host(url: str, timeout: float | None = None) -> None:
+    """Raise CircuitOpenError if the URL's host is down, probing it once if preflight has not already."""
+    host = urlsplit(url).netloc
+    state = breaker(host)
+    if not state.open and not state.probed:
+        state.probed = True
+        error = probe(url, timeout or settings.timeout_floor)
+        if error:
+            trip(host, f"probe failed: {error}")
+    if state.open:
+        raise _short_circuit(host, state)
+
+
+def _tenant(kwargs: dict) -> str | None:
+    for name, value in (kwargs.get("headers") or {}).items():
+        if name.lower() == "x-tenantid":
+            return str(value)
+    return None
+
+
+def _throttle(host: str, kwargs: dict) -> float:
+    """Wait for a token from the host's and tenant's buckets; returns the seconds spent waiting."""
+    limiter = settings.rate_limiter
+    return limiter.acquire(host, _tenant(kwargs)) if limiter else 0.0
+
+
+def _may_hedge(url: str, kwargs: dict) -> bool:
+    """Duplicates only go out when a token is free right now; a hedge is never worth waiting for."""
+    limiter = settings.rate_limiter
+    return limiter is None or limiter.try_acquire(urlsplit(url).netloc, _tenant(kwargs))
+
+
+def timeout_for(endpoint: str) -> float:
+    """Historical p99 x factor clamped to [floor, ceiling]; the ceiling until the endpoint has history."""
+    p99 = settings.history.percentile(endpoint, 99)
+    if p99 is None:
+        return settings.timeout_ceiling
+    return min(settings.timeout_ceiling, max(settings.timeout_floor, p99 * settings.timeout_p99_factor))
+
+
+def _send(method: str, url: str, kwargs: dict) -> requests.Response:
+    return session().request(method, url, **kwargs)
+
+
+def _discard(future: Future) -> None:
+    if future.exception() is None:
+        future.result().close()
+
+
+def _hedged(method: str, url: str, kwargs: dict, delay: float) -> requests.Response:
+    """Send a duplicate once the first attempt outlives `delay`; the first success wins, the other is dropped."""
+    global _hedge_pool
+    with _hedge_lock:
+        if _hedge_pool is None:
+            _hedge_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="http-hedge")
+    first = _hedge_pool.submit(_send, method, url, kwargs)
+    if wait([first], timeout=delay).done or not _may_hedge(url, kwargs):
+        return first.result()
+    second = _hedge_pool.submit(_send, method, url, kwargs)
+    with _hedge_lock:
+        hedging.sent += 1
+    pending: set[Future] = {first, second}
+    error: BaseException | None = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                with _hedge_lock:
+                    hedging.won += future is second
+                    hedging.wasted += len(pending)
+                for loser in pending:
+                    loser.add_done_callback(_discard)
+                return future.result()
+            error = error or future.exception()
+    raise error
+
+
+def _wire_size(resp: requests.Response, decoded: int) -> int:
+    """Bytes read off the socket; differs from the decoded size when the body was compressed."""
+    try:
+        return int(resp.raw.tell())
+    except (AttributeError, TypeError, ValueError):
+        return int(resp.headers.get("Content-Length", decoded))
+
+
+def _emit(event: RequestEvent) -> None:
+    for listener in list(_listeners):
+        try:
+            listener(event)
+        except Exception:
+            LOG.exception("HTTP event listener %r failed", listener)
+
+
+def request(method: str, url: str, *, endpoint: str | None = None, retries: int | None = None,
+            circuit: bool = True, hedge: bool = True, **kwargs) -> requests.Response:
+    """Send through the per-thread session with retries, throttling, hedging and the host's breaker.
+
+    circuit=False neither checks the breaker nor counts toward it, for traffic that is expected to fail
+    (fuzzing); hedge=False never sends a duplicate.
+    """
+    method = method.upper()
+    endpoint = endpoint or endpoint_for(url)
+    retries = settings.retries if retries is None else retries
+    if method not in IDEMPOTENT_METHODS:
+        retries = 0
+    kwargs.setdefault("timeout", timeout_for(endpoint))
+    host = urlsplit(url).netloc
+    state = breaker(host) if circuit else Breaker()
+    if state.open:
+        error = _short_circuit(host, state)
+        _emit(RequestEvent(method, url, endpoint, dict(kwargs.get("params") or {}), None, time.time(), 0.0,
+                           _body_size(kwargs), 0, 0, error=str(error)))
+        raise error
+    hedge_after = None
+    if settings.hedge and hedge and method == "GET" and not kwargs.get("stream"):
+        hedge_after = settings.history.percentile(endpoint, 95)
+
+    attempt = 0
+    throttled = _throttle(host, kwargs)
+    started = time.time()
+    t0 = time.perf_counter()
+    while True:
+        try:
+            resp = _hedged(method, url, kwargs, hedge_after) if hedge_after else _send(method, url, kwargs)
+            break
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt >= retries:
+                with _breaker_lock:
+                    state.failures += 1
+                    state.reason = f"{state.failures} consecutive connection failures, last: {e}"
+                _emit(RequestEvent(method, url, endpoint, dict(kwargs.get("params") or {}), None, started,
+                                   time.perf_counter() - t0, _body_size(kwargs), 0, attempt, error=str(e),
+                                   throttled=throttled))
+                raise
+            attempt += 1
+            LOG.warning(f"{method} {endpoint} failed ({e}); retry {attempt}/{retries}")
+            time.sleep(settings.retry_backoff * attempt)
+            throttled += _throttle(host, kwargs)
+
+    elapsed = time.perf_counter() - t0
+    with _breaker_lock:
+        state.failures = 0
+    # A streamed response has only its headers in: elapsed would understate the timeouts and hedges derived from
+    # the history.
+    if resp.status_code < 500 and not attempt and not kwargs.get("stream"):
+        settings.history.record(endpoint, elapsed)
+    if kwargs.get("stream"):
+        # The body has not been read yet; only the transfer size announced by the server is known.
+        size = wire = int(resp.headers.get("Content-Length", 0))
+    else:
+        size = len(resp.content)
+        wire = _wire_size(resp, size)
+        LOG.debug("Response preview %s %s: %s", method, endpoint, _Preview(resp))
+    _local.last_response = resp
+    _emit(RequestEvent(method, url, endpoint, dict(kwargs.get("params") or {}), resp.status_code, started,
+                       elapsed, _body_size(kwargs), size, attempt, wire_bytes=wire,
+                       content_encoding=resp.headers.get("Content-Encoding"), throttled=throttled,
+                       response=resp))
+    return resp
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+def delete(url: str, **kwargs) -> requests.Response:
+    return request("DELETE", url, **kwargs)
@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+import hashlib
+import random
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+import requests
+
+from api.common import client, jsonio, merkle
+
+OMIT = None
+SWAP = "<swap>"
+
+# Malformed values by field kind; every field also gets GENERIC ones and random strings.
+GENERIC = ["", " ", "-", "null", "undefined", "'", '"', "' OR '1'='1", "<script>alert(1)</script>", "../../../etc/passwd",
+           "%00", "\x00", "%s%s%s%n", "${jndi:ldap://x/a}", "{{7*7}}", "ü", "‮", "𝔘𝔫𝔦", "A" * 8192]
+VALUES = {
+    "ip": ["invalid_ip", "256.256.256.256", "1.1.1", "1.1.1.1.1", "0.0.0.0", "255.255.255.255", "127.0.0.1", "::1",
+           "fe80::1%eth0", "1.1.1.1/33", "01.001.1.1", "0x7f.0.0.1", "2130706433", "-1.1.1.1", "1.1.1.1:80",
+           "localhost", "1.1.1.1 ", "1 .1.1.1"],
+    "type": ["!@#type$%", "PING", "Trace", "pingg", "ping,trace", "tracert", "ping ", "0", "true", "ping;ls"],
+    "id": ["999999", "0", "-1", "9" * 30, "1.5", "1e3", "0x10", "abc", "1;2", "1,2", "NaN", "Infinity", " 1", "+1",
+           "٣", "1\n"],
+    "time": ["07-25-2025T11:00:00", "2025-13-01T00:00:00Z", "2025-02-30T00:00:00Z", "2025-07-25T25:00:00Z",
+             "2025-07-25", "2025-07-25 11:00:00", "2025-07-25T11:00:00+25:00", "0000-01-01T00:00:00Z",
+             "9999-12-31T23:59:59Z", "1721901600", "-1", "2025-07-25T11:00:00.1234567890123Z", "now"],
+    "header": ["!!invalid##", "null", "0", "*/*;q=abc", "application/xml", "tata" * 2048],
+    "text": ["wireguard_connection_status{", "up or 1==1", "sum(rate(x[5m]))", "a" * 4096],
+}
+# requests refuses header values with CR/LF or leading whitespace, and values it can't encode as latin-1.
+_HEADER_VALUE = re.compile(r"^\S[^\r\n]*$|^$")
+_ALPHABET = "0123456789abcdefXYZ.:-_/%&=?#@!$^*()[]{}<>;,'\"\\ \té中\U0001f600\x00\x7f"
+_LENGTHS = [0, 1, 2, 3, 8, 64, 1024]
+_VOLATILE = re.compile(r"'[^']*'|\"[^\"]*\"|\d+")
+
+
+def _header_safe(value: str) -> bool:
+    try:
+        value.encode("latin-1")
+    except UnicodeEncodeError:
+        return False
+    return bool(_HEADER_VALUE.match(value))
+
+
+@dataclass(frozen=True)
+class Target:
+    """An endpoint and a request it accepts; fields are query parameters, or "header:<name>" for headers."""
+
+    name: str
+    url: str
+    params: dict[str, str]
+    headers: dict[str, str]
+    kinds: dict[str, str]
+    swappable: tuple[tuple[str, str], ...] = ()
+
+    @property
+    def endpoint(self) -> str:
+        # Its own latency-history key, so fuzzed requests don't move the timeouts of the regular suite.
+        return f"{client.endpoint_for(self.url)} (fuzz)"
+
+
+@dataclass(frozen=True)
+class Case:
+    """Changes applied to the target's valid request: (field, value), value OMIT drops the field and SWAP
+    exchanges the values of "a,b"."""
+
+    changes: tuple[tuple[str, Any], ...]
+
+    def apply(self, target: Target) -> tuple[dict, dict]:
+        params, headers = dict(target.params), dict(target.headers)
+        for name, value in self.changes:
+            if value == SWAP:
+                a, b = name.split(",")
+                params[a], params[b] = params.get(b), params.get(a)
+                continue
+            into, key = (headers, name[len("header:"):]) if name.startswith("header:") else (params, name)
+            if value is OMIT:
+                into.pop(key, None)
+            else:
+                into[key] = value
+        return {k: v for k, v in params.items() if v is not None}, headers
+
+    def describe(self) -> str:
+        parts = []
+        for name, value in self.changes:
+            if value is OMIT:
+                parts.append(f"{name} omitted")
+            elif value == SWAP:
+                parts.append(f"{name.replace(',', ' and ')} swapped")
+            else:
+                text = repr(value)
+                parts.append(f"{name}={text if len(text) <= 60 else text[:40] + f'...({len(value)} chars)'}")
+        return ", ".join(parts)
+
+
+@dataclass
+class Outcome:
+    case: Case
+    status: int | None
+    elapsed: float
+    error: str | None = None
+    fingerprint: str = ""
+
+
+@dataclass
+class Finding:
+    """One distinct failure: every case with the same signature, represented by a shrunk example."""
+
+    signature: str
+    reason: str
+    case: Case
+    original: Case
+    count: int = 1
+    slowest: float = 0.0
+    shrink_requests: int = 0
+
+    def describe(self) -> str:
+        shrunk = "" if self.case == self.original else f" (shrunk from: {self.original.describe()})"
+        return (f"{self.reason}: {self.case.describe()}{shrunk}; {self.count} case(s), "
+                f"slowest {self.slowest * 1000:.0f} ms, signature {self.signature}")
+
+
+@dataclass
+class FuzzResult:
+    target: str
+    sent: int = 0
+    statuses: Counter = field(default_factory=Counter)
+    findings: list[Finding] = field(default_factory=list)
+    elapsed: float = 0.0
+
+
+def fingerprint(resp: requests.Response) -> str:
+    """What a response looks like regardless of the input echoed in it: the shape of a JSON body, or the
+    text with quoted values and numbers blanked."""
+    try:
+        data = merkle.tree(merkle.shape(jsonio.loads(resp.content))).hex if resp.content else "empty"
+    except ValueError:
+        data = _VOLATILE.sub("_", resp.text[:500])
+    return hashlib.blake2b(f"{resp.status_code}\0{data}".encode(), digest_size=6).hexdigest()
+
+
+class Fuzzer:
+    """Generates malformed requests for a Target, sends them with at most `parallelism` in flight, groups
+    the failures by response signature and shrinks one example of each.
+
+    Failures are 5xx responses, requests that raise (timeouts, dropped connections) and responses slower
+    than `budget` seconds. Generation is seeded, so the same seed sends the same cases.
+    """
+
+    def __init__(self, cases: int = 200, parallelism: int = 8, budget: float = 1.0, seed: int = 0,
+                 shrink_requests: int = 100, on_result: Callable[[FuzzResult], None] | None = None) -> None:
+        self.cases = cases
+        self.parallelism = max(1, parallelism)
+        self.budget = budget
+        self.seed = seed
+        self.shrink_requests = shrink_requests
+        self.timeout = max(5.0, budget * 5)
+        self.on_result = on_result
+        self._local = threading.local()
+
+    # --- generation ---
+
+    def _value(self, rng: random.Random, kind: str, valid: str | None) -> Any:
+        roll = rng.random()
+        if roll < 0.1:
+            return OMIT
+        if roll < 0.15:
+            return [valid or "1", rng.choice(VALUES.get(kind, GENERIC))]  # repeated parameter
+        if roll < 0.3 and valid:
+            chars = list(valid)
+            position = rng.randrange(len(chars) + 1)
+            if chars and rng.random() < 0.5:
+                del chars[min(position, len(chars) - 1)]
+            else:
+                chars.insert(position, rng.choice(_ALPHABET))
+            return "".join(chars)
+        if roll < 0.5:
+            return "".join(rng.choice(_ALPHABET) for _ in range(rng.choice(_LENGTHS)))
+        return rng.choice(VALUES.get(kind, []) + GENERIC)
+
+    def generate(self, target: Target) -> list[Case]:
+        rng = random.Random(f"{self.seed}:{target.name}")
+        fields = list(target.kinds)
+        cases: list[Case] = []
+        seen: set[str] = set()
+        attempts = 0
+        while len(cases) < self.cases and attempts < self.cases * 20:
+            attempts += 1
+            changes = []
+            count = 1 + (rng.random() < 0.3) + (rng.random() < 0.1)
+            for name in rng.sample(fields, min(count, len(fields))):
+                current = target.headers.get(name[len("header:"):]) if name.startswith("header:") \
+                    else target.params.get(name)
+                value = self._value(rng, target.kinds[name], current)
+                if name.startswith("header:") and isinstance(value, list):
+                    value = value[1]
+                if name.startswith("header:") and value is not OMIT and not _header_safe(value):
+                    continue
+                changes.append((name, value))
+            if target.swappable and rng.random() < 0.05:
+                changes.append((",".join(rng.choice(target.swappable)), SWAP))
+            case = Case(tuple(changes))
+            key = repr(case)
+            if changes and key not in seen:
+                seen.add(key)
+                cases.append(case)
+        return cases
+
+    # --- sending ---
+
+    def _capture(self, event: client.RequestEvent) -> None:
+        if getattr(self._local, "sending", False):
+            self._local.event = event
+
+    def _elapsed(self) -> float:
+        event = getattr(self._local, "event", None)
+        return event.elapsed if event is not None else 0.0
+
+    def send(self, target: Target, case: Case) -> Outcome:
+        """Send one case. Failures are the point here, so the request bypasses the host's circuit breaker
+        and is never hedged; its latency is the client's, which leaves out rate-limiter waits."""
+        params, headers = case.apply(target)
+        self._local.sending, self._local.event = True, None
+        try:
+            resp = client.get(target.url, params=params, headers=headers, endpoint=target.endpoint, retries=0,
+                              timeout=self.timeout, circuit=False, hedge=False)
+        except requests.RequestException as e:
+            return Outcome(case, None, self._elapsed(), error=type(e).__name__)
+        finally:
+            self._local.sending = False
+        outcome = Outcome(case, resp.status_code, self._elapsed(), fingerprint=fingerprint(resp))
+        resp.close()
+        return outcome
+
+    def signature(self, outcome: Outcome) -> tuple[str, str] | None:
+        """(reason, signature) of a failing outcome, None when the request passed."""
+        if outcome.error:
+            return "request failed", f"error {outcome.error}"
+        if outcome.status >= 500:
+            return f"server error {outcome.status}", f"{outcome.status} {outcome.fingerprint}"
+        if outcome.elapsed > self.budget:
+            return f"over the {self.budget * 1000:.0f} ms budget", f"slow {outcome.fingerprint}"
+        return None
+
+    # --- shrinking ---
+
+    @staticmethod
+    def _shorter(value: str, largest: int) -> list[tuple[int, str]]:
+        """(cut size, candidate): the value with chunks of `largest` characters cut out, then ever smaller ones."""
+        candidates = []
+        size = min(largest, len(value) // 2) or 1
+        while size >= 1:
+            step = max(size, len(value) // 8)
+            candidates += [(size, value[:i] + value[i + size:]) for i in range(0, len(value), step)]
+            size //= 2
+        return candidates
+
+    def shrink(self, target: Target, case: Case, signature: str) -> tuple[Case, int]:
+        """Smallest case found with the same signature: first drop changes, then shorten string values."""
+        sent = 0
+
+        def fails(changes: list) -> bool:
+            nonlocal sent
+            sent += 1
+            found = self.signature(self.send(target, Case(tuple(changes))))
+            return found is not None and found[1] == signature
+
+        changes = list(case.changes)
+        i = 0
+        while i < len(changes) and len(changes) > 1 and sent < self.shrink_requests:
+            trial = changes[:i] + changes[i + 1:]
+            if fails(trial):
+                changes = trial
+            else:
+                i += 1
+        for i, (name, value) in enumerate(changes):
+            # Like ddmin: keep cutting chunks of the size that last worked before trying smaller ones.
+            largest = len(value) if isinstance(value, str) else 0
+            while isinstance(value, str) and value and value != SWAP and sent < self.shrink_requests:
+                for size, candidate in self._shorter(value, largest):
+                    if sent >= self.shrink_requests:
+                        break
+                    trial = changes[:i] + [(name, candidate)] + changes[i + 1:]
+                    if fails(trial):
+                        value, largest = candidate, size
+                        changes = trial
+                        break
+                else:
+                    break
+        return Case(tuple(changes)), sent
+
+    def run(self, target: Target) -> FuzzResult:
+        client.add_listener(self._capture)
+        try:
+            return self._run(target)
+        finally:
+            client.remove_listener(self._capture)
+
+    def _run(self, target: Target) -> FuzzResult:
+        cases = self.generate(target)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.parallelism, thread_name_prefix=f"fuzz-{target.name}") as pool:
+            outcomes = list(pool.map(lambda case: self.send(target, case), cases))
+        result = FuzzResult(target.name, sent=len(outcomes))
+        by_signature: dict[str, Finding] = {}
+        for outcome in outcomes:
+            result.statuses[outcome.status if outcome.status is not None else outcome.error] += 1
+            failed = self.signature(outcome)
+            if failed is None:
+                continue
+            reason, signature = failed
+            if signature in by_signature:
+                finding = by_signature[signature]
+                finding.count += 1
+                finding.slowest = max(finding.slowest, outcome.elapsed)
+            else:
+                by_signature[signature] = Finding(signature, reason, outcome.case, outcome.case,
+                                                  slowest=outcome.elapsed)
+        for finding in by_signature.values():
+            if self.shrink_requests > 0:
+                finding.case, finding.shrink_requests = self.shrink(target, finding.original, finding.signature)
+            result.findings.append(finding)
+        result.elapsed = time.perf_counter() - start
+        if self.on_result is not None:
+            self.on_result(result)
+        return result
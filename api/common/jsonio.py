@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+import requests
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the standard library
+    orjson = None
+
+BACKENDS = ("orjson", "json")
+
+_backend = "orjson" if orjson is not None else "json"
+
+
+def backend() -> str:
+    return _backend
+
+
+def set_backend(name: str) -> None:
+    """Select "orjson", "json" or "auto" (orjson when installed)."""
+    global _backend
+    if name == "auto":
+        name = "orjson" if orjson is not None else "json"
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown JSON backend '{name}', expected one of: auto, {', '.join(BACKENDS)}")
+    if name == "orjson" and orjson is None:
+        raise ValueError("JSON backend 'orjson' requested but orjson is not installed")
+    _backend = name
+
+
+def loads(data: bytes | bytearray | memoryview | str) -> Any:
+    if _backend == "orjson":
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> str:
+    """Serialize a request body; always returns str so callers can pass it as `data=`."""
+    if _backend == "orjson":
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj)
+
+
+def response_json(resp: requests.Response) -> Any:
+    """Decode a response body once; steps that re-read the same response get the cached document."""
+    cached = getattr(resp, "_jsonio_document", None)
+    if cached is None or cached[0] != _backend:
+        try:
+            document = loads(resp.content)
+        except ValueError as e:
+            # Match resp.json(), so existing `except ValueError` / JSONDecodeError handling keeps working.
+            raise requests.JSONDecodeError(str(e), resp.text[:200], 0) from None
+        cached = resp._jsonio_document = (_backend, document)
+    return cached[1]
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import codecs
+import json
+import re
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator
+
+import requests
+
+CHUNK_SIZE = 64 * 1024
+_WS = " \t\n\r"
+_TOKEN_END = re.compile(r"[\s,\]}]")
+_DECODER = json.JSONDecoder()
+
+
+class _Buffer:
+    """Text window over a byte stream; consumed text is dropped so memory stays at ~one item plus one chunk."""
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        for chunk in self._chunks:
+            if chunk:
+                self.text = self.text[self.pos:] + self._utf8.decode(chunk)
+                self.pos = 0
+                return True
+        if not self.eof:
+            self.text += self._utf8.decode(b"", final=True)
+            self.eof = True
+        return False
+
+    def peek(self) -> str:
+        """Next non-whitespace character without consuming it; "" at end of stream."""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WS:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ""
+
+    def take(self, expected: str) -> str:
+        char = self.peek()
+        if char not in expected:
+            raise ValueError(f"Expected one of {expected!r} in JSON stream, got {char or 'end of stream'!r}")
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                obj, end = _DECODER.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if not self._grow():
+                    raise
+                continue
+            # A number or literal with no delimiter after it in the buffer may be cut short ("12" of "123",
+            # "0." of "0.5", "1e" of "1e3"): read on and retry.
+            if (not self.eof and not isinstance(obj, (dict, list, str))
+                    and _TOKEN_END.search(self.text, end) is None and self._grow()):
+                continue
+            self.pos = end
+            return obj
+
+    def _grow(self) -> bool:
+        # Double the pending text before retrying, so an item spanning many chunks is re-parsed O(log n) times.
+        target = 2 * max(len(self.text) - self.pos, 1)
+        grew = False
+        while len(self.text) - self.pos < target and self.fill():
+            grew = True
+        return grew
+
+
+def _items(buf: _Buffer, flatten: bool) -> Iterator[Any]:
+    if buf.peek() == "]":
+        buf.pos += 1
+        return
+    while True:
+        if flatten and buf.peek() == "[":
+            buf.pos += 1
+            yield from _items(buf, flatten=False)
+        else:
+            yield buf.value()
+        if buf.take(",]") == "]":
+            return
+
+
+def iter_items(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array as they arrive.
+
+    Nested arrays at the top level are flattened one level, matching the `[[series, ...]]` shape the
+    metrics API sometimes returns.
+    """
+    buf = _Buffer(chunks)
+    buf.take("[")
+    yield from _items(buf, flatten=True)
+    if buf.peek():
+        raise ValueError("Unexpected data after the top-level JSON array")
+
+
+def iter_response_items(resp: requests.Response, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """Stream the items of a response fetched with `stream=True`."""
+    return iter_items(resp.iter_content(chunk_size))
+
+
+def flatten(document: Any) -> Iterator[Any]:
+    """The same items iter_items would yield, from an already decoded document."""
+    for item in document if isinstance(document, list) else ():
+        if isinstance(item, list):
+            yield from item
+        else:
+            yield item
+
+
+@dataclass
+class ParseStats:
+    mode: str
+    items: int
+    elapsed: float
+    time_to_first_item: float | None
+    peak_bytes: int
+
+    def describe(self) -> str:
+        first = "n/a" if self.time_to_first_item is None else f"{self.time_to_first_item * 1000:.1f}ms"
+        return (f"{self.mode}: {self.items} items in {self.elapsed:.3f}s, first item after {first}, "
+                f"peak {self.peak_bytes / 1024 / 1024:.2f} MiB")
+
+
+def consume(mode: str, items: Callable[[], Iterable[Any]], on_item: Callable[[Any], None], sent_at: float,
+            extra_bytes: int = 0) -> ParseStats:
+    """Feed every item to `on_item`, measuring time from `sent_at` (perf_counter) and traced peak memory.
+
+    `extra_bytes` accounts for memory held before the call, e.g. a body that was already buffered.
+    """
+    # When someone else is already tracing (e.g. --memory-accounting), their peak is left alone; the
+    # reported peak then also covers whatever they allocated earlier, so it is an upper bound.
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    count, first = 0, None
+    try:
+        for item in items():
+            if first is None:
+                first = time.perf_counter() - sent_at
+            on_item(item)
+            count += 1
+        peak = max(0, tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+    return ParseStats(mode, count, time.perf_counter() - sent_at, first, peak + extra_bytes)
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from collections import defaultdict, deque
+from pathlib import Path
+
+from api.common.stats import percentile
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class LatencyHistory:
+    """Recent successful-request latencies per endpoint, persisted between runs.
+
+    Percentiles come from the history loaded at session start, so timeouts stay stable during a run;
+    this run's samples are appended and saved for the next one. Saving merges them into the file under a
+    lock, so xdist workers each add their samples instead of overwriting one another's.
+    """
+
+    def __init__(self, path: Path | None = None, max_samples: int = 500, min_samples: int = 20) -> None:
+        self.path = path
+        self.max_samples = max_samples
+        self.min_samples = min_samples
+        self._samples: dict[str, deque] = defaultdict(lambda: deque(maxlen=self.max_samples))
+        self._new: dict[str, list[float]] = defaultdict(list)
+        self._baseline: dict[str, list[float]] = {}
+        self._cache: dict[tuple[str, float], float | None] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        if self.path is None or not self.path.is_file():
+            return
+        try:
+            stored = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            for endpoint, values in stored.items():
+                self._samples[endpoint].extend(float(v) for v in values)
+                self._baseline[endpoint] = sorted(self._samples[endpoint])
+            self._cache.clear()
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        with self._lock:
+            new = {endpoint: list(values) for endpoint, values in self._new.items() if values}
+            self._new.clear()
+        if not new:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_name(f".{self.path.name}.lock"), "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                stored = json.loads(self.path.read_text(encoding="utf-8")) if self.path.is_file() else {}
+            except ValueError:
+                stored = {}
+            for endpoint, values in new.items():
+                merged = deque(stored.get(endpoint, ()), maxlen=self.max_samples)
+                merged.extend(round(v, 6) for v in values)
+                stored[endpoint] = list(merged)
+            tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(stored), encoding="utf-8")
+            os.replace(tmp, self.path)
+
+    def record(self, endpoint: str, seconds: float) -> None:
+        with self._lock:
+            self._samples[endpoint].append(seconds)
+            self._new[endpoint].append(seconds)
+
+    def percentile(self, endpoint: str, pct: float) -> float | None:
+        """Historical percentile, or None while there are fewer than `min_samples` samples."""
+        key = (endpoint, pct)
+        if key not in self._cache:
+            values = self._baseline.get(endpoint, [])
+            self._cache[key] = percentile(values, pct) if len(values) >= self.min_samples else None
+        return self._cache[key]
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import copy
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from pathlib import Path
+
+FORMAT = "%(asctime)s | %(levelname)-8s | %(name)s | %(message)s"
+# Third-party loggers whose DEBUG output is per-call noise, e.g. `parse` logs every step pattern it compiles.
+QUIET_LOGGERS = ("parse",)
+
+_routes: dict[str, Path] = {}
+_lock = threading.Lock()
+_listener: logging.handlers.QueueListener | None = None
+_queue_handler: logging.Handler | None = None
+_router: RoutingHandler | None = None
+_log_dir: Path | None = None
+_worker: str | None = None
+_console: logging.Handler | None = None
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queues the raw record; message formatting happens on the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return copy.copy(record)
+
+
+class DebugRateLimit(logging.Filter):
+    """Lets through `burst` DEBUG records per message template, then one per `interval` seconds."""
+
+    def __init__(self, burst: int = 20, interval: float = 1.0) -> None:
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self._state: dict[tuple[str, object], list] = {}
+        self._state_lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.burst <= 0:
+            return True
+        key = (record.name, record.msg if record.args else record.pathname + str(record.lineno))
+        now = time.monotonic()
+        with self._state_lock:
+            state = self._state.get(key)
+            if state is None:
+                self._state[key] = [1, now, 0]
+                return True
+            count, last, suppressed = state
+            if count < self.burst or now - last >= self.interval:
+                state[:] = [count + 1, now, 0]
+                if suppressed:
+                    record.msg = f"{record.msg} ({suppressed} similar DEBUG records suppressed)"
+                return True
+            state[2] += 1
+            return False
+
+
+class RoutingHandler(logging.Handler):
+    """Sends each record to the rotating file registered for its logger name (or the default file)."""
+
+    def __init__(self, default_file: Path, max_bytes: int, backups: int) -> None:
+        super().__init__()
+        self.default_file = default_file
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._handlers: dict[Path, logging.Handler] = {}
+        self._formatter = logging.Formatter(FORMAT)
+
+    def _handler_for(self, path: Path) -> logging.Handler:
+        handler = self._handlers.get(path)
+        if handler is None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(path, maxBytes=self.max_bytes,
+                                                           backupCount=self.backups, encoding="utf-8")
+            # Start every run in a fresh file; the previous run's log becomes <name>.1.
+            if path.exists() and path.stat().st_size:
+                handler.doRollover()
+            handler.setFormatter(self._formatter)
+            self._handlers[path] = handler
+        return handler
+
+    def emit(self, record: logging.LogRecord) -> None:
+        name = record.name
+        with _lock:
+            path = next((log_path(p) for prefix, p in _routes.items()
+                         if name == prefix or name.startswith(prefix + ".")), self.default_file)
+        self._handler_for(path).handle(record)
+
+    def close(self) -> None:
+        for handler in self._handlers.values():
+            handler.close()
+        super().close()
+
+
+def _per_worker(log_file: Path) -> Path:
+    # xdist workers would otherwise open (and roll over) the same files: <stem>.<worker><suffix>.
+    return log_file.with_name(f"{log_file.stem}.{_worker}{log_file.suffix}") if _worker else log_file
+
+
+def log_path(log_file: Path) -> Path:
+    """Where `log_file` is written: as is, or under the directory given to setup() as `log_dir`, with the
+    xdist worker id given to setup() inserted before the suffix."""
+    log_file = Path(log_file)
+    return _per_worker(_log_dir / log_file.name if _log_dir is not None else log_file)
+
+
+def get_logger(name: str, log_file: Path) -> logging.Logger:
+    """Return `name`'s logger with its records routed to `log_file`."""
+    with _lock:
+        _routes[name] = Path(log_file)
+    return logging.getLogger(name)
+
+
+def setup(default_file: Path, *, level: int = logging.DEBUG, max_bytes: int = 5 * 1024 * 1024,
+          backups: int = 3, debug_burst: int = 20, debug_interval: float = 1.0, log_dir: Path | None = None,
+          worker: str | None = None, console_level: int | None = logging.INFO) -> None:
+    global _listener, _queue_handler, _router, _log_dir, _worker, _console
+    if _listener is not None:
+        return
+    _log_dir = log_dir
+    _worker = worker
+    if log_dir is not None:
+        # Step modules open their log files at import time.
+        log_dir.mkdir(parents=True, exist_ok=True)
+    _router = RoutingHandler(_per_worker(Path(default_file)), max_bytes, backups)
+    record_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _queue_handler = DeferredQueueHandler(record_queue)
+    _queue_handler.addFilter(DebugRateLimit(debug_burst, debug_interval))
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(_queue_handler)
+    if console_level is not None:
+        # Synchronous, so pytest attributes the output to the test that logged it (shown with its failure).
+        _console = logging.StreamHandler()
+        _console.setLevel(console_level)
+        _console.setFormatter(logging.Formatter(FORMAT))
+        root.addHandler(_console)
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(max(level, logging.INFO))
+    _listener = logging.handlers.QueueListener(record_queue, _router)
+    _listener.start()
+
+
+def shutdown() -> None:
+    global _listener, _queue_handler, _router, _log_dir, _worker, _console
+    if _listener is None:
+        return
+    logging.getLogger().removeHandler(_queue_handler)
+    if _console is not None:
+        logging.getLogger().removeHandler(_console)
+        _console = None
+    _listener.stop()
+    _router.close()
+    # Only now: the listener routes the records still queued at stop() with these.
+    _listener = _queue_handler = _router = _log_dir = _worker = None
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+Path = tuple[Any, ...]
+
+_MISSING = object()
+
+
+def _digest(data: bytes) -> bytes:
+    return b"h" + hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _scalar(value: Any) -> bytes:
+    # Type-tagged so 1, "1" and true differ. Short scalars are their own digest (hashing dominates the
+    # cost of a tree otherwise); the "h" tag keeps them distinct from hashed ones.
+    if isinstance(value, str):
+        data = b"s" + value.encode("utf-8")
+    elif value is None or isinstance(value, bool):
+        data = b"c" + str(value).encode()
+    elif isinstance(value, (int, float)):
+        data = b"n" + repr(value).encode()
+    else:
+        data = b"j" + json.dumps(value, sort_keys=True, default=str).encode("utf-8")
+    return data if len(data) <= 16 else _digest(data)
+
+
+def _framed(digest: bytes) -> bytes:
+    return len(digest).to_bytes(4, "big") + digest
+
+
+@dataclass(slots=True)
+class Node:
+    """A JSON object or array with a digest over its whole subtree; equal digests mean equal subtrees.
+
+    `children` holds a Node for each nested object/array and just the digest for each scalar, whose value
+    is read back from `value` (the decoded document itself, not a copy) when a diff reports it.
+    """
+
+    digest: bytes
+    kind: str
+    value: Any = field(repr=False)
+    children: dict[Any, Node | bytes] = field(default_factory=dict, repr=False)
+
+    @property
+    def hex(self) -> str:
+        return self.digest.hex()
+
+    def summary(self) -> str:
+        return f"{self.kind} of {len(self.children)}"
+
+
+def _child(value: Any) -> Node | bytes:
+    if isinstance(value, (dict, list)):
+        return tree(value)
+    return _scalar(value)
+
+
+def _digest_of(child: Node | bytes) -> bytes:
+    return child if isinstance(child, bytes) else child.digest
+
+
+def tree(value: Any) -> Node:
+    """Merkle tree of a decoded JSON document; keys are hashed in sorted order, arrays in order."""
+    if isinstance(value, dict):
+        children = {key: _child(child) for key, child in value.items()}
+        data = b"{" + b"".join(_framed(str(key).encode("utf-8")) + _framed(_digest_of(children[key]))
+                               for key in sorted(children, key=str))
+        return Node(_digest(data), "object", value, children)
+    if isinstance(value, list):
+        children = {index: _child(child) for index, child in enumerate(value)}
+        return Node(_digest(b"[" + b"".join(_framed(_digest_of(child)) for child in children.values())), "array",
+                    value, children)
+    return Node(_scalar(value), "scalar", value)
+
+
+def _summary(parent: Node, key: Any, child: Node | bytes) -> Any:
+    return parent.value[key] if isinstance(child, bytes) else child.summary()
+
+
+def diff(left: Node | None, right: Node | None, path: Path = ()) -> Iterator[tuple[Path, Any, Any]]:
+    """(path, left, right) for every differing subtree, descending only where digests differ.
+
+    Work is proportional to the changed paths (and the width of the containers on them), not the
+    document size. A missing side is reported with the `missing()` marker; a value that changed kind
+    (object vs array vs scalar) is reported whole, containers as "object of N" / "array of N".
+    """
+    if left is None or right is None:
+        yield path, left.summary() if left is not None else _MISSING, right.summary() if right is not None else _MISSING
+        return
+    if left.digest == right.digest:
+        return
+    if left.kind != right.kind or left.kind == "scalar":
+        yield path, left.value if left.kind == "scalar" else left.summary(), \
+            right.value if right.kind == "scalar" else right.summary()
+        return
+    for key, child in left.children.items():
+        other = right.children.get(key, _MISSING)
+        if other is not _MISSING and _digest_of(other) == _digest_of(child):
+            continue
+        if isinstance(child, Node) and isinstance(other, Node) and child.kind == other.kind:
+            yield from diff(child, other, path + (key,))
+        else:
+            yield (path + (key,), _summary(left, key, child),
+                   _MISSING if other is _MISSING else _summary(right, key, other))
+    for key, other in right.children.items():
+        if key not in left.children:
+            yield path + (key,), _MISSING, _summary(right, key, other)
+
+
+def missing(value: Any) -> bool:
+    """True for the marker diff() reports for a side that has no such path."""
+    return value is _MISSING
+
+
+def format_path(path: Path) -> str:
+    out = "$"
+    for key in path:
+        out += f"[{key}]" if isinstance(key, int) else f".{key}"
+    return out
+
+
+# --- Shapes ---------------------------------------------------------------------------------------------
+# A shape maps the kinds a value was seen with to their detail: {"object": {key: shape}, "array": shape,
+# "str": None, ...}. Arrays collapse to one element shape, so a 10 000-series body has the shape of one series.
+
+def _kind(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, dict):
+        return "object"
+    if isinstance(value, list):
+        return "array"
+    return type(value).__name__
+
+
+def _signature(value: Any) -> Any:
+    """Hashable canonical shape; equal for values of equal shape, so array elements dedupe by set."""
+    kind = _kind(value)
+    if kind == "object":
+        return kind, tuple(sorted((key, _signature(child)) for key, child in value.items()))
+    if kind == "array":
+        return kind, frozenset(_signature(child) for child in value)
+    return kind
+
+
+def _expand(signature: Any) -> dict[str, Any]:
+    if isinstance(signature, str):
+        return {signature: None}
+    kind, detail = signature
+    if kind == "object":
+        return {kind: {key: _expand(child) for key, child in detail}}
+    element = None
+    for child in detail:
+        element = merge_shapes(element, _expand(child))
+    return {kind: element}
+
+
+def shape(value: Any) -> dict[str, Any]:
+    # Homogeneous arrays repeat one signature, so each distinct element shape is expanded and merged once.
+    return _expand(_signature(value))
+
+
+def merge_shapes(left: dict[str, Any] | None, right: dict[str, Any] | None) -> dict[str, Any] | None:
+    if left is None or right is None:
+        return left if right is None else right
+    merged = dict(left)
+    for kind, detail in right.items():
+        if kind not in merged:
+            merged[kind] = detail
+        elif kind == "object":
+            keys = dict(merged[kind])
+            for key, child in detail.items():
+                keys[key] = merge_shapes(keys.get(key), child)
+            merged[kind] = keys
+        elif kind == "array":
+            merged[kind] = merge_shapes(merged[kind], detail)
+    return merged
+
+
+def _shape_path(path: Path) -> tuple[str, str | None]:
+    """JSONPath-like location of a shape-tree path, and the kind it ends on (None if it ends on a key)."""
+    out, i = "$", 0
+    while i < len(path):
+        kind = path[i]
+        i += 1
+        if i == len(path):
+            return out, kind
+        if kind == "object":
+            out += f".{path[i]}"
+            i += 1
+        else:
+            out += "[*]"
+    return out, None
+
+
+def shape_diff(left: dict[str, Any] | None, right: dict[str, Any] | None,
+               names: tuple[str, str] = ("left", "right")) -> list[str]:
+    """Human-readable differences between two shapes, e.g. '$.data[*].value: string only in right'."""
+    changes = []
+    for path, a, b in diff(tree(left or {}), tree(right or {})):
+        where, kind = _shape_path(path)
+        side = names[0] if missing(b) else names[1] if missing(a) else None
+        if kind is None:
+            changes.append(f"{where}: only in {side}" if side else f"{where}: differs")
+        elif side:
+            changes.append(f"{where}: {kind} only in {side}")
+        elif kind == "array" and (a is None or b is None):
+            changes.append(f"{where}: array always empty in {names[0] if a is None else names[1]}")
+        else:
+            changes.append(f"{where}: {kind} differs")
+    return changes
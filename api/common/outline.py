@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import itertools
+import json
+import math
+import random
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Iterator, Mapping, Sequence
+
+COVERAGE = ("pairwise", "stratified", "full")
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)\s*([smhd])")
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+Row = dict[str, Any]
+Allowed = Callable[[Row], bool]
+
+
+class InventoryError(ValueError):
+    """An inventory file or generated-outline request that can't produce rows."""
+
+
+def parse_duration(text: str) -> timedelta:
+    """'90s', '30m', '6h', '1d' or combinations like '1h30m'."""
+    parts = _DURATION.findall(text)
+    if not parts or _DURATION.sub("", text).strip():
+        raise InventoryError(f"Invalid duration '{text}', expected e.g. 30m, 6h or 1d12h")
+    return timedelta(seconds=sum(float(n) * _UNITS[unit] for n, unit in parts))
+
+
+def _parse_time(text: str) -> datetime:
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        raise InventoryError(f"Invalid time '{text}', expected ISO 8601 like 2025-07-25T10:00:00Z") from None
+
+
+def _format_time(moment: datetime, like: str) -> str:
+    # Keep the inventory's own spelling of UTC, which is what the API has been queried with so far.
+    if like.endswith("Z"):
+        return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+    return moment.isoformat()
+
+
+def pairs(items: Sequence[Any]) -> Iterator[tuple[Any, Any]]:
+    """Every ordered (source, destination) pair of distinct items."""
+    return itertools.permutations(items, 2)
+
+
+def sliding_windows(start: str, end: str, width: str | None = None, step: str | None = None) -> list[tuple[str, str]]:
+    """(from, to) windows of `width`, every `step`, inside [start, end]; one window of the whole range by default."""
+    first, last = _parse_time(start), _parse_time(end)
+    if last <= first:
+        raise InventoryError(f"Time range {start} .. {end} is empty")
+    size = parse_duration(width) if width else last - first
+    stride = parse_duration(step) if step else size
+    if size <= timedelta(0) or stride <= timedelta(0):
+        raise InventoryError("Time window width and step must be positive")
+    windows = []
+    moment = first
+    while moment + size <= last:
+        windows.append((_format_time(moment, start), _format_time(moment + size, end)))
+        moment += stride
+    return windows
+
+
+def product(dimensions: Mapping[str, Sequence[Any]], allowed: Allowed | None = None) -> Iterator[Row]:
+    names = list(dimensions)
+    for values in itertools.product(*dimensions.values()):
+        row = dict(zip(names, values))
+        if allowed is None or allowed(row):
+            yield row
+
+
+def pairwise(dimensions: Mapping[str, Sequence[Any]], allowed: Allowed | None = None) -> Iterator[Row]:
+    """Rows covering every allowed pair of values of every two dimensions at least once.
+
+    Greedy: each row starts from the first uncovered value pair and fills the other dimensions with the
+    value covering the most still-uncovered pairs. Far fewer rows than the full product once there are
+    more than two dimensions; deterministic for the same inventory.
+    """
+    names = list(dimensions)
+    values = [list(v) for v in dimensions.values()]
+    if len(names) < 2 or any(not v for v in values):
+        yield from product(dimensions, allowed)
+        return
+    ok = allowed or (lambda row: True)
+
+    def partial(assigned: dict[int, int]) -> Row:
+        return {names[d]: values[d][v] for d, v in assigned.items()}
+
+    pending = [(i, a, j, b)
+               for i, j in itertools.combinations(range(len(names)), 2)
+               for a in range(len(values[i])) for b in range(len(values[j]))
+               if ok(partial({i: a, j: b}))]
+    uncovered = set(pending)
+    for seed in pending:
+        if seed not in uncovered:
+            continue
+        i, a, j, b = seed
+        assigned = {i: a, j: b}
+        for d in range(len(names)):
+            if d in assigned:
+                continue
+            best, gain = None, -1
+            for v in range(len(values[d])):
+                if not ok(partial({**assigned, d: v})):
+                    continue
+                covers = sum((min(d, e), v if d < e else w, max(d, e), w if d < e else v) in uncovered
+                             for e, w in assigned.items())
+                if covers > gain:
+                    best, gain = v, covers
+            if best is None:
+                break
+            assigned[d] = best
+        if len(assigned) < len(names):
+            uncovered.discard(seed)  # no complete allowed row contains this pair
+            continue
+        uncovered.difference_update((d, assigned[d], e, assigned[e])
+                                    for d, e in itertools.combinations(range(len(names)), 2))
+        yield {names[d]: values[d][assigned[d]] for d in range(len(names))}
+
+
+def stratified(dimensions: Mapping[str, Sequence[Any]], by: str, per_stratum: int, seed: int = 0,
+               allowed: Allowed | None = None) -> Iterator[Row]:
+    """Up to `per_stratum` random rows for every value of dimension `by`, drawn without building the product."""
+    rng = random.Random(seed)
+    others = {name: list(v) for name, v in dimensions.items() if name != by}
+    sizes = [len(v) for v in others.values()]
+    total = math.prod(sizes)
+    for stratum in dimensions[by]:
+        taken = 0
+        # range() samples lazily; draw a few spare indices for rows the constraint rejects.
+        for index in rng.sample(range(total), min(total, per_stratum * 2 + 2)):
+            row = {by: stratum}
+            for (name, choices), size in zip(reversed(others.items()), reversed(sizes)):
+                index, pick = divmod(index, size)
+                row[name] = choices[pick]
+            row = {name: row[name] for name in dimensions}
+            if allowed is None or allowed(row):
+                yield row
+                taken += 1
+                if taken == per_stratum:
+                    break
+
+
+def cover(dimensions: Mapping[str, Sequence[Any]], coverage: str, by: str, per_stratum: int, seed: int,
+          allowed: Allowed | None = None) -> Iterator[Row]:
+    if coverage == "full":
+        return product(dimensions, allowed)
+    if coverage == "stratified":
+        return stratified(dimensions, by, per_stratum, seed, allowed)
+    return pairwise(dimensions, allowed)
+
+
+def _distinct_vrouters(row: Row) -> bool:
+    return "source" not in row or "peer" not in row or row["source"] != row["peer"]
+
+
+def _distinct_ips(row: Row) -> bool:
+    return row.get("source_ip") is None or row.get("source_ip") != row.get("destination_ip")
+
+
+@dataclass
+class Inventory:
+    """What the generated outlines sweep over: vrouters, metrics, a time range and ping endpoints."""
+
+    vrouters: list[str] = field(default_factory=list)
+    metrics: list[str] = field(default_factory=list)
+    time_from: str | None = None
+    time_to: str | None = None
+    window: str | None = None
+    step: str | None = None
+    ping_sources: list[str] = field(default_factory=list)
+    ping_destinations: list[str] = field(default_factory=list)
+    ping_types: list[str] = field(default_factory=list)
+
+    @classmethod
+    def load(cls, path: Path) -> Inventory:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except ValueError as e:
+            raise InventoryError(f"Inventory {path} is not valid JSON: {e}") from None
+        time_range = data.get("time_range", {})
+        ping = data.get("ping", {})
+        return cls(
+            vrouters=[str(v) for v in data.get("vrouters", [])],
+            metrics=[str(m) for m in data.get("metrics", [])],
+            time_from=time_range.get("from"),
+            time_to=time_range.get("to"),
+            window=time_range.get("window"),
+            step=time_range.get("step"),
+            ping_sources=[str(ip) for ip in ping.get("sources", [])],
+            ping_destinations=[str(ip) for ip in ping.get("destinations", [])],
+            ping_types=[str(t) for t in ping.get("types", [])],
+        )
+
+    @classmethod
+    def from_env(cls, values: Mapping[str, str | None]) -> Inventory:
+        """The single source/peer, time range and ping target the env file (and CLI overrides) describe."""
+        return cls(
+            vrouters=[v for v in (values.get("VALID_SOURCE_VROUTER_ID"), values.get("VALID_PEER_VROUTER_ID")) if v],
+            metrics=[values.get("DEFAULT_QUERY") or "wireguard_connection_status"],
+            time_from=values.get("VALID_TIME_FROM"),
+            time_to=values.get("VALID_TIME_TO"),
+            ping_sources=[v for v in (values.get("PING_SOURCE_IP"),) if v],
+            ping_destinations=[v for v in (values.get("PING_DESTINATION_IP"),) if v],
+            ping_types=[values.get("PING_TYPE")] if values.get("PING_TYPE") else ["ping", "trace"],
+        )
+
+    def windows(self) -> list[tuple[str, str]]:
+        if not self.time_from or not self.time_to:
+            raise InventoryError("The inventory has no time range (time_range.from / time_range.to)")
+        return sliding_windows(self.time_from, self.time_to, self.window, self.step)
+
+    def require(self, **lists: list) -> None:
+        missing = [name for name, values in lists.items() if not values]
+        if missing:
+            raise InventoryError(f"The inventory has no {', '.join(missing)}")
+
+
+def _vrouter_pairs(inventory: Inventory, coverage: str, per_stratum: int, seed: int) -> Iterator[Row]:
+    inventory.require(vrouters=inventory.vrouters)
+    return ({"source": source, "peer": peer} for source, peer in pairs(inventory.vrouters))
+
+
+def _time_windows(inventory: Inventory, coverage: str, per_stratum: int, seed: int) -> Iterator[Row]:
+    return ({"time_from": start, "time_to": end} for start, end in inventory.windows())
+
+
+def _wireguard_sweep(inventory: Inventory, coverage: str, per_stratum: int, seed: int) -> Iterator[Row]:
+    inventory.require(vrouters=inventory.vrouters, metrics=inventory.metrics)
+    dimensions = {"source": inventory.vrouters, "peer": inventory.vrouters, "window": inventory.windows(),
+                  "metric": inventory.metrics}
+    for row in cover(dimensions, coverage, "source", per_stratum, seed, _distinct_vrouters):
+        time_from, time_to = row.pop("window")
+        yield {**row, "time_from": time_from, "time_to": time_to}
+
+
+def _ping_targets(inventory: Inventory, coverage: str, per_stratum: int, seed: int) -> Iterator[Row]:
+    inventory.require(ping_sources=inventory.ping_sources, ping_destinations=inventory.ping_destinations)
+    dimensions = {"source_ip": inventory.ping_sources, "destination_ip": inventory.ping_destinations,
+                  "ping_type": inventory.ping_types}
+    return cover(dimensions, coverage, "source_ip", per_stratum, seed, _distinct_ips)
+
+
+GENERATORS: dict[str, Callable[[Inventory, str, int, int], Iterator[Row]]] = {
+    "vrouter-pairs": _vrouter_pairs,
+    "time-windows": _time_windows,
+    "wireguard-sweep": _wireguard_sweep,
+    "ping-targets": _ping_targets,
+}
+
+
+def generate(name: str, inventory: Inventory, coverage: str = "pairwise", per_stratum: int = 3,
+             seed: int = 0) -> Iterator[Row]:
+    """Example rows (column -> value) for an `@generated:<name>` Examples table, produced on demand."""
+    try:
+        generator = GENERATORS[name]
+    except KeyError:
+        raise InventoryError(f"Unknown row generator '{name}', expected one of {', '.join(GENERATORS)}") from None
+    if coverage not in COVERAGE:
+        raise InventoryError(f"Unknown coverage '{coverage}', expected one of {', '.join(COVERAGE)}")
+    return generator(inventory, coverage, per_stratum, seed)
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: buckets are still shared between threads, just not between processes
+    fcntl = None
+
+_STATE = struct.Struct("dd")  # tokens, monotonic-independent wall timestamp of the last refill
+
+
+@dataclass(frozen=True)
+class Limit:
+    rate: float  # tokens per second
+    burst: float
+
+    @classmethod
+    def parse(cls, spec: str) -> Limit:
+        """'10' or '10/s' -> 10 req/s with a burst of 10; '10/s:25' -> burst of 25."""
+        match = re.fullmatch(r"\s*([\d.]+)\s*(?:/s)?\s*(?::\s*([\d.]+))?\s*", spec)
+        if not match or float(match.group(1)) <= 0:
+            raise ValueError(f"Invalid rate limit '{spec}', expected <requests per second>[/s][:<burst>]")
+        rate = float(match.group(1))
+        return cls(rate, float(match.group(2) or max(rate, 1.0)))
+
+
+def parse_limits(value: str | None) -> dict[str, Limit]:
+    """'*=20,metrics.qa:8080=5/s:10' -> {"*": Limit(20, 20), "metrics.qa:8080": Limit(5, 10)}"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in (value or "").split(","))):
+        key, sep, spec = item.rpartition("=")
+        if not sep or not key:
+            raise ValueError(f"Invalid rate limit entry '{item}', expected <host or tenant>=<rate>")
+        limits[key.strip()] = Limit.parse(spec)
+    return limits
+
+
+class FileTokenBucket:
+    """Token bucket whose state lives in a small file guarded by flock, so every thread and every
+    pytest-xdist worker on the machine draws from the same bucket."""
+
+    def __init__(self, path: Path, limit: Limit) -> None:
+        self.path = path
+        self.limit = limit
+        self.waited = 0.0
+        self.acquired = 0
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+
+    def _take(self, now: float) -> float:
+        """Take a token if one is available; otherwise return how long until one will be."""
+        raw = os.pread(self._fd, _STATE.size, 0)
+        tokens, last = _STATE.unpack(raw) if len(raw) == _STATE.size else (self.limit.burst, now)
+        tokens = min(self.limit.burst, tokens + max(0.0, now - last) * self.limit.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.limit.rate
+        os.pwrite(self._fd, _STATE.pack(tokens, now), 0)
+        return wait
+
+    def _give_back(self, now: float) -> float:
+        raw = os.pread(self._fd, _STATE.size, 0)
+        if len(raw) == _STATE.size:
+            tokens, last = _STATE.unpack(raw)
+            os.pwrite(self._fd, _STATE.pack(min(self.limit.burst, tokens + 1), last), 0)
+        return 0.0
+
+    def _locked(self, update: Callable[[float], float]) -> float:
+        with self._lock:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                return update(time.time())
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def acquire(self) -> float:
+        """Block until a token is available; returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            wait = self._locked(self._take)
+            if not wait:
+                break
+            time.sleep(wait)
+            waited += wait
+        with self._lock:
+            self.waited += waited
+            self.acquired += 1
+        return waited
+
+    def try_acquire(self) -> bool:
+        if self._locked(self._take):
+            return False
+        with self._lock:
+            self.acquired += 1
+        return True
+
+    def release(self) -> None:
+        """Return a token taken with try_acquire() that was not used."""
+        self._locked(self._give_back)
+        with self._lock:
+            self.acquired -= 1
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class RateLimiter:
+    """Buckets per host and per tenant (X-TenantID); "*" entries apply to anything not listed."""
+
+    def __init__(self, state_dir: Path, host_limits: dict[str, Limit], tenant_limits: dict[str, Limit]) -> None:
+        self.state_dir = state_dir
+        self.limits = {"host": host_limits, "tenant": tenant_limits}
+        self.buckets: dict[tuple[str, str], FileTokenBucket | None] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, kind: str, key: str) -> FileTokenBucket | None:
+        with self._lock:
+            if (kind, key) not in self.buckets:
+                limit = self.limits[kind].get(key) or self.limits[kind].get("*")
+                name = f"{kind}-{hashlib.sha1(key.encode()).hexdigest()[:16]}.bucket"
+                self.buckets[(kind, key)] = FileTokenBucket(self.state_dir / name, limit) if limit else None
+            return self.buckets[(kind, key)]
+
+    def _buckets_for(self, host: str, tenant: str | None) -> list[FileTokenBucket]:
+        buckets = [self._bucket("host", host)]
+        if tenant:
+            buckets.append(self._bucket("tenant", tenant))
+        return [b for b in buckets if b is not None]
+
+    def acquire(self, host: str, tenant: str | None) -> float:
+        return sum(bucket.acquire() for bucket in self._buckets_for(host, tenant))
+
+    def try_acquire(self, host: str, tenant: str | None) -> bool:
+        """Take a token from every bucket, or from none: a refusal returns the tokens already taken."""
+        taken = []
+        for bucket in self._buckets_for(host, tenant):
+            if not bucket.try_acquire():
+                for held in taken:
+                    held.release()
+                return False
+            taken.append(bucket)
+        return True
+
+    def close(self) -> None:
+        for bucket in self.buckets.values():
+            if bucket is not None:
+                bucket.close()
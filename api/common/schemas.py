@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable
+
+try:
+    import fastjsonschema
+except ImportError:  # optional: the built-in compiler below covers the keywords these schemas use
+    fastjsonschema = None
+
+_ID = {"type": ["integer", "string"]}
+
+_METRIC_POINT = {"anyOf": [
+    {"type": "array", "minItems": 2},
+    {"type": "object", "required": ["value"]},
+]}
+
+_METRIC_SERIES = {
+    "type": "object",
+    "properties": {
+        "sourceVrouterID": _ID,
+        "peerVrouterID": _ID,
+        "values": {"type": "array", "items": _METRIC_POINT},
+    },
+}
+
+SCHEMAS: dict[str, dict] = {
+    "pulumi account": {
+        "type": "object",
+        "required": ["id"],
+        "properties": {"id": _ID},
+    },
+    "pulumi organization": {
+        "type": "object",
+        "required": ["id"],
+        "properties": {"id": _ID},
+    },
+    "cloud account": {
+        "type": "object",
+        "required": ["id"],
+        "properties": {"id": _ID, "accountName": {"type": "string"}},
+    },
+    "cloud account list": {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "required": ["id", "accountName"],
+            "properties": {"id": _ID, "accountName": {"type": "string"}},
+        },
+    },
+    "diagnose": {
+        "type": "object",
+        "anyOf": [{"required": ["result"]}, {"required": ["latency"]}, {"required": ["output"]}],
+        "properties": {"output": {"type": "string"}},
+    },
+    "wireguard series": _METRIC_SERIES,
+    # Series come either as a flat list or wrapped in a single outer list.
+    "wireguard metrics": {
+        "type": "array",
+        "items": {"anyOf": [_METRIC_SERIES, {"type": "array", "items": _METRIC_SERIES}]},
+    },
+}
+
+
+class SchemaValidationError(ValueError):
+    def __init__(self, message: str, path: str) -> None:
+        super().__init__(f"{path}: {message}")
+        self.path = path
+
+
+_TYPE_CHECKS = {
+    "object": "isinstance({v}, dict)",
+    "array": "isinstance({v}, list)",
+    "string": "isinstance({v}, str)",
+    "integer": "(isinstance({v}, int) and not isinstance({v}, bool))",
+    "number": "(isinstance({v}, (int, float)) and not isinstance({v}, bool))",
+    "boolean": "isinstance({v}, bool)",
+    "null": "{v} is None",
+}
+
+
+class _Compiler:
+    """Generates straight-line Python for a schema, in the spirit of fastjsonschema.
+
+    Paths are only formatted inside `raise` statements, so a valid document never pays for them.
+    """
+
+    def __init__(self) -> None:
+        self.functions: list[str] = []
+        self.constants: dict[str, Any] = {}
+        self._count = 0
+
+    def _name(self, prefix: str) -> str:
+        self._count += 1
+        return f"{prefix}{self._count}"
+
+    def function(self, schema: dict) -> str:
+        name = self._name("_validate_")
+        body: list[str] = []
+        self._node(schema, "value", "path", body, 1)
+        self.functions.append("\n".join([f"def {name}(value, path):", *body, "    return value"]))
+        return name
+
+    def _node(self, schema: dict, var: str, path: str, out: list[str], depth: int) -> None:
+        def emit(line: str, indent: int = 0) -> None:
+            out.append("    " * (depth + indent) + line)
+
+        def fail(message: str, indent: int = 1) -> None:
+            emit(f"raise SchemaValidationError({message!r}, {path})", indent)
+
+        types = schema.get("type")
+        if types:
+            types = [types] if isinstance(types, str) else types
+            emit(f"if not ({' or '.join(_TYPE_CHECKS[t].format(v=var) for t in types)}):")
+            fail(f"must be {' or '.join(types)}")
+
+        if "enum" in schema:
+            const = self._name("_enum_")
+            self.constants[const] = tuple(schema["enum"])
+            emit(f"if {var} not in {const}:")
+            fail(f"must be one of {list(schema['enum'])}")
+
+        if "anyOf" in schema:
+            # Branch errors are discarded, so branches get an empty path and only the final error is located.
+            branches = ", ".join(self.function(branch) for branch in schema["anyOf"])
+            emit(f"for _branch in ({branches},):")
+            emit("try:", 1)
+            emit(f"_branch({var}, '')", 2)
+            emit("break", 2)
+            emit("except SchemaValidationError:", 1)
+            emit("pass", 2)
+            emit("else:")
+            fail("does not match any of the allowed shapes")
+
+        required, properties = schema.get("required", ()), schema.get("properties", {})
+        if required or properties:
+            # Keywords only apply to matching types; skip the guard when "type" already pinned it.
+            inner = 0 if types == ["object"] else 1
+            if inner:
+                emit(f"if isinstance({var}, dict):")
+            for key in required:
+                emit(f"if {key!r} not in {var}:", inner)
+                fail(f"missing required property {key!r}", inner + 1)
+            for key, subschema in properties.items():
+                item = self._name("_p")
+                emit(f"{item} = {var}.get({key!r}, _MISSING)", inner)
+                emit(f"if {item} is not _MISSING:", inner)
+                self._node(subschema, item, f"{path} + {'.' + key!r}", out, depth + inner + 1)
+
+        if "minItems" in schema or "items" in schema:
+            inner = 0 if types == ["array"] else 1
+            if inner:
+                emit(f"if isinstance({var}, list):")
+            if "minItems" in schema:
+                emit(f"if len({var}) < {int(schema['minItems'])}:", inner)
+                fail(f"must have at least {schema['minItems']} items", inner + 1)
+            if "items" in schema:
+                index, item = self._name("_i"), self._name("_v")
+                emit(f"for {index}, {item} in enumerate({var}):", inner)
+                self._node(schema["items"], item, f"{path} + '[' + str({index}) + ']'", out, depth + inner + 1)
+
+
+def compile_schema(schema: dict, name: str = "schema") -> Callable[[Any], Any]:
+    """Return a function that returns the document unchanged or raises SchemaValidationError."""
+    if fastjsonschema is not None:
+        compiled = fastjsonschema.compile(schema)
+
+        def validate(data: Any) -> Any:
+            try:
+                return compiled(data)
+            except fastjsonschema.JsonSchemaValueException as e:
+                raise SchemaValidationError(e.message, e.name) from None
+
+        return validate
+
+    compiler = _Compiler()
+    root = compiler.function(schema)
+    source = "\n\n".join(compiler.functions)
+    namespace = {"SchemaValidationError": SchemaValidationError, "_MISSING": object(), **compiler.constants}
+    exec(compile(source, f"<schema {name}>", "exec"), namespace)
+    root_fn = namespace[root]
+
+    def validate(data: Any) -> Any:
+        return root_fn(data, "data")
+
+    validate.source = source
+    return validate
+
+
+_validators: dict[str, Callable[[Any], Any]] = {}
+_lock = threading.Lock()
+
+
+def validator(name: str) -> Callable[[Any], Any]:
+    """Compiled validator for a registered endpoint schema, built once per process."""
+    compiled = _validators.get(name)
+    if compiled is None:
+        if name not in SCHEMAS:
+            raise ValueError(f"No response schema registered for '{name}'. Known: {', '.join(sorted(SCHEMAS))}")
+        with _lock:
+            compiled = _validators.get(name) or compile_schema(SCHEMAS[name], name)
+            _validators[name] = compiled
+    return compiled
+
+
+def validate(name: str, data: Any) -> Any:
+    return validator(name)(data)
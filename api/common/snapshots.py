@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Iterable
+
+from api.common import merkle
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+VERSION = 2
+MASK = "<masked>"
+
+# Keys whose values change from run to run: server-assigned IDs, request/trace IDs and timestamps.
+# Input echoes such as sourceVrouterID are stable and stay part of the snapshot.
+VOLATILE_KEYS = re.compile(
+    r"(?i)^(id|uuid|guid|etag|nonce)$"
+    r"|(request|trace|span|correlation|session)_?id$"
+    r"|timestamp$"
+    r"|^(created|updated|modified|deleted|expires?)(_?at|_?on|_?time)?$"
+)
+_ISO_TIME = re.compile(r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?$")
+_UUID = re.compile(r"(?i)^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+
+def _epoch(value: Any) -> bool:
+    """Seconds or milliseconds since 1970 for dates between 2001 and 2286."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return False
+    return 1e9 <= value < 1e10 or 1e12 <= value < 1e13
+
+
+def _volatile_value(value: Any) -> bool:
+    return isinstance(value, str) and bool(_ISO_TIME.match(value) or _UUID.match(value))
+
+
+def normalize(value: Any, keys: Iterable[str] = ()) -> Any:
+    """A copy of a decoded body with volatile values replaced by MASK.
+
+    Masked are the values of VOLATILE_KEYS and of `keys`, ISO 8601 timestamps, UUIDs, and the timestamp
+    of Prometheus samples ([<epoch>, "<value>"], as in the WireGuard series).
+    """
+    extra = frozenset(keys)
+
+    def walk(node: Any) -> Any:
+        if isinstance(node, dict):
+            return {key: MASK if key in extra or VOLATILE_KEYS.search(str(key)) else walk(child)
+                    for key, child in node.items()}
+        if isinstance(node, list):
+            if len(node) == 2 and _epoch(node[0]) and isinstance(node[1], str):
+                return [MASK, node[1]]
+            return [walk(child) for child in node]
+        return MASK if _volatile_value(node) else node
+
+    return walk(value)
+
+
+def address(node: merkle.Node) -> str:
+    # Containers' digests all carry merkle's "h" tag; leave it out so objects spread over directories.
+    return node.digest[1:].hex()
+
+
+class SnapshotStore:
+    """Golden responses, content-addressed: index.json maps each test's nodeid to its snapshot keys and
+    their addresses, and every distinct normalized document is stored once as objects/<ab>/<cdef...>.json,
+    however many keys point to it.
+
+    Address equality means the documents are equal, so only snapshots whose address changed are read and
+    diffed, and the Merkle diff then walks only the subtrees that differ. Saving and pruning merge with the
+    index on disk under a lock, so xdist workers each replace only the tests they ran.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.index: dict[str, dict[str, str]] = {}
+        self._trees: dict[str, merkle.Node] = {}
+
+    @property
+    def index_path(self) -> Path:
+        return self.directory / "index.json"
+
+    def object_path(self, addr: str) -> Path:
+        return self.directory / "objects" / addr[:2] / f"{addr[2:]}.json"
+
+    def load(self) -> SnapshotStore:
+        try:
+            stored = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            self.index = {}
+            return self
+        except ValueError as e:
+            raise ValueError(f"Snapshot index {self.index_path} is not valid: {e}") from None
+        if not isinstance(stored, dict) or stored.get("version") != VERSION or "snapshots" not in stored:
+            raise ValueError(f"Snapshot index {self.index_path} is not a version {VERSION} index; "
+                             f"store the snapshots again with --snapshot update")
+        self.index = stored["snapshots"]
+        return self
+
+    def addresses(self) -> set[str]:
+        return {addr for snapshots in self.index.values() for addr in snapshots.values()}
+
+    @contextlib.contextmanager
+    def _locked(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / ".index.lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def read(self, addr: str) -> Any:
+        return json.loads(self.object_path(addr).read_text(encoding="utf-8"))
+
+    def tree(self, addr: str) -> merkle.Node:
+        # Cached by address: negative scenarios share a handful of error bodies.
+        if addr not in self._trees:
+            self._trees[addr] = merkle.tree(self.read(addr))
+        return self._trees[addr]
+
+    def _write(self, path: Path, text: str) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+
+    def save(self, snapshots: dict[str, dict[str, str]], objects: dict[str, Any]) -> int:
+        """Replace the snapshots of the tests in `snapshots` (nodeid -> key -> address; empty for a test that
+        sent nothing), keeping the other tests' from the index on disk; returns the number of objects written."""
+        with self._locked():
+            self.load()
+            for nodeid, keys in snapshots.items():
+                if keys:
+                    self.index[nodeid] = keys
+                else:
+                    self.index.pop(nodeid, None)
+            written = 0
+            for addr in sorted(self.addresses()):
+                path = self.object_path(addr)
+                if addr in objects and not path.exists():
+                    self._write(path, json.dumps(objects[addr], sort_keys=True, separators=(",", ":")))
+                    written += 1
+            # One key per line and sorted, so a baseline update reviews as a readable diff.
+            index = {nodeid: dict(sorted(keys.items())) for nodeid, keys in sorted(self.index.items())}
+            self._write(self.index_path, json.dumps({"version": VERSION, "snapshots": index}, indent=1))
+        return written
+
+    def prune(self) -> int:
+        """Remove objects no key in the index on disk points to any more."""
+        with self._locked():
+            referenced = self.load().addresses()
+            removed = 0
+            for path in (self.directory / "objects").glob("*/*.json"):
+                if path.parent.name + path.stem not in referenced:
+                    path.unlink()
+                    removed += 1
+        return removed
+
+
+def changes(baseline: merkle.Node, current: merkle.Node, limit: int = 20) -> list[str]:
+    """Readable differences between two snapshots, at most `limit` of them."""
+    out = []
+    for path, old, new in merkle.diff(baseline, current):
+        if len(out) == limit:
+            out.append("...")
+            break
+        where = merkle.format_path(path)
+        if merkle.missing(old):
+            out.append(f"{where}: added {new!r}")
+        elif merkle.missing(new):
+            out.append(f"{where}: removed {old!r}")
+        else:
+            out.append(f"{where}: {old!r} -> {new!r}")
+    return out
+
+
+def merge_results(results: Iterable[dict]) -> dict:
+    """One check result from several (e.g. one per xdist worker, each covering the tests it ran)."""
+    merged: dict = {"snapshots": 0, "matched": 0, "changed": {}, "new": [], "missing": []}
+    for result in results:
+        merged["snapshots"] += result["snapshots"]
+        merged["matched"] += result["matched"]
+        merged["changed"].update(result["changed"])
+        merged["new"] += result["new"]
+        merged["missing"] += result["missing"]
+    merged["changed"] = dict(sorted(merged["changed"].items()))
+    merged["new"].sort()
+    merged["missing"].sort()
+    return merged
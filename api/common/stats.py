@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import math
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(values: list[float]) -> dict[str, float]:
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "min": ordered[0] if ordered else 0.0,
+        "p50": percentile(ordered, 50),
+        "p90": percentile(ordered, 90),
+        "p95": percentile(ordered, 95),
+        "p99": percentile(ordered, 99),
+        "max": ordered[-1] if ordered else 0.0,
+        "mean": sum(ordered) / len(ordered) if ordered else 0.0,
+    }
+
+
+def format_summary(summary: dict[str, float], unit: str = "s") -> str:
+    return (f"n={summary['count']} min={summary['min']:.3f}{unit} p50={summary['p50']:.3f}{unit} "
+            f"p95={summary['p95']:.3f}{unit} p99={summary['p99']:.3f}{unit} max={summary['max']:.3f}{unit}")
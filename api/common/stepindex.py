@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Generic, Iterable, TypeVar
+
+from pytest_bdd import parsers
+
+T = TypeVar("T")
+
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+
+class StepTableError(ValueError):
+    """A step table whose rows are ambiguous or shadow each other."""
+
+
+def _first_word(text: str) -> str:
+    return text.split(" ", 1)[0]
+
+
+@dataclass
+class Row(Generic[T]):
+    pattern: str
+    value: T
+    position: int
+    regex: re.Pattern | None = field(default=None, repr=False)
+
+    @property
+    def literal(self) -> bool:
+        return self.regex is None
+
+    def sample(self) -> str:
+        """A step text this row matches, used to detect overlapping rows."""
+        return _PLACEHOLDER.sub("x", self.pattern)
+
+    def match(self, text: str) -> dict[str, str] | None:
+        if self.regex is None:
+            return {} if text == self.pattern else None
+        match = self.regex.fullmatch(text)
+        return match.groupdict() if match else None
+
+
+class StepTable(Generic[T]):
+    """Step phrases mapped to structured arguments.
+
+    Rows are literal phrases or patterns with `{name}` placeholders, compiled once and anchored. Literal
+    phrases resolve with one dict lookup; patterns are bucketed by their first literal word, so a lookup
+    only tries the few rows that could possibly match. Overlapping rows are rejected up front instead of
+    being resolved by definition order.
+    """
+
+    def __init__(self, name: str, rows: Iterable[tuple[str, T]]) -> None:
+        self.name = name
+        self.rows: list[Row[T]] = []
+        self._literal: dict[str, Row[T]] = {}
+        self._words: dict[str, list[Row[T]]] = defaultdict(list)
+        self._fallback: list[Row[T]] = []
+        for position, (pattern, value) in enumerate(rows):
+            self._add(Row(pattern, value, position, self._compile(pattern)))
+        issues = self.validate()
+        if issues:
+            raise StepTableError(f"Step table '{name}':\n  " + "\n  ".join(issues))
+
+    @staticmethod
+    def _compile(pattern: str) -> re.Pattern | None:
+        if not _PLACEHOLDER.search(pattern):
+            return None
+        parts = _PLACEHOLDER.split(pattern)
+        # split() alternates literal text and placeholder names.
+        regex = "".join(re.escape(part) if i % 2 == 0 else f"(?P<{part}>.+?)" for i, part in enumerate(parts))
+        return re.compile(regex)
+
+    def _add(self, row: Row[T]) -> None:
+        self.rows.append(row)
+        if row.literal:
+            self._literal.setdefault(row.pattern, row)
+        elif _PLACEHOLDER.match(row.pattern) or " " not in row.pattern.split("{", 1)[0]:
+            self._fallback.append(row)
+        else:
+            self._words[_first_word(row.pattern)].append(row)
+
+    def candidates(self, text: str) -> list[Row[T]]:
+        literal = self._literal.get(text)
+        return ([literal] if literal else []) + self._words.get(_first_word(text), []) + self._fallback
+
+    def resolve(self, text: str) -> tuple[T, dict[str, str]] | None:
+        literal = self._literal.get(text)
+        if literal is not None:
+            return literal.value, {}
+        for row in self._words.get(_first_word(text), []) + self._fallback:
+            args = row.match(text)
+            if args is not None:
+                return row.value, args
+        return None
+
+    def literal_phrases(self) -> list[str]:
+        return list(self._literal)
+
+    def first_words(self) -> set[str] | None:
+        """First words of every row, or None if some row starts with a placeholder."""
+        if self._fallback:
+            return None
+        return {_first_word(row.pattern) for row in self.rows if not row.literal}
+
+    def validate(self) -> list[str]:
+        issues = []
+        seen: set[tuple[int, int]] = set()
+        for row in self.rows:
+            for other in self.candidates(row.sample()):
+                if other is row or (other.position, row.position) in seen or other.match(row.sample()) is None:
+                    continue
+                seen.add((row.position, other.position))
+                first, second = sorted((row, other), key=lambda r: r.position)
+                issues.append(f"'{first.pattern}' (row {first.position}) and '{second.pattern}' (row {second.position}) "
+                              f"both match '{row.sample()}'")
+        return issues
+
+    def parser(self, argument: str) -> TableParser:
+        return TableParser(self, argument)
+
+
+class TableParser(parsers.StepParser):
+    """pytest-bdd step parser backed by a StepTable; the row's value is passed as `argument`."""
+
+    def __init__(self, table: StepTable, argument: str) -> None:
+        super().__init__(f"<{table.name}>")
+        self.table = table
+        self.argument = argument
+
+    def parse_arguments(self, name: str) -> dict[str, Any] | None:
+        resolved = self.table.resolve(name)
+        if resolved is None:
+            return None
+        value, args = resolved
+        return {self.argument: value, **args}
+
+    def is_matching(self, name: str) -> bool:
+        return self.table.resolve(name) is not None
+
+
+class StepIndex(Generic[T]):
+    """Candidate step definitions for a step, without asking every parser whether it matches.
+
+    `entries` are (step type or None, parser, payload) in definition order. String parsers and table
+    rows are indexed by exact text, parse/cfparse patterns by their first literal word (case-insensitive,
+    like `parse` itself); regexes and patterns starting with a placeholder are always candidates.
+    Candidates keep definition order, so callers see the same matches in the same order as a linear scan.
+    """
+
+    def __init__(self, entries: Iterable[tuple[str | None, parsers.StepParser, T]]) -> None:
+        self.entries = list(entries)
+        self._exact: dict[str, list[int]] = defaultdict(list)
+        self._words: dict[str, list[int]] = defaultdict(list)
+        self._always: list[int] = []
+        for position, (_, parser, _) in enumerate(self.entries):
+            self._add(position, parser)
+
+    def _add(self, position: int, parser: parsers.StepParser) -> None:
+        if isinstance(parser, parsers.string):
+            self._exact[parser.name].append(position)
+        elif isinstance(parser, TableParser) and parser.table.first_words() is not None:
+            for phrase in parser.table.literal_phrases():
+                self._exact[phrase].append(position)
+            for word in parser.table.first_words():
+                self._words[word.lower()].append(position)
+        elif isinstance(parser, parsers.parse) and " " in parser.name.split("{", 1)[0]:
+            self._words[_first_word(parser.name).lower()].append(position)
+        else:
+            self._always.append(position)
+
+    def _positions(self, step_type: str | None, name: str) -> list[int]:
+        positions = set(self._exact.get(name, ()))
+        positions.update(self._words.get(_first_word(name).lower(), ()))
+        positions.update(self._always)
+        return [p for p in sorted(positions)
+                if self.entries[p][0] is None or step_type is None or self.entries[p][0] == step_type]
+
+    def candidates(self, step_type: str | None, name: str) -> list[T]:
+        return [self.entries[p][2] for p in self._positions(step_type, name)]
+
+    def matches(self, step_type: str | None, name: str) -> list[T]:
+        return [self.entries[p][2] for p in self._positions(step_type, name) if self.entries[p][1].is_matching(name)]
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+from api.common import client, jsonio
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+LOG = logging.getLogger("warm-state")
+
+
+def config_hash(values: dict[str, str | None]) -> str:
+    """Short digest of the env-file values; any config change invalidates the cached resources."""
+    digest = hashlib.sha256(json.dumps(sorted(values.items())).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def _contains_id(document, resource_id) -> bool:
+    if isinstance(document, list):
+        return any(isinstance(entry, dict) and entry.get("id") == resource_id for entry in document)
+    return isinstance(document, dict) and document.get("id") == resource_id
+
+
+class WarmState:
+    """IDs of resources created by @setup scenarios, kept between runs per environment and config hash.
+
+    Each entry remembers a cheap GET (usually the list endpoint) that must still return the ID for the
+    resource to be reused. Changes are merged into the file under a lock, so xdist workers don't clobber
+    each other's entries.
+    """
+
+    def __init__(self, path: Path | None = None, key: str = "", ttl: float = 0.0, fresh: bool = False) -> None:
+        self.path = path
+        self.key = key
+        self.ttl = ttl
+        self.fresh = fresh
+        self.entries: dict[str, dict] = {}
+        self.warm: dict[str, dict] = {}
+        self.stale: dict[str, str] = {}
+        self._changes: dict[str, dict | None] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        if self.path is None or not self.path.is_file():
+            return
+        try:
+            stored = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        self.entries = stored.get(self.key, {})
+
+    def save(self) -> None:
+        if self.path is None or not self._changes:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_name(f".{self.path.name}.lock"), "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                stored = json.loads(self.path.read_text(encoding="utf-8")) if self.path.is_file() else {}
+            except ValueError:
+                stored = {}
+            env = self.key.partition(":")[0]
+            # Entries for this environment under an older config hash can never be reused.
+            stored = {key: value for key, value in stored.items() if key == self.key or key.partition(":")[0] != env}
+            entries = stored.setdefault(self.key, {})
+            for resource, entry in self._changes.items():
+                if entry is None:
+                    entries.pop(resource, None)
+                else:
+                    entries[resource] = entry
+            tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(stored, indent=2), encoding="utf-8")
+            os.replace(tmp, self.path)
+
+    def _check(self, entry: dict) -> str | None:
+        """None if the resource is still there, otherwise why it can't be reused."""
+        age = time.time() - entry.get("created", 0)
+        if self.ttl and age > self.ttl:
+            return f"older than {self.ttl / 3600:g}h"
+        resp = client.get(entry["check"], headers=entry.get("headers") or {}, retries=0)
+        if resp.status_code != 200:
+            return f"check returned {resp.status_code}"
+        try:
+            document = jsonio.response_json(resp)
+        except ValueError:
+            return "check returned a non-JSON body"
+        return None if _contains_id(document, entry["id"]) else f"id {entry['id']} no longer listed"
+
+    def validate(self, resources: set[str]) -> None:
+        """GET each cached resource once; warm ones are reused, the rest forgotten and provisioned again."""
+        if self.fresh:
+            return
+        for resource, entry in sorted(self.entries.items()):
+            if resource not in resources:
+                continue
+            try:
+                reason = self._check(entry)
+            except requests.RequestException as e:
+                # Can't tell whether it still exists; provision this run but keep the entry.
+                LOG.warning(f"Warm state: could not check {resource} ({e})")
+                continue
+            if reason:
+                LOG.info(f"Warm state: {resource} is stale ({reason}), will provision again")
+                self.stale[resource] = reason
+                self.forget(resource)
+            else:
+                LOG.info(f"Warm state: reusing {resource} id={entry['id']}")
+                self.warm[resource] = entry
+
+    def recorded_ids(self) -> set:
+        """IDs of every resource in the state file, for any environment or config, and of this run's entries."""
+        ids = {entry["id"] for entry in self.entries.values()}
+        if self.path is not None and self.path.is_file():
+            try:
+                stored = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                stored = {}
+            ids |= {entry.get("id") for entries in stored.values() for entry in entries.values()}
+        return ids
+
+    def is_warm(self, resource: str) -> bool:
+        return resource in self.warm
+
+    def resource_id(self, resource: str):
+        entry = self.warm.get(resource) or self.entries.get(resource)
+        return entry["id"] if entry else None
+
+    def remember(self, resource: str, resource_id, check: str, headers: dict | None = None) -> None:
+        entry = {"id": resource_id, "check": check, "headers": dict(headers or {}), "created": time.time()}
+        with self._lock:
+            self.entries[resource] = entry
+            self._changes[resource] = entry
+
+    def forget(self, resource: str) -> None:
+        with self._lock:
+            self.entries.pop(resource, None)
+            self.warm.pop(resource, None)
+            self._changes[resource] = None
+
+
+# Replaced by the warm_state plugin; without it nothing is cached or reused.
+state = WarmState()
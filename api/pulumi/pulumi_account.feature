@@ -1,13 +1,15 @@
 Feature: Validate API endpoints for Pulumi
 
-@setup @sanity
+@setup @sanity @provides:pulumi-account
 Scenario Outline: Save a Pulumi account
   When I send a POST request to save a pulumi account
   Then the pulumi save account API response should be 201
   And the pulumi save account API response body must contain a pulumi account ID
+  And the response should match the pulumi account schema
 
-@setup @sanity
+@setup @sanity @requires:pulumi-account @provides:pulumi-org
 Scenario Outline: Save a Pulumi organization
   When I send a POST request to save a pulumi organization
   Then the pulumi save organization API response should be 201
   And the pulumi save organization API response body must contain a pulumi organization ID
+  And the response should match the pulumi organization schema
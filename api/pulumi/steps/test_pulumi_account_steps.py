@@ -1,8 +1,7 @@
-import requests
 import logging
-import json
 from pytest_bdd import scenarios, parsers, when, then
 from api.urlpaths.paths import Paths
+from api.common import client, jsonio, warmstate
 
 logger = logging.getLogger(__name__)
 
@@ -18,24 +17,25 @@ pulumi = {}
 @when(parsers.cfparse("I send a POST request to save a pulumi account"))
 def send_post_req_save_pulumi_acc(izo_mcn_url, default_headers, pulumi_acc, pulumi_email, pulumi_accessToken,
                                   pulumi_description):
-    data = json.dumps({
+    data = jsonio.dumps({
         "accountName": pulumi_acc,
         "email": pulumi_email,
         "accessToken": pulumi_accessToken,
         "description": pulumi_description,
         "expires": 0
     })
-    response_data["response"] = requests.post(f"{izo_mcn_url}/pulumi/account", headers=default_headers, data=data)
+    response_data["response"] = client.post(f"{izo_mcn_url}/pulumi/account", headers=default_headers, data=data)
 
 @then(parsers.cfparse("the pulumi save account API response should be {status_code}"))
 def check_response_code_save_pulumi_acc(status_code):
     assert response_data["response"].status_code == int(status_code)
 
 @then(parsers.cfparse("the pulumi save account API response body must contain a pulumi account ID"))
-def check_response_body_save_pulumi_acc():
-    resp = response_data["response"].json()
+def check_response_body_save_pulumi_acc(izo_mcn_url, default_headers):
+    resp = jsonio.response_json(response_data["response"])
     assert "id" in resp.keys()
     pulumi['acc_id'] = resp['id']
+    warmstate.state.remember("pulumi-account", resp['id'], f"{izo_mcn_url}{Paths.PULUMI_ACCOUNT}", default_headers)
     print(f"Pulumi Acc ID - {pulumi['acc_id']}")
 
 
@@ -46,7 +46,7 @@ def check_response_body_save_pulumi_acc():
 @when(parsers.cfparse("I send a POST request to save a pulumi organization"))
 def send_post_req_save_pulumi_org(izo_mcn_url, default_headers, pulumi_org_name, pulumi_accessTokenName, pulumi_acc,
                                   pulumi_accessToken, pulumi_accessTokenDesc, pulumi_subscriptionKey):
-    data = json.dumps({
+    data = jsonio.dumps({
         "name": pulumi_org_name,
         "admin": True,
         "accessTokenName": pulumi_accessTokenName,
@@ -55,7 +55,7 @@ def send_post_req_save_pulumi_org(izo_mcn_url, default_headers, pulumi_org_name,
         "subscriptionKey": pulumi_subscriptionKey,
         "accessTokenExpires": 0
     })
-    response_data["response"] = requests.post(f"{izo_mcn_url}/pulumi/account/{pulumi_acc}/organization", 
+    response_data["response"] = client.post(f"{izo_mcn_url}/pulumi/account/{pulumi_acc}/organization", 
                                               headers=default_headers, data=data)
 
 @then(parsers.cfparse("the pulumi save organization API response should be {status_code}"))
@@ -63,8 +63,10 @@ def check_response_code_save_pulumi_org(status_code):
     assert response_data["response"].status_code == int(status_code)
 
 @then(parsers.cfparse("the pulumi save organization API response body must contain a pulumi organization ID"))
-def check_response_body_save_pulumi_org():
-    resp = response_data["response"].json()
+def check_response_body_save_pulumi_org(izo_mcn_url, default_headers, pulumi_acc):
+    resp = jsonio.response_json(response_data["response"])
     assert "id" in resp.keys()
     pulumi['org_id'] = resp['id']
+    warmstate.state.remember("pulumi-org", resp['id'],
+                             f"{izo_mcn_url}{Paths.PULUMI_ORGANIZATION.format(account=pulumi_acc)}", default_headers)
     print(f"Pulumi Org ID - {pulumi['org_id']}")
@@ -2,4 +2,10 @@ class Paths:
     AWS = "/cloud/aws/account"
     AZURE = "/cloud/azure/account"
     CREATE_TUNNEL = "/cloud/gateway-vrouter/tunnel"
+    TUNNEL_ID = "/cloud/gateway-vrouter/tunnel/{id}"
     VROUTER_STATUS = "/cloud/gateway-vrouter/status"
+    PULUMI_ACCOUNT = "/pulumi/account"
+    PULUMI_ORGANIZATION = "/pulumi/account/{account}/organization"
+    CLOUD_ACCOUNT = "/cloud/{cloud}/account"
+    CLOUD_ACCOUNT_ID = "/cloud/{cloud}/account/{id}"
+    DIAGNOSE = "/metrics/diagnose"
@@ -0,0 +1,15 @@
+Feature: Negative-input fuzzing
+  Malformed query parameters and headers must be rejected with a 4xx, quickly, never with a 5xx.
+  Runs only with --fuzz; see --fuzz-cases, --fuzz-parallelism, --fuzz-budget-ms and --fuzz-seed.
+
+@fuzz @ping
+Scenario: Fuzz the diagnose API
+  Given the diagnose API with valid query parameters and headers
+  When fuzzed requests are sent
+  Then no fuzzed request should return a server error or exceed the latency budget
+
+@fuzz @wireguard
+Scenario: Fuzz the wireguard metrics API
+  Given the wireguard metrics API with valid query parameters and headers
+  When fuzzed requests are sent
+  Then no fuzzed request should return a server error or exceed the latency budget
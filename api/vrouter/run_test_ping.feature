@@ -6,6 +6,7 @@ Feature: Run Diagnostics API
     When the API request is sent
     Then the response code should be 200
     And the response body should contain "output"
+    And the response should match the diagnose schema
 
     Examples:
       | ping_type |
@@ -71,9 +72,21 @@ Feature: Run Diagnostics API
     When I trigger ping metrics request using env config
     Then the ping metrics API response code should be 200
     And the ping response body must contain result or latency
+    And the response should match the diagnose schema
     And the ping destination IP should match the input destination IPexplain 
 
     Examples:
       | ping_type |
       | ping      |
       | trace     |
+
+  Scenario Outline: Valid request for every source and destination in the inventory
+    Given the query parameters are source "<source_ip>", destination "<destination_ip>" and type "<ping_type>"
+    And the request headers are valid
+    When the API request is sent
+    Then the response code should be 200
+    And the response should match the diagnose schema
+
+    @generated:ping-targets
+    Examples:
+      | source_ip | destination_ip | ping_type |
@@ -0,0 +1,59 @@
+import logging
+import os
+
+import pytest
+from pytest_bdd import scenarios, given, when, then
+
+from api.common import fuzz
+
+
+logger = logging.getLogger(__name__)
+
+scenarios("../fuzz.feature")
+
+
+@given("the diagnose API with valid query parameters and headers", target_fixture="fuzz_target")
+def diagnose_target(ping_api_url, source_ip, destination_ip, ping_type, tenant_id):
+    if not source_ip or not destination_ip or not tenant_id:
+        pytest.skip("PING_SOURCE_IP, PING_DESTINATION_IP and PING_TENANT_ID are needed to fuzz the diagnose API")
+    return fuzz.Target(
+        name="diagnose",
+        url=ping_api_url,
+        params={"source": source_ip, "destination": destination_ip, "type": ping_type or "ping"},
+        headers={"accept": "*/*", "X-TenantID": tenant_id},
+        kinds={"source": "ip", "destination": "ip", "type": "type", "header:X-TenantID": "header",
+               "header:accept": "header"},
+    )
+
+@given("the wireguard metrics API with valid query parameters and headers", target_fixture="fuzz_target")
+def wireguard_target(request, wireguard_metrics_url, wireguard_headers):
+    option = request.config.getoption
+    params = {
+        "query": option("query") or os.getenv("DEFAULT_QUERY") or "wireguard_connection_status",
+        "sourceVrouterID": option("source_vrouter_id") or os.getenv("VALID_SOURCE_VROUTER_ID"),
+        "peerVrouterID": option("peer_vrouter_id") or os.getenv("VALID_PEER_VROUTER_ID"),
+        "timeFrom": option("time_from") or os.getenv("VALID_TIME_FROM"),
+        "timeTo": option("time_to") or os.getenv("VALID_TIME_TO"),
+    }
+    return fuzz.Target(
+        name="wireguard",
+        url=wireguard_metrics_url,
+        params={name: value for name, value in params.items() if value},
+        headers=dict(wireguard_headers),
+        kinds={"sourceVrouterID": "id", "peerVrouterID": "id", "timeFrom": "time", "timeTo": "time",
+               "query": "text", "header:X-TenantID": "header", "header:Content-Type": "header"},
+        swappable=(("timeFrom", "timeTo"), ("sourceVrouterID", "peerVrouterID")),
+    )
+
+@when("fuzzed requests are sent", target_fixture="fuzz_result")
+def send_fuzzed_requests(fuzzer, fuzz_target):
+    logger.info(f"Fuzzing {fuzz_target.name}: {fuzzer.cases} cases, {fuzzer.parallelism} in flight")
+    result = fuzzer.run(fuzz_target)
+    logger.info(f"Fuzzed {fuzz_target.name}: {result.sent} requests, {len(result.findings)} findings")
+    return result
+
+@then("no fuzzed request should return a server error or exceed the latency budget")
+def check_no_findings(fuzz_result):
+    findings = "\n".join(f"  {finding.describe()}" for finding in fuzz_result.findings)
+    assert not fuzz_result.findings, \
+        f"{len(fuzz_result.findings)} distinct failure(s) in {fuzz_result.sent} fuzzed requests:\n{findings}"
@@ -1,13 +1,13 @@
 import os
 import re
 import pytest
-import requests
-import logging
 from pathlib import Path
 from typing import Final
 from dotenv import load_dotenv
 from pytest_bdd import scenarios, given, when, then, parsers
 
+from api.common import client, jsonio, logs
+
 
 pytestmark = pytest.mark.ping
 
@@ -15,21 +15,7 @@ pytestmark = pytest.mark.ping
 
 LOG_FILE: Final = Path(__file__).parent / "test_ping.log"
 
-
-logging.getLogger().handlers.clear()
-
-
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s | %(levelname)-8s | %(name)s | %(message)s",
-    handlers=[
-        logging.FileHandler(LOG_FILE, encoding="utf-8", mode="w"),
-        logging.StreamHandler(),
-    ],
-    force=True  
-)
-
-logger = logging.getLogger("ping-tests")
+logger = logs.get_logger("ping-tests", LOG_FILE)
 
 
 scenarios('../run_test_ping.feature')
@@ -80,6 +66,16 @@ def special_characters_in_param(param, source_ip, destination_ip, ping_type):
     query[param] = "!@#type$%"
     response['params'] = query
 
+@given(parsers.parse('the query parameters are source "{source}", destination "{destination}" and type "{kind}"'))
+def generated_query_params(source, destination, kind):
+    logger.info(f"Setting query parameters from the inventory: {source} -> {destination} ({kind})")
+    response['params'] = {
+        "source": source,
+        "destination": destination,
+        "type": kind
+    }
+    response['expected_destination'] = destination
+
 @given("the request headers are valid")
 def valid_headers(tenant_id):
     logger.info("Setting valid request headers")
@@ -110,7 +106,7 @@ def invalid_x_tenantid():
 def send_request(ping_api_url):
     logger.info("Sending API request with params and headers")
     try:
-        resp = requests.get(ping_api_url, headers=response.get('headers', {}), params=response.get('params', {}))
+        resp = client.get(ping_api_url, headers=response.get('headers', {}), params=response.get('params', {}))
         response['resp'] = resp
         logger.info(f"Received response with status code: {resp.status_code}")
     except Exception as e:
@@ -131,7 +127,7 @@ def ping_metrics_from_env(ping_api_url, source_ip, destination_ip, tenant_id, pi
         "X-TenantID": tenant_id
     }
     try:
-        resp = requests.get(ping_api_url, headers=headers, params=params)
+        resp = client.get(ping_api_url, headers=headers, params=params)
         response['resp'] = resp
         response['expected_destination'] = destination_ip
         logger.info(f"Received response with status code: {resp.status_code}")
@@ -159,7 +155,7 @@ def check_response_contains(text):
 @then("the ping response body must contain result or latency")
 def check_result_or_latency():
     assert response['resp'] is not None, "No response received"
-    data = response['resp'].json()
+    data = jsonio.response_json(response['resp'])
     logger.info("Checking if response contains 'result', 'latency', or 'output'")
     assert any(key in data for key in ['result', 'latency', 'output']), \
         "Expected one of 'result', 'latency', or 'output' in response"
@@ -169,7 +165,7 @@ def validate_destination_ip_match():
     assert response['resp'] is not None, "No response received"
     assert response['resp'].status_code == 200, "API call did not succeed"
     try:
-        response_json = response['resp'].json()
+        response_json = jsonio.response_json(response['resp'])
     except Exception:
         logger.error("Response is not valid JSON")
         pytest.fail("Response is not valid JSON")
@@ -3,6 +3,8 @@ from __future__ import annotations
 import warnings
 import logging
 import os
+import time
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Final
 
@@ -11,23 +13,16 @@ import requests
 from dotenv import load_dotenv
 from pytest_bdd import given, parsers, scenario, then, when
 
+from api.common import client, jsonio, jsonstream, logs, schemas
+from api.common.stepindex import StepTable
+
 
 pytestmark = pytest.mark.wireguard
 
 
 LOG_FILE: Final = Path(__file__).parent / "test_wireguard_metrics.log"
-logging.getLogger().handlers.clear()
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s | %(levelname)-8s | %(name)s | %(message)s",
-    handlers=[
-        logging.FileHandler(LOG_FILE, encoding="utf-8", mode="w"),
-        logging.StreamHandler(),
-    ],
-    force=True,
-)
 
-LOG = logging.getLogger("wireguard-tests")
+LOG = logs.get_logger("wireguard-tests", LOG_FILE)
 LOG.setLevel(logging.DEBUG)
 LOG.info("Logging initialized successfully")
 
@@ -201,83 +196,101 @@ def test_rx_bytes_increasing():
     ...
 
 
+@scenario("../wireguard_metrics.feature", "Query metrics for every vrouter pair and time window in the inventory")
+def test_inventory_sweep():
+    ...
+
+
 @given("the WireGuard metrics API is available")
 def api_available(base_endpoint):
-    
-    pass
+    client.require_host(base_endpoint)
 
 
 
 
-@given(parsers.parse("{state_phrase}"))
-def set_params(state_phrase, default_params, request):
-    source_state = "valid"
-    peer_state = "valid"
-    time_state = "valid"
+@dataclass(frozen=True)
+class ParamState:
+    source: str = "valid"  # valid | invalid | no
+    peer: str = "valid"    # valid | invalid | no
+    time: str = "valid"    # valid | invalid | no | incorrect | no_time_to
 
-    phrase = state_phrase.lower()
-    if "invalid source" in phrase:
-        source_state = "invalid"
-    elif "no source" in phrase or "missing source" in phrase:
-        source_state = "no"
 
-    if "invalid peer" in phrase:
-        peer_state = "invalid"
-    elif "no peer" in phrase or "missing peer" in phrase:
-        peer_state = "no"
+PARAMETER_STATES = StepTable("wireguard parameter state", [
+    ("valid source, peer, and time range parameters", ParamState()),
+    ("invalid source source, peer, and time range parameters", ParamState(source="invalid")),
+    ("no source source, peer, and time range parameters", ParamState(source="no")),
+    ("invalid peer source, peer, and time range parameters", ParamState(peer="invalid")),
+    ("no peer source, peer, and time range parameters", ParamState(peer="no")),
+    ("valid source, invalid peer, and time range parameters", ParamState(peer="invalid")),
+    ("invalid timeFrom source, peer, and time range parameters", ParamState(time="invalid")),
+    ("invalid timeTo source, peer, and time range parameters", ParamState(time="invalid")),
+    ("valid source, peer, and invalid time range parameters", ParamState(time="invalid")),
+    ("no timeFrom source, peer, and time range parameters", ParamState(time="no")),
+    ("no timeTo source, peer, and time range parameters", ParamState(time="no")),
+    ("incorrect timeTo format source, peer, and time range parameters", ParamState(time="incorrect")),
+    ("timeTo is entirely omitted source, peer, and time range parameters", ParamState(time="no_time_to")),
+])
 
-    if "invalid time" in phrase or "invalid timefrom" in phrase or "invalid timeto" in phrase:
-        time_state = "invalid"
-    elif "no time" in phrase or "missing time" in phrase:
-        time_state = "no"
-    elif "incorrect time" in phrase:
-        time_state = "incorrect"
 
+@given(PARAMETER_STATES.parser("state"))
+def set_params(state: ParamState, default_params, request):
     params = dict(default_params)
 
-    # Set params accordingly (example):
-    if source_state == "invalid":
+    if state.source == "invalid":
         params["sourceVrouterID"] = "999999"
-    elif source_state == "no":
+    elif state.source == "no":
         params.pop("sourceVrouterID", None)
 
-    if peer_state == "invalid":
+    if state.peer == "invalid":
         params["peerVrouterID"] = "999999"
-    elif peer_state == "no":
+    elif state.peer == "no":
         params.pop("peerVrouterID", None)
 
-    if time_state == "invalid":
+    if state.time == "invalid":
         params["timeFrom"] = "invalid"
         params["timeTo"] = "invalid"
-    elif time_state == "no":
+    elif state.time == "no":
         params.pop("timeFrom", None)
         params.pop("timeTo", None)
-    elif time_state == "incorrect":
+    elif state.time == "incorrect":
         params["timeTo"] = "07-25-2025T11:00:00"
+    elif state.time == "no_time_to":
+        params.pop("timeTo", None)
 
     request.session.params = params
-    LOG.info(f"Params for scenario state '{state_phrase}': {params}")
+    LOG.info(f"Params for scenario state {state}: {params}")
+
 
 
+@given(parsers.parse("source {source} and peer {peer} between {time_from} and {time_to}"))
+def set_generated_params(source, peer, time_from, time_to, request):
+    params = {"sourceVrouterID": source, "peerVrouterID": peer, "timeFrom": time_from, "timeTo": time_to}
+    request.session.params = params
+    LOG.info(f"Params for generated row: {params}")
+
 
 @when("I query wireguard connection status")
-def send_request(base_endpoint, auth_headers, request):
+def send_request(base_endpoint, auth_headers, request, stream_metrics):
     params = request.session.params
-    resp = requests.get(base_endpoint, params=params, headers=auth_headers)
+    # Without a sourceVrouterID the API returns every series for every router; read that body incrementally.
+    stream = stream_metrics and "sourceVrouterID" not in params
+    request.session.sent_at = time.perf_counter()
+    resp = client.get(base_endpoint, params=params, headers=auth_headers, stream=stream)
     request.session.response = resp
+    request.session.streamed = stream
 
 @when(parsers.parse('I query wireguard connection status with "{metric}"'))
 def send_request_with_metric(base_endpoint, auth_headers, request, metric):
     params = dict(request.session.params)
     params["query"] = metric
-    resp = requests.get(base_endpoint, params=params, headers=auth_headers)
+    resp = client.get(base_endpoint, params=params, headers=auth_headers)
     request.session.response = resp
 
 @then("the metrics should be returned in the response")
 def assert_metrics_returned(request):
     resp = request.session.response
     assert resp.status_code == 200
-    data = resp.json()
+    data = jsonio.response_json(resp)
     if isinstance(data, list) and len(data) == 1 and isinstance(data[0], list):
         data = data[0]
     assert data, "No metrics data returned"
@@ -285,7 +298,7 @@ def assert_metrics_returned(request):
 @then(parsers.parse("the response must contain the sourceVrouterID provided"))
 def assert_response_contains_source_vrouter_id(request):
     resp = request.session.response
-    data = resp.json()
+    data = jsonio.response_json(resp)
     if isinstance(data, list) and len(data) == 1 and isinstance(data[0], list):
         data = data[0]
     expected_source = request.session.params.get("sourceVrouterID")
@@ -296,7 +309,7 @@ def assert_response_contains_source_vrouter_id(request):
 @then(parsers.parse("the response must contain the peerVrouterID provided"))
 def assert_response_contains_peer_vrouter_id(request):
     resp = request.session.response
-    data = resp.json()
+    data = jsonio.response_json(resp)
     if isinstance(data, list) and len(data) == 1 and isinstance(data[0], list):
         data = data[0]
     expected_peer = request.session.params.get("peerVrouterID")
@@ -309,7 +322,7 @@ def assert_response_contains_peer_vrouter_id(request):
 @then(parsers.parse("the response contains non-empty values for {metric_type}"))
 def check_non_empty_values(request, metric_type):
     resp = request.session.response
-    data = resp.json()
+    data = jsonio.response_json(resp)
     if isinstance(data, list) and len(data) == 1 and isinstance(data[0], list):
         data = data[0]
     found_valid = any("values" in item and item["values"] for item in data)
@@ -319,7 +332,7 @@ def check_non_empty_values(request, metric_type):
 @then("the values should be monotonically increasing")
 def check_monotonic_values(request):
     resp = request.session.response
-    data = resp.json()
+    data = jsonio.response_json(resp)
     if isinstance(data, list) and len(data) == 1 and isinstance(data[0], list):
         data = data[0]
     all_values = []
@@ -348,7 +361,7 @@ def check_monotonic_values(request):
 def assert_failure_or_empty(request: pytest.FixtureRequest):
     resp = request.session.response
     assert resp.status_code in {200, 400, 422, 500}, f"Unexpected status {resp.status_code}"
-    data = resp.json()
+    data = jsonio.response_json(resp)
     if isinstance(data, list):
         if data and isinstance(data[0], list):
             data = data[0]
@@ -366,21 +379,32 @@ def assert_failure_or_empty(request: pytest.FixtureRequest):
 
 
 @then("metrics for all vrouters should be returned")
-def assert_all_vrouters(request: pytest.FixtureRequest):
+def assert_all_vrouters(request: pytest.FixtureRequest, record_property):
     resp = request.session.response
     assert resp.status_code == 200, f"Expected 200; got {resp.status_code}"
-    data = resp.json()
-    if isinstance(data, list) and data and isinstance(data[0], list):
-        data = data[0]
-    assert data, "No vrouters data returned"
-    LOG.info(f"Metrics returned for {len(data)} vrouters")
+    validate_series = schemas.validator("wireguard series")
+    routers = set()
+
+    def check(series):
+        validate_series(series)
+        routers.add(series.get("sourceVrouterID"))
+
+    if request.session.streamed:
+        stats = jsonstream.consume("streamed", lambda: jsonstream.iter_response_items(resp), check,
+                                   request.session.sent_at)
+    else:
+        stats = jsonstream.consume("buffered", lambda: jsonstream.flatten(jsonio.response_json(resp)), check,
+                                   request.session.sent_at, extra_bytes=len(resp.content))
+    assert stats.items, "No vrouters data returned"
+    record_property("wireguard_all_vrouters_parse", vars(stats))
+    LOG.info(f"Metrics returned for {len(routers)} vrouters ({stats.describe()})")
 
 
 @then("metrics for all peers should be returned")
 def assert_all_peers(request: pytest.FixtureRequest):
     resp = request.session.response
     assert resp.status_code == 200, f"Expected 200; got {resp.status_code}"
-    data = resp.json()
+    data = jsonio.response_json(resp)
     if isinstance(data, list) and data and isinstance(data[0], list):
         data = data[0]
     assert data, "No peers data returned"
@@ -10,6 +10,7 @@ Background:
     Given valid source, peer, and time range parameters
     When I query wireguard connection status
     Then the metrics should be returned in the response
+    And the response should match the wireguard metrics schema
 
 
   Scenario: Query metrics with specific sourceVrouterID
@@ -45,6 +46,7 @@ Background:
     Given no peer source, peer, and time range parameters
     When I query wireguard connection status
     Then metrics for all peers should be returned
+    And the response should match the wireguard metrics schema
 
   Scenario: Query with invalid timeFrom parameter
     Given invalid timeFrom source, peer, and time range parameters
@@ -103,3 +105,12 @@ Background:
     Given valid source, peer, and time range parameters
     When I query wireguard connection status with "wireguard_rx_bytes"
     Then the values should be monotonically increasing
+
+  Scenario Outline: Query metrics for every vrouter pair and time window in the inventory
+    Given source <source> and peer <peer> between <time_from> and <time_to>
+    When I query wireguard connection status with "<metric>"
+    Then the response contains non-empty values for <metric>
+
+    @generated:wireguard-sweep
+    Examples:
+      | source | peer | time_from | time_to | metric |
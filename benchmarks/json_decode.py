@@ -0,0 +1,85 @@
+"""Compare JSON decode backends on recorded and synthetic response bodies.
+
+    python benchmarks/json_decode.py [--series 2000] [--points 360] [--repeat 5]
+
+Recorded bodies are the archive/*.json run reports; synthetic bodies mimic a WireGuard range query
+for all vrouters. Backends that are not installed are reported and skipped.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from api.common import jsonio  # noqa: E402
+
+
+def synthetic_wireguard(series: int, points: int, seed: int = 7) -> bytes:
+    rng = random.Random(seed)
+    start = 1_750_000_000
+    body = [[{
+        "sourceVrouterID": i,
+        "peerVrouterID": i + 1,
+        "metric": "wireguard_rx_bytes",
+        "values": [[start + 10 * t, str(rng.randint(0, 10 ** 9))] for t in range(points)],
+    } for i in range(series)]]
+    return json.dumps(body).encode("utf-8")
+
+
+def recorded_bodies() -> list[tuple[str, bytes]]:
+    return [(path.name, path.read_bytes()) for path in sorted((ROOT / "archive").glob("*.json"))]
+
+
+def best_of(fn, payload: bytes, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(payload)
+        timings.append(time.perf_counter() - t0)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--series", type=int, default=2000, help="Series in the synthetic body")
+    parser.add_argument("--points", type=int, default=360, help="Points per synthetic series")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per body; the best time is reported")
+    args = parser.parse_args()
+
+    backends = []
+    for name in jsonio.BACKENDS:
+        try:
+            jsonio.set_backend(name)
+            backends.append(name)
+        except ValueError as e:
+            print(f"skipping {name}: {e}")
+
+    recorded = recorded_bodies()
+    corpora = [
+        (f"archive ({len(recorded)} files)", [body for _, body in recorded]),
+        (f"synthetic wireguard {args.series}x{args.points}", [synthetic_wireguard(args.series, args.points)]),
+    ]
+
+    print(f"{'corpus':<40} {'MB':>8} " + " ".join(f"{name:>12}" for name in backends))
+    for label, bodies in corpora:
+        if not bodies:
+            continue
+        size = sum(len(body) for body in bodies) / 1e6
+        results = []
+        for name in backends:
+            jsonio.set_backend(name)
+            results.append(sum(best_of(jsonio.loads, body, args.repeat) for body in bodies))
+        cells = " ".join(f"{seconds * 1000:>9.1f} ms" for seconds in results)
+        print(f"{label:<40} {size:>8.2f} {cells}")
+        if len(results) > 1 and results[0]:
+            print(f"{'':<40} {'':>8} speedup {results[-1] / results[0]:.1f}x ({backends[0]} vs {backends[-1]})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Compare step resolution by linear parser scan against the prebuilt step index.
+
+    python benchmarks/step_dispatch.py [--definitions 1500] [--scenarios 5000] [--steps 6] [--repeat 3]
+
+A synthetic suite of step definitions (plain strings, parse patterns and a few regexes, in the proportions
+of api/) and scenarios built from them. "linear" is what pytest-bdd does for every step: ask each parser
+whether it matches. "index" asks only the candidates from plugins/step_dispatch.py's StepIndex. The second
+table does the same for the parameter-state phrases of wireguard_metrics.feature: substring classification
+vs a StepTable of those phrases.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from pytest_bdd import parsers  # noqa: E402
+
+from api.common.stepindex import StepIndex, StepTable  # noqa: E402
+
+VERBS = ("I", "the", "a", "an", "user", "vrouter", "gateway", "tunnel", "cloud", "pulumi", "response", "metric",
+         "peer", "request", "status", "account", "organization", "credentials", "tenant", "region")
+TYPES = ("given", "when", "then")
+
+
+def synthetic_suite(definitions: int, scenarios: int, steps: int, seed: int = 11):
+    """Step definitions as (type, parser, payload) plus the step texts of every scenario."""
+    rng = random.Random(seed)
+    entries, samples = [], []
+    for i in range(definitions):
+        step_type = rng.choice(TYPES)
+        first = rng.choice(VERBS)
+        kind = rng.random()
+        if kind < 0.45:
+            text = f"{first} step number {i} is ready"
+            entries.append((step_type, parsers.string(text), i))
+            samples.append((step_type, lambda text=text: text))
+        elif kind < 0.99:
+            entries.append((step_type, parsers.parse(f"{first} sends {{count:d}} requests to endpoint {i} as {{who}}"), i))
+            samples.append((step_type, lambda first=first, i=i: f"{first} sends {rng.randint(1, 99)} requests to "
+                                                                 f"endpoint {i} as user{rng.randint(1, 9)}"))
+        else:
+            entries.append((step_type, parsers.re(rf"(?P<what>\w+) is checked by rule {i}"), i))
+            samples.append((step_type, lambda i=i: f"thing{rng.randint(1, 9)} is checked by rule {i}"))
+    steps_text = [(step_type, make()) for _ in range(scenarios)
+                  for step_type, make in rng.choices(samples, k=steps)]
+    return entries, steps_text
+
+
+def linear(entries, step_type: str, name: str) -> list:
+    return [payload for kind, parser, payload in entries
+            if (kind is None or kind == step_type) and parser.is_matching(name)]
+
+
+def parameter_state_phrases() -> list[str]:
+    feature = (ROOT / "api" / "vrouter" / "wireguard_metrics.feature").read_text(encoding="utf-8")
+    phrases = {line.strip().removeprefix("Given ") for line in feature.splitlines()
+               if line.strip().endswith("time range parameters")}
+    return sorted(phrases)
+
+
+def classify_by_substring(phrase: str) -> tuple[str, str, str]:
+    """The WireGuard step's classification before it became a StepTable."""
+    phrase = phrase.lower()
+    source = "invalid" if "invalid source" in phrase else "no" if "no source" in phrase else "valid"
+    peer = "invalid" if "invalid peer" in phrase else "no" if "no peer" in phrase else "valid"
+    if "invalid time" in phrase:
+        time_state = "invalid"
+    elif "no time" in phrase or "missing time" in phrase:
+        time_state = "no"
+    elif "incorrect time" in phrase:
+        time_state = "incorrect"
+    else:
+        time_state = "valid"
+    return source, peer, time_state
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--definitions", type=int, default=1500, help="Synthetic step definitions")
+    parser.add_argument("--scenarios", type=int, default=5000, help="Synthetic scenarios")
+    parser.add_argument("--steps", type=int, default=6, help="Steps per scenario")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per method; the best time is reported")
+    args = parser.parse_args()
+
+    entries, steps = synthetic_suite(args.definitions, args.scenarios, args.steps)
+    t0 = time.perf_counter()
+    index = StepIndex(entries)
+    build = time.perf_counter() - t0
+    for step_type, name in steps[:500]:
+        assert index.matches(step_type, name) == linear(entries, step_type, name), name
+
+    print(f"{len(entries)} definitions, {len(steps)} steps in {args.scenarios} scenarios "
+          f"(index built in {build * 1000:.1f} ms)")
+    scan = best_of(lambda: [linear(entries, t, n) for t, n in steps], args.repeat)
+    indexed = best_of(lambda: [index.matches(t, n) for t, n in steps], args.repeat)
+    print(f"{'linear':<10} {scan * 1000:>10.1f} ms {scan / len(steps) * 1e6:>9.1f} us/step")
+    print(f"{'index':<10} {indexed * 1000:>10.1f} ms {indexed / len(steps) * 1e6:>9.1f} us/step "
+          f"({scan / indexed:.0f}x)")
+
+    distinct = parameter_state_phrases()
+    states = StepTable("parameter state", [(phrase, classify_by_substring(phrase)) for phrase in distinct])
+    phrases = distinct * (len(steps) // len(distinct))
+    substring = best_of(lambda: [classify_by_substring(p) for p in phrases], args.repeat)
+    table = best_of(lambda: [states.resolve(p) for p in phrases], args.repeat)
+    print(f"\n{len(phrases)} parameter-state phrases ({len(distinct)} distinct)")
+    print(f"{'substring':<10} {substring * 1000:>10.1f} ms")
+    print(f"{'table':<10} {table * 1000:>10.1f} ms ({substring / table:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
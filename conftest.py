@@ -1,10 +1,38 @@
 import pytest
+import logging
 import os
 from dotenv import load_dotenv
 from pathlib import Path
+from pytest_bdd import then, parsers
+from api.cloud.steps.tunnel import delete_tunnels, parse_pairs
+from api.common import client, jsonio, schemas
+
+pytest_plugins = [
+    "plugins.logging_pipeline",
+    "plugins.step_profiler",
+    "plugins.memory_accounting",
+    "plugins.http_client",
+    "plugins.preflight",
+    "plugins.rate_limit",
+    "plugins.scheduler",
+    "plugins.warm_state",
+    "plugins.feature_cache",
+    "plugins.collection_profile",
+    "plugins.step_dispatch",
+    "plugins.generated_outlines",
+    "plugins.multi_env",
+    "plugins.snapshots",
+    "plugins.fuzz",
+    "plugins.tunnel_benchmark",
+    "plugins.openmetrics",
+    "plugins.tracing",
+]
+
 
 def pytest_addoption(parser):
-    parser.addoption("--env", action="store", default="qa", help="Environment to run tests on. For eg.: dev, qa or uat")
+    parser.addoption("--env", action="store", default="qa", help="Environment to run tests on. For eg.: dev, qa or uat; "
+                     "a comma-separated list (qa,dev,uat) runs each in its own process and diffs the results")
+    parser.addoption("--reports-dir", action="store", default="reports", help="Directory for run.log and the reports written at session end (relative to the rootdir)")
     parser.addoption("--source_ip", action="store", default=None, help="Source IP for ping test")
     parser.addoption("--destination_ip", action="store", default=None, help="Destination IP for ping test")
     parser.addoption("--ping_type", action="store", default=None, help="Type for ping (ping or trace)")
@@ -16,6 +44,17 @@ def pytest_addoption(parser):
     parser.addoption("--time-to", action="store", default=None, help="Override VALID_TIME_TO (ISO 8601 format)")
 
     parser.addoption("--query",action="store",default=None,help="Override 'query' parameter value (e.g., wireguard_rx_bytes)")
+    parser.addoption("--stream-metrics", action="store_true", default=False, help="Parse all-vrouter WireGuard metric responses incrementally instead of buffering the body")
+
+    parser.addoption("--bulk-accounts", action="store", type=int, default=5, help="Accounts per cloud to create in bulk provisioning scenarios")
+    parser.addoption("--bulk-workers", action="store", type=int, default=4, help="Maximum concurrent requests for bulk provisioning and sweeping")
+    parser.addoption("--sweep-min-age", action="store", type=float, default=1.0, help="Hours a bulk test account must exist before the sweeper deletes it")
+    parser.addoption("--bulk", action="store_true", default=False, help="Run the @bulk scenarios, which create and delete --bulk-accounts accounts per cloud (skipped otherwise)")
+    parser.addoption("--sweep", action="store_true", default=False, help="Run the @sweep scenarios, which delete orphaned bulk test accounts (skipped otherwise)")
+
+    parser.addoption("--tunnel-pairs", action="store", default=None, help="Vrouter pairs to tunnel, e.g. 1:2,3:4 (default: TUNNEL_VROUTER_PAIRS or the valid source/peer IDs)")
+    parser.addoption("--tunnel-timeout", action="store", type=float, default=300.0, help="Seconds to wait for tunnels to report up")
+    parser.addoption("--tunnel-poll-concurrency", action="store", type=int, default=16, help="Maximum status requests in flight while watching tunnels")
 
 
 @pytest.fixture(scope="session")
@@ -225,6 +264,65 @@ def azure_subscriptionId(get_env):
         raise ValueError(f"Environment variable 'azure_subscriptionId' not found in {env_file}.")
     return azure_subscriptionId
 
+@pytest.fixture(scope="session")
+def bulk_account_count(request):
+    return request.config.getoption("--bulk-accounts")
+
+
+@pytest.fixture(scope="session")
+def bulk_workers(request):
+    return request.config.getoption("--bulk-workers")
+
+@pytest.fixture(scope="session")
+def sweep_min_age(request):
+    return request.config.getoption("--sweep-min-age") * 3600
+
+@pytest.fixture(scope="session")
+def tunnel_vrouter_pairs(request, get_env):
+    cli_value = request.config.getoption("--tunnel-pairs")
+    if cli_value:
+        return parse_pairs(cli_value)
+    load_dotenv(get_env)
+    env_value = os.getenv("TUNNEL_VROUTER_PAIRS")
+    if env_value:
+        return parse_pairs(env_value)
+    source, peer = os.getenv("VALID_SOURCE_VROUTER_ID"), os.getenv("VALID_PEER_VROUTER_ID")
+    if not source or not peer:
+        raise ValueError(f"No vrouter pairs: set --tunnel-pairs or TUNNEL_VROUTER_PAIRS in {get_env}")
+    return [(source, peer)]
+
+
+@pytest.fixture(scope="session")
+def tunnel_timeout(request):
+    return request.config.getoption("--tunnel-timeout")
+
+
+@pytest.fixture(scope="session")
+def tunnel_poll_concurrency(request):
+    return request.config.getoption("--tunnel-poll-concurrency")
+
+
+@pytest.fixture
+def created_tunnel_ids(izo_mcn_url, default_headers, bulk_workers):
+    """Ids of the tunnels a scenario created; deleted again when the scenario ends, whatever its outcome."""
+    created = []
+    yield created
+    if created:
+        run = delete_tunnels(izo_mcn_url, default_headers, created, bulk_workers)
+        failed = [(r.name, r.status, r.error) for r in run.failures]
+        logging.getLogger("tunnels").info(f"Deleted {len(created) - len(failed)} of {len(created)} tunnels")
+        if failed:
+            logging.getLogger("tunnels").warning(f"Could not delete tunnels: {failed}")
+
+
+@pytest.fixture(scope="session")
+def wireguard_headers(get_env):
+    load_dotenv(get_env)
+    tenant = os.getenv("X_TENANTID")
+    if not tenant:
+        raise ValueError(f"Environment variable 'X_TENANTID' not found in {get_env}.")
+    return {"X-TenantID": tenant, "Content-Type": "application/json"}
+
 @pytest.fixture(scope="session")
 def ping_api_url(get_env):
     env_file = get_env
@@ -289,6 +387,11 @@ def wireguard_metrics_url(get_env):
     return f"{base_url.rstrip('/')}{metrics_path}"
 
 
+@pytest.fixture(scope="session")
+def stream_metrics(request):
+    return request.config.getoption("--stream-metrics")
+
+
 @pytest.fixture(scope="session")
 def valid_source_vrouter_id(request):
     cli_val = request.config.getoption("--source_vrouter_id")
@@ -343,6 +446,31 @@ def valid_time_to(request, get_env):
         raise ValueError(f"VALID_TIME_TO not found in {env_file} and not provided via --time-to")
     return env_value
 
+def pytest_bdd_before_scenario(request, feature, scenario):
+    # Otherwise a scenario whose request never got a response would validate the previous scenario's.
+    client.clear_last_response()
+
+
+def pytest_collection_modifyitems(config, items):
+    # Scenarios that create or delete cloud accounts in bulk only run when asked for.
+    for marker, option in (("bulk", "--bulk"), ("sweep", "--sweep")):
+        if config.getoption(option):
+            continue
+        skip = pytest.mark.skip(reason=f"@{marker} scenarios are opt-in ({option} to run)")
+        for item in items:
+            if item.get_closest_marker(marker) is not None:
+                item.add_marker(skip)
+
+
+@then(parsers.parse("the response should match the {endpoint} schema"))
+def response_matches_schema(endpoint):
+    resp = client.last_response()
+    assert resp is not None, "No HTTP response has been received in this scenario"
+    try:
+        schemas.validate(endpoint, jsonio.response_json(resp))
+    except schemas.SchemaValidationError as e:
+        pytest.fail(f"{resp.request.method} {resp.url} does not match the {endpoint} schema: {e}")
+
 # This will automatically override `query` in the default_params fixture dynamically
 @pytest.fixture(autouse=True)
 def override_query_param(request):
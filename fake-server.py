@@ -1,14 +1,122 @@
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+import argparse
+import gzip
+import itertools
 import json
+import random
+import threading
+import time
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class Convergence:
+    """Simulated control plane: each tunnel comes up after base + jitter + per-pending-tunnel load delay."""
+
+    def __init__(self, base=2.0, jitter=1.0, per_tunnel=0.05):
+        self.base = base
+        self.jitter = jitter
+        self.per_tunnel = per_tunnel
+        self.tunnels = {}
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def create(self, source, peer):
+        with self.lock:
+            now = time.time()
+            pending = sum(1 for t in self.tunnels.values() if t['up_at'] > now)
+            tunnel_id = next(self.ids)
+            delay = self.base + random.uniform(0, self.jitter) + self.per_tunnel * pending
+            self.tunnels[tunnel_id] = {'id': tunnel_id, 'sourceVrouterID': source, 'peerVrouterID': peer,
+                                       'created_at': now, 'up_at': now + delay}
+            return tunnel_id
+
+    def delete(self, tunnel_id):
+        with self.lock:
+            return self.tunnels.pop(tunnel_id, None) is not None
+
+    def status(self, tunnel_id):
+        tunnel = self.tunnels.get(tunnel_id)
+        if tunnel is None:
+            return None
+        return {'id': tunnel_id, 'status': 'up' if time.time() >= tunnel['up_at'] else 'provisioning'}
+
+    def wireguard_series(self, source=None, peer=None):
+        now = time.time()
+        series = []
+        for t in list(self.tunnels.values()):
+            if source and str(t['sourceVrouterID']) != source:
+                continue
+            if peer and str(t['peerVrouterID']) != peer:
+                continue
+            series.append({'tunnelId': t['id'], 'sourceVrouterID': t['sourceVrouterID'],
+                           'peerVrouterID': t['peerVrouterID'], 'values': [[now, '1' if now >= t['up_at'] else '0']]})
+        return series
+
+
+convergence = Convergence()
+wireguard_path = '/metrics/wireguard'
+compression = {'enabled': True, 'min_bytes': 256}
+
+ENCODERS = {
+    'gzip': lambda body: gzip.compress(body, compresslevel=6),
+    'deflate': zlib.compress,
+}
+if brotli is not None:
+    ENCODERS['br'] = brotli.compress
+
+
+def negotiate(accept_encoding):
+    """Pick the first encoding the client accepts that we can produce (br > gzip > deflate)."""
+    offered = {part.split(';')[0].strip().lower() for part in (accept_encoding or '').split(',')}
+    for name in ('br', 'gzip', 'deflate'):
+        if name in offered and name in ENCODERS:
+            return name
+    return None
+
 
 class RequestHandler(BaseHTTPRequestHandler):
+    def send_json(self, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        encoding = negotiate(self.headers.get('Accept-Encoding'))
+        if not compression['enabled'] or len(payload) < compression['min_bytes']:
+            encoding = None
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        if encoding:
+            payload = ENCODERS[encoding](payload)
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
     def do_GET(self):
-        if self.path == '/test':
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            response = {'message': 'Hello, this is a fake API response!'}
-            self.wfile.write(json.dumps(response).encode('utf-8'))
+        url = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path == '/test':
+            self.send_json(200, {'message': 'Hello, this is a fake API response!'})
+
+        elif url.path == '/cloud/gateway-vrouter/status':
+            status = convergence.status(int(query.get('tunnelId', 0)))
+            if status is None:
+                self.send_json(404, {'message': 'tunnel not found'})
+            else:
+                self.send_json(200, status)
+
+        elif url.path == wireguard_path:
+            self.send_json(200, convergence.wireguard_series(query.get('sourceVrouterID'), query.get('peerVrouterID')))
+
+        elif url.path == '/pulumi/account':
+            self.send_json(200, [{'id': 5, 'accountName': 'MCNTesting'}])
+
+        elif url.path == '/pulumi/account/MCNTesting/organization':
+            self.send_json(200, [{'id': 3}])
 
         else:
             self.send_response(404)
@@ -19,27 +127,38 @@ class RequestHandler(BaseHTTPRequestHandler):
         if self.path == '/pulumi/account':
             content_length = int(self.headers['Content-Length'])
             post_data = self.rfile.read(content_length)
-            self.send_response(201)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            response = {'id': 5, 'data': json.loads(post_data)}
-            self.wfile.write(json.dumps(response).encode('utf-8'))
+            self.send_json(201, {'id': 5, 'data': json.loads(post_data)})
 
         elif self.path == '/pulumi/account/MCNTesting/organization':
             content_length = int(self.headers['Content-Length'])
             post_data = self.rfile.read(content_length)
-            self.send_response(201)
-            self.send_header('Content-type', 'application/json')
+            self.send_json(201, {'id': 3, 'data': json.loads(post_data)})
+
+        elif self.path == '/cloud/gateway-vrouter/tunnel':
+            content_length = int(self.headers['Content-Length'])
+            post_data = json.loads(self.rfile.read(content_length))
+            tunnel_id = convergence.create(post_data.get('sourceVrouterID'), post_data.get('peerVrouterID'))
+            self.send_json(201, {'id': tunnel_id, 'status': 'provisioning'})
+
+        else:
+            self.send_response(404)
             self.end_headers()
-            response = {'id': 3, 'data': json.loads(post_data)}
-            self.wfile.write(json.dumps(response).encode('utf-8'))
+
+
+    def do_DELETE(self):
+        url = urlsplit(self.path)
+        if url.path.startswith('/cloud/gateway-vrouter/tunnel/') and url.path.rsplit('/', 1)[1].isdigit():
+            if convergence.delete(int(url.path.rsplit('/', 1)[1])):
+                self.send_json(200, {'message': 'tunnel deleted'})
+            else:
+                self.send_json(404, {'message': 'tunnel not found'})
 
         else:
             self.send_response(404)
             self.end_headers()
 
 
-def run(server_class=HTTPServer, handler_class=RequestHandler, port=3000):
+def run(server_class=ThreadingHTTPServer, handler_class=RequestHandler, port=3000):
     server_address = ('', port)
     httpd = server_class(server_address, handler_class)
     print(f'Fake server running at http://localhost:{port}')
@@ -47,4 +166,22 @@ def run(server_class=HTTPServer, handler_class=RequestHandler, port=3000):
 
 
 if __name__ == "__main__":
-    run()
+    parser = argparse.ArgumentParser(description='Local stand-in for the MCN APIs')
+    parser.add_argument('--port', type=int, default=3000)
+    parser.add_argument('--convergence-delay', type=float, default=2.0,
+                        help='Base seconds before a created tunnel reports up')
+    parser.add_argument('--convergence-jitter', type=float, default=1.0,
+                        help='Uniform random extra seconds added to each tunnel')
+    parser.add_argument('--convergence-per-tunnel', type=float, default=0.05,
+                        help='Extra seconds per tunnel still pending, to simulate control-plane load')
+    parser.add_argument('--wireguard-path', default=wireguard_path,
+                        help='Path served as the WireGuard metrics endpoint (match WIREGUARD_METRICS_PATH)')
+    parser.add_argument('--no-compression', action='store_true',
+                        help='Never compress responses, whatever the client accepts')
+    parser.add_argument('--compress-min-bytes', type=int, default=256,
+                        help='Leave bodies smaller than this uncompressed')
+    args = parser.parse_args()
+    compression.update(enabled=not args.no_compression, min_bytes=args.compress_min_bytes)
+    convergence = Convergence(args.convergence_delay, args.convergence_jitter, args.convergence_per_tunnel)
+    wireguard_path = args.wireguard_path
+    run(port=args.port)
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import importlib.abc
+import json
+import sys
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import pytest
+from pytest_bdd import parsers
+from pytest_bdd.parser import FeatureParser
+
+# Budget keys: totals, or one module / feature file (cumulative seconds).
+BUDGET_TOTALS = ("collection", "imports", "features", "patterns")
+TOP = 15
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("collection-profile")
+    group.addoption("--collection-profile", action="store_true", default=False,
+                    help="Time module imports, feature parsing and step-pattern compilation during collection, "
+                         "write collection_profile.json into --reports-dir and enforce collection_budgets. Load it with "
+                         "'-p plugins.collection_profile' to include conftest and plugin imports")
+    group.addoption("--collection-budget", action="append", default=[], metavar="KEY=SECONDS",
+                    help="Override one collection_budgets entry, e.g. collection=1.5 or module:test_ping=0.1")
+    parser.addini("collection_budgets", type="linelist", default=[],
+                  help=f"KEY=SECONDS lines; KEY is one of {', '.join(BUDGET_TOTALS)}, module:<name> or feature:<file>")
+
+
+def _wanted(args: list[str]) -> bool:
+    return "--collection-profile" in args
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_load_initial_conftests(early_config: pytest.Config, parser: pytest.Parser, args: list[str]) -> None:
+    # Only reached when loaded with -p; conftest.py and the plugins it lists are imported after this.
+    if _wanted(args):
+        _profiler.start()
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    if not config.getoption("--collection-profile"):
+        return
+    try:
+        budgets = parse_budgets(config.getini("collection_budgets") + config.getoption("--collection-budget"))
+    except ValueError as e:
+        raise pytest.UsageError(str(e)) from None
+    _profiler.start()
+    config.pluginmanager.register(CollectionReport(config, budgets), "collection-profile")
+
+
+def parse_budgets(lines: list[str]) -> dict[str, float]:
+    budgets = {}
+    for line in lines:
+        key, sep, seconds = line.partition("=")
+        key = key.strip()
+        if not sep or not (key in BUDGET_TOTALS or key.startswith(("module:", "feature:"))):
+            raise ValueError(f"Invalid collection budget '{line}', expected KEY=SECONDS with KEY one of "
+                             f"{', '.join(BUDGET_TOTALS)}, module:<name> or feature:<file>")
+        budgets[key] = float(seconds)
+    return budgets
+
+
+class _TimedLoader(importlib.abc.Loader):
+    def __init__(self, loader, profiler: Profiler, name: str) -> None:
+        self._loader = loader
+        self._profiler = profiler
+        self._name = name
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module) -> None:
+        self._profiler.enter(self._name)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler.exit(self._name)
+
+    def __getattr__(self, name: str):
+        return getattr(self._loader, name)
+
+
+class Profiler(importlib.abc.MetaPathFinder):
+    """Import, feature-parse and pattern-compile timings; self time excludes nested imports."""
+
+    def __init__(self) -> None:
+        self.active = False
+        self.imports: dict[str, dict[str, float]] = {}
+        self.features: dict[str, float] = {}
+        self.patterns: dict[str, float] = defaultdict(float)
+        self.pattern_count: dict[str, int] = defaultdict(int)
+        self.slowest_patterns: list[tuple[float, str]] = []
+        self._stack: list[list] = []
+        self._finding = threading.local()
+        self._originals: dict = {}
+
+    def find_spec(self, name, path, target=None):
+        if getattr(self._finding, "busy", False) or threading.current_thread() is not threading.main_thread():
+            return None
+        self._finding.busy = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(name, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._finding.busy = False
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self, name)
+        return spec
+
+    def enter(self, name: str) -> None:
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def exit(self, name: str) -> None:
+        _, start, children = self._stack.pop()
+        total = time.perf_counter() - start
+        self.imports[name] = {"cumulative": total, "self": total - children}
+        if self._stack:
+            self._stack[-1][2] += total
+
+    def _timed_parse(self, original):
+        profiler = self
+
+        def parse(parser_self):
+            start = time.perf_counter()
+            try:
+                return original(parser_self)
+            finally:
+                profiler.features[parser_self.abs_filename] = time.perf_counter() - start
+        return parse
+
+    def _timed_pattern(self, kind: str, original):
+        profiler = self
+
+        def __init__(parser_self, name, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                original(parser_self, name, *args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                profiler.patterns[kind] += elapsed
+                profiler.pattern_count[kind] += 1
+                profiler.slowest_patterns.append((elapsed, f"{kind}: {name}"))
+        return __init__
+
+    def start(self) -> None:
+        if self.active:
+            return
+        self.active = True
+        sys.meta_path.insert(0, self)
+        self._originals[(FeatureParser, "parse")] = FeatureParser.parse
+        FeatureParser.parse = self._timed_parse(FeatureParser.parse)
+        for kind in ("re", "parse", "cfparse"):
+            cls = getattr(parsers, kind)
+            self._originals[(cls, "__init__")] = cls.__dict__["__init__"]
+            cls.__init__ = self._timed_pattern(kind, cls.__dict__["__init__"])
+
+    def stop(self) -> None:
+        if not self.active:
+            return
+        self.active = False
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+        for (owner, attr), original in self._originals.items():
+            setattr(owner, attr, original)
+        self._originals.clear()
+
+
+_profiler = Profiler()
+
+
+class CollectionReport:
+    def __init__(self, config: pytest.Config, budgets: dict[str, float]) -> None:
+        self.config = config
+        self.budgets = budgets
+        self.out_dir = config.rootpath / Path(config.getoption("--reports-dir"))
+        self.collection = 0.0
+        self.violations: list[str] = []
+        self._start = 0.0
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_collection(self, session: pytest.Session) -> None:
+        self._start = time.perf_counter()
+
+    def pytest_collection_finish(self, session: pytest.Session) -> None:
+        self.collection = time.perf_counter() - self._start
+        _profiler.stop()
+        self.violations = self._check()
+
+    def _totals(self) -> dict[str, float]:
+        return {
+            "collection": self.collection,
+            "imports": sum(stats["self"] for stats in _profiler.imports.values()),
+            "features": sum(_profiler.features.values()),
+            "patterns": sum(_profiler.patterns.values()),
+        }
+
+    def _check(self) -> list[str]:
+        totals = self._totals()
+        features = {Path(path).name: seconds for path, seconds in _profiler.features.items()}
+        violations = []
+        for key, budget in self.budgets.items():
+            kind, _, name = key.partition(":")
+            if key in totals:
+                actual = totals[key]
+            elif kind == "module":
+                actual = _profiler.imports.get(name, {}).get("cumulative")
+            else:
+                actual = features.get(name)
+            if actual is not None and actual > budget:
+                violations.append(f"{key}: {actual * 1000:.1f} ms > budget {budget * 1000:.1f} ms")
+        return violations
+
+    def pytest_sessionfinish(self, session: pytest.Session) -> None:
+        _profiler.stop()
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        report = {
+            "totals": self._totals(),
+            "imports": _profiler.imports,
+            "features": _profiler.features,
+            "patterns": {kind: {"seconds": seconds, "count": _profiler.pattern_count[kind]}
+                         for kind, seconds in _profiler.patterns.items()},
+            "budgets": self.budgets,
+            "violations": self.violations,
+        }
+        (self.out_dir / "collection_profile.json").write_text(json.dumps(report, indent=2), encoding="utf-8")
+        if self.violations and session.exitstatus == pytest.ExitCode.OK:
+            session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+    def pytest_unconfigure(self, config: pytest.Config) -> None:
+        _profiler.stop()
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        terminalreporter.section("collection profile")
+        for key, seconds in self._totals().items():
+            terminalreporter.write_line(f"  {key:<12} {seconds * 1000:9.1f} ms")
+        terminalreporter.write_line("slowest imports (self / cumulative):")
+        for name, stats in sorted(_profiler.imports.items(), key=lambda kv: kv[1]["self"], reverse=True)[:TOP]:
+            terminalreporter.write_line(f"  {stats['self'] * 1000:9.1f} ms {stats['cumulative'] * 1000:9.1f} ms  {name}")
+        terminalreporter.write_line("feature parsing:")
+        for path, seconds in sorted(_profiler.features.items(), key=lambda kv: kv[1], reverse=True):
+            terminalreporter.write_line(f"  {seconds * 1000:9.1f} ms  {Path(path).name}")
+        counts = ", ".join(f"{n} {kind}" for kind, n in sorted(_profiler.pattern_count.items()))
+        terminalreporter.write_line(f"step patterns ({counts or 'none'}), slowest:")
+        for seconds, pattern in sorted(_profiler.slowest_patterns, reverse=True)[:5]:
+            terminalreporter.write_line(f"  {seconds * 1000:9.3f} ms  {pattern}")
+        for violation in self.violations:
+            terminalreporter.write_line(f"COLLECTION BUDGET EXCEEDED {violation}", red=True)
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import time
+import zlib
+from importlib.metadata import version
+from pathlib import Path
+
+import pytest
+from pytest_bdd.parser import Feature, FeatureParser
+
+# Entries not read or written for this long are removed at the end of a run that parsed something.
+MAX_AGE = 7 * 24 * 3600
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("feature-cache")
+    group.addoption("--no-feature-cache", action="store_true", default=False,
+                    help="Parse every .feature file with the Gherkin parser instead of loading cached parse results")
+    group.addoption("--feature-cache-dir", action="store", default="reports/.feature_cache",
+                    help="Directory for parsed features, keyed by file content (relative to the rootdir)")
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config: pytest.Config) -> None:
+    # Ahead of collection_profile, so its feature timings wrap (and include) cache loads.
+    if config.getoption("--no-feature-cache"):
+        return
+    cache = FeatureCache(config.rootpath / Path(config.getoption("--feature-cache-dir")))
+    cache.install()
+    config.pluginmanager.register(cache, "feature-cache")
+
+
+class FeatureCache:
+    """Parsed Feature objects pickled and zlib-compressed, one file per feature content.
+
+    Each feature is loaded only when a step module asks pytest-bdd for it. The key covers the bytes of the
+    file, its path (the Feature records it) and the pytest-bdd version (the pickled classes belong to it),
+    so an edited, moved or re-parsed-by-a-newer-version feature simply misses.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.hits: list[str] = []
+        self.parsed: list[str] = []
+        self._salt = f"pytest-bdd {version('pytest-bdd')}\0".encode()
+        self._original = None
+
+    def key(self, parser: FeatureParser, content: bytes) -> str:
+        digest = hashlib.sha256(self._salt)
+        digest.update(f"{parser.abs_filename}\0{parser.rel_filename}\0{parser.encoding}\0".encode())
+        digest.update(content)
+        return digest.hexdigest()
+
+    def _load(self, path: Path) -> Feature | None:
+        try:
+            feature = pickle.loads(zlib.decompress(path.read_bytes()))
+        except Exception:  # missing, truncated or written by an incompatible version: parse again
+            return None
+        os.utime(path)
+        return feature if isinstance(feature, Feature) else None
+
+    def _store(self, path: Path, feature: Feature) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(zlib.compress(pickle.dumps(feature, protocol=pickle.HIGHEST_PROTOCOL)))
+        os.replace(tmp, path)
+
+    def install(self) -> None:
+        original = self._original = FeatureParser.parse
+        cache = self
+
+        def parse(parser_self: FeatureParser) -> Feature:
+            with open(parser_self.abs_filename, "rb") as f:
+                content = f.read()
+            path = cache.directory / f"{cache.key(parser_self, content)}.pickle.z"
+            feature = cache._load(path)
+            if feature is not None:
+                cache.hits.append(parser_self.abs_filename)
+                return feature
+            feature = original(parser_self)
+            cache.parsed.append(parser_self.abs_filename)
+            cache._store(path, feature)
+            return feature
+
+        FeatureParser.parse = parse
+
+    def uninstall(self) -> None:
+        if self._original is not None:
+            FeatureParser.parse = self._original
+            self._original = None
+
+    def prune(self) -> None:
+        cutoff = time.time() - MAX_AGE
+        for path in self.directory.glob("*.pickle.z"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def pytest_sessionfinish(self, session: pytest.Session) -> None:
+        if self.parsed:
+            self.prune()
+
+    def pytest_unconfigure(self, config: pytest.Config) -> None:
+        self.uninstall()
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        if terminalreporter.config.option.verbose <= 0 or not (self.hits or self.parsed):
+            return
+        terminalreporter.section("feature cache")
+        terminalreporter.write_line(f"{len(self.hits)} loaded from {self.directory}, {len(self.parsed)} parsed")
+        for filename in self.parsed:
+            terminalreporter.write_line(f"  parsed {Path(filename).name}")
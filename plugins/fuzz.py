@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import asdict
+from pathlib import Path
+
+import pytest
+
+from api.common import fuzz
+
+FINDINGS_FILE = "fuzz_findings.json"
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("fuzz")
+    group.addoption("--fuzz", action="store_true", default=False,
+                    help="Run the @fuzz scenarios: malformed parameters and headers against the diagnose and "
+                         "wireguard metrics APIs (skipped otherwise)")
+    group.addoption("--fuzz-cases", action="store", type=int, default=200,
+                    help="Generated requests per fuzzed API")
+    group.addoption("--fuzz-parallelism", action="store", type=int, default=8,
+                    help="Fuzzed requests in flight at once")
+    group.addoption("--fuzz-budget-ms", action="store", type=float, default=1000.0,
+                    help="Fuzzed requests slower than this are findings")
+    group.addoption("--fuzz-seed", action="store", type=int, default=0,
+                    help="Seed for generated inputs; the same seed sends the same requests")
+    group.addoption("--fuzz-shrink", action="store", type=int, default=100,
+                    help="Requests spent shrinking each distinct finding to a minimal input; 0 = don't shrink")
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    if config.getoption("--fuzz-cases") < 1 or config.getoption("--fuzz-parallelism") < 1:
+        raise pytest.UsageError("--fuzz-cases and --fuzz-parallelism must be at least 1")
+    config.pluginmanager.register(FuzzReport(config), "fuzz")
+
+
+@pytest.fixture
+def fuzzer(request: pytest.FixtureRequest) -> fuzz.Fuzzer:
+    option = request.config.getoption
+    report = request.config.pluginmanager.get_plugin("fuzz")
+    return fuzz.Fuzzer(cases=option("--fuzz-cases"), parallelism=option("--fuzz-parallelism"),
+                       budget=option("--fuzz-budget-ms") / 1000, seed=option("--fuzz-seed"),
+                       shrink_requests=option("--fuzz-shrink"), on_result=report.results.append)
+
+
+class FuzzReport:
+    """Writes the fuzz results to FINDINGS_FILE at session end. Under xdist each worker writes its own
+    fuzz_findings.<worker>.json and the controller, which fuzzes nothing itself, merges them."""
+
+    def __init__(self, config: pytest.Config) -> None:
+        self.config = config
+        self.results: list[fuzz.FuzzResult] = []
+        self.data: list[dict] = []
+        self.path = config.rootpath / Path(config.getoption("--reports-dir")) / FINDINGS_FILE
+        worker = getattr(config, "workerinput", {}).get("workerid")
+        if worker:
+            self.path = self.path.with_name(f"{self.path.stem}.{worker}{self.path.suffix}")
+        elif getattr(config.option, "dist", "no") != "no":
+            # The controller merges whatever worker files it finds; drop those of an earlier run.
+            for stale in self.worker_files():
+                stale.unlink(missing_ok=True)
+
+    def worker_files(self) -> list[Path]:
+        return sorted(self.path.parent.glob(f"{self.path.stem}.*{self.path.suffix}"))
+
+    def pytest_collection_modifyitems(self, config: pytest.Config, items: list[pytest.Item]) -> None:
+        if config.getoption("--fuzz"):
+            return
+        skip = pytest.mark.skip(reason="fuzzing mode is off (--fuzz to run)")
+        for item in items:
+            if item.get_closest_marker("fuzz") is not None:
+                item.add_marker(skip)
+
+    def pytest_sessionfinish(self, session: pytest.Session) -> None:
+        if session.config.pluginmanager.hasplugin("dsession"):
+            self.data = [entry for path in self.worker_files()
+                         for entry in json.loads(path.read_text(encoding="utf-8"))]
+        else:
+            self.data = [{"target": result.target, "sent": result.sent, "elapsed": round(result.elapsed, 3),
+                          "statuses": {str(status): n for status, n in result.statuses.most_common()},
+                          "findings": [{**asdict(finding), "case": finding.case.describe(),
+                                        "original": finding.original.describe(), "summary": finding.describe()}
+                                       for finding in result.findings]}
+                         for result in self.results]
+        if not self.data:
+            return
+        path = self.path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(self.data, indent=2, default=str), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        if not self.data:
+            return
+        terminalreporter.section("fuzzing")
+        for result in self.data:
+            statuses = ", ".join(f"{status}: {n}" for status, n in result["statuses"].items())
+            terminalreporter.write_line(f"{result['target']}: {result['sent']} requests in {result['elapsed']:.2f}s "
+                                        f"({statuses}), {len(result['findings'])} distinct finding(s)")
+            for finding in result["findings"]:
+                terminalreporter.write_line(f"  {finding['summary']}", red=True)
+        terminalreporter.write_line(f"details: {self.path}")
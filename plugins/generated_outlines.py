@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import importlib
+import itertools
+import os
+from collections import Counter
+
+import pytest
+from dotenv import dotenv_values
+
+from api.common import outline
+
+# `pytest_bdd.scenario` the attribute is the decorator; the module is where outlines are parametrized.
+bdd_scenario = importlib.import_module("pytest_bdd.scenario")
+
+TAG = "generated:"
+
+# CLI overrides that also apply to the inventory built from the env file.
+ENV_OVERRIDES = {
+    "VALID_SOURCE_VROUTER_ID": "source_vrouter_id",
+    "VALID_PEER_VROUTER_ID": "peer_vrouter_id",
+    "VALID_TIME_FROM": "time_from",
+    "VALID_TIME_TO": "time_to",
+    "DEFAULT_QUERY": "query",
+    "PING_SOURCE_IP": "source_ip",
+    "PING_DESTINATION_IP": "destination_ip",
+    "PING_TYPE": "ping_type",
+}
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("generated-outlines")
+    group.addoption("--inventory", action="store", default=None,
+                    help="JSON inventory the @generated:<name> Examples tables are built from, in the format of "
+                         "inventory/example.json (default: inventory/<env>.json, else the single IDs, time range "
+                         "and IPs of the env file)")
+    group.addoption("--outline-coverage", action="store", choices=outline.COVERAGE, default="pairwise",
+                    help="pairwise: every pair of values of any two columns at least once; stratified: "
+                         "--outline-per-stratum random rows per source; full: every combination")
+    group.addoption("--outline-per-stratum", action="store", type=int, default=3,
+                    help="Rows drawn for each source with --outline-coverage stratified")
+    group.addoption("--outline-max-rows", action="store", type=int, default=0,
+                    help="Stop each generated Examples table after this many rows; 0 = no limit")
+    group.addoption("--outline-seed", action="store", type=int, default=0,
+                    help="Seed for stratified sampling; the same seed selects the same rows")
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    rows = GeneratedOutlines(config)
+    config.pluginmanager.register(rows, "generated-outlines")
+
+
+def generated_tables(templated_scenario) -> list:
+    return [examples for examples in templated_scenario.examples
+            if any(tag.startswith(TAG) for tag in examples.tags or ())]
+
+
+class GeneratedOutlines:
+    """Examples tables tagged @generated:<name> get their rows from api.common.outline, not the feature file.
+
+    pytest-bdd parametrizes outlines when the step module is imported. Scenarios with a generated table are
+    left unparametrized there and parametrized in pytest_generate_tests instead, so the inventory is read
+    and rows are generated only for scenarios that are actually collected, and never more than
+    --outline-max-rows of them.
+    """
+
+    def __init__(self, config: pytest.Config) -> None:
+        self.config = config
+        self.counts: Counter[str] = Counter()
+        self.truncated: set[str] = set()
+        self._inventory: outline.Inventory | None = None
+        self._original = bdd_scenario.collect_example_parametrizations
+        bdd_scenario.collect_example_parametrizations = self.collect_example_parametrizations
+
+    def collect_example_parametrizations(self, templated_scenario):
+        if generated_tables(templated_scenario):
+            return None
+        return self._original(templated_scenario)
+
+    def pytest_unconfigure(self, config: pytest.Config) -> None:
+        bdd_scenario.collect_example_parametrizations = self._original
+
+    def inventory(self) -> outline.Inventory:
+        if self._inventory is None:
+            option = self.config.getoption("--inventory")
+            path = self.config.rootpath / (option or f"inventory/{self.config.getoption('--env')}.json")
+            if path.is_file():
+                self._inventory = outline.Inventory.load(path)
+            elif option:
+                raise pytest.UsageError(f"Inventory file not found: {path}")
+            else:
+                env_file = self.config.rootpath / "env" / f"{self.config.getoption('--env')}.env"
+                values = {**os.environ, **(dotenv_values(env_file) if env_file.is_file() else {})}
+                for key, dest in ENV_OVERRIDES.items():
+                    values[key] = getattr(self.config.option, dest, None) or values.get(key)
+                self._inventory = outline.Inventory.from_env(values)
+        return self._inventory
+
+    def _rows(self, examples) -> list:
+        name = next(tag for tag in examples.tags if tag.startswith(TAG))[len(TAG):]
+        option = self.config.getoption
+        rows = outline.generate(name, self.inventory(), option("--outline-coverage"),
+                                option("--outline-per-stratum"), option("--outline-seed"))
+        limit = option("--outline-max-rows")
+        if limit > 0:
+            rows, rest = itertools.islice(rows, limit), rows
+        params = []
+        for row in rows:
+            missing = [column for column in examples.example_params if column not in row]
+            if missing:
+                raise outline.InventoryError(f"Generator '{name}' has no column {', '.join(missing)}; "
+                                             f"it produces {', '.join(row)}")
+            context = {column: str(row[column]) for column in examples.example_params}
+            params.append(pytest.param(context, id="-".join(context.values()),
+                                       marks=[getattr(pytest.mark, tag) for tag in examples.tags
+                                              if not tag.startswith(TAG)]))
+        if limit > 0 and next(rest, None) is not None:
+            self.truncated.add(name)
+        self.counts[name] += len(params)
+        return params
+
+    def pytest_generate_tests(self, metafunc: pytest.Metafunc) -> None:
+        templated = getattr(metafunc.function, "__scenario__", None)
+        generated = generated_tables(templated) if templated is not None else []
+        if not generated:
+            return
+        params = []
+        for examples in templated.examples:
+            if any(examples is table for table in generated):
+                params += self._rows(examples)
+            else:
+                # A hand-written table next to a generated one keeps its rows.
+                marks = [getattr(pytest.mark, tag) for tag in examples.tags or ()]
+                params += [pytest.param(context, id="-".join(context.values()), marks=marks)
+                           for context in examples.as_contexts()]
+        metafunc.parametrize("_pytest_bdd_example", params)
+
+    def pytest_report_collectionfinish(self, config: pytest.Config, start_path, items) -> str | None:
+        if not self.counts:
+            return None
+        coverage = config.getoption("--outline-coverage")
+        parts = [f"{name}: {count}{' (truncated)' if name in self.truncated else ''}"
+                 for name, count in sorted(self.counts.items())]
+        return f"generated outline rows ({coverage}): {', '.join(parts)}"
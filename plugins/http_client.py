@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import threading
+from collections import defaultdict
+from pathlib import Path
+
+import pytest
+
+from api.common import client, jsonio
+from api.common.latency import LatencyHistory
+
+KIB = 1024
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("http-client")
+    group.addoption("--http-retries", action="store", type=int, default=0,
+                    help="Retry idempotent requests this many times on connection errors or timeouts")
+    group.addoption("--json-backend", action="store", default="auto", choices=("auto", *jsonio.BACKENDS),
+                    help="JSON library used to decode responses (auto: orjson when installed)")
+    group.addoption("--no-http-compression", action="store_true", default=False,
+                    help="Send 'Accept-Encoding: identity' instead of advertising gzip/deflate (and br if available)")
+    group.addoption("--http-transfer-summary", action="store_true", default=False,
+                    help="Print wire vs decoded bytes, compression ratio and latency per endpoint")
+    group.addoption("--timeout-floor", action="store", type=float, default=2.0,
+                    help="Lowest per-endpoint timeout in seconds (default 2)")
+    group.addoption("--timeout-ceiling", action="store", type=float, default=60.0,
+                    help="Highest per-endpoint timeout in seconds, also used until an endpoint has history (default 60)")
+    group.addoption("--timeout-p99-factor", action="store", type=float, default=3.0,
+                    help="Per-endpoint timeout = historical p99 latency x this factor, clamped to floor/ceiling")
+    group.addoption("--latency-history", action="store", default="reports/latency_history.json",
+                    help="File holding recent per-endpoint latencies across runs (relative to the rootdir)")
+    group.addoption("--hedge-requests", action="store_true", default=False,
+                    help="Send a duplicate GET once the first outlives the endpoint's historical p95")
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    client.settings.retries = config.getoption("--http-retries")
+    client.settings.compression = not config.getoption("--no-http-compression")
+    client.settings.timeout_floor = config.getoption("--timeout-floor")
+    client.settings.timeout_ceiling = config.getoption("--timeout-ceiling")
+    client.settings.timeout_p99_factor = config.getoption("--timeout-p99-factor")
+    client.settings.hedge = config.getoption("--hedge-requests")
+    client.settings.history = LatencyHistory(config.rootpath / Path(config.getoption("--latency-history")))
+    client.settings.history.load()
+    try:
+        jsonio.set_backend(config.getoption("--json-backend"))
+    except ValueError as e:
+        raise pytest.UsageError(str(e)) from None
+    if config.getoption("--http-transfer-summary"):
+        config.pluginmanager.register(TransferSummary(), "http-transfer-summary")
+
+
+def pytest_sessionfinish(session: pytest.Session) -> None:
+    # Under xdist the controller sends no requests; each worker merges its own samples.
+    if session.config.pluginmanager.hasplugin("dsession"):
+        return
+    client.settings.history.save()
+
+
+def pytest_terminal_summary(terminalreporter, config: pytest.Config) -> None:
+    if config.getoption("--hedge-requests"):
+        stats = client.hedging
+        terminalreporter.write_line(f"hedged requests: {stats.sent} duplicates sent, {stats.won} won by the duplicate, "
+                                    f"{stats.wasted} wasted responses discarded")
+
+
+class TransferSummary:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.endpoints: dict[str, dict] = defaultdict(
+            lambda: {"requests": 0, "wire": 0, "decoded": 0, "elapsed": 0.0, "encodings": set()})
+        client.add_listener(self.record)
+
+    def record(self, event: client.RequestEvent) -> None:
+        if event.status is None:
+            return
+        with self._lock:
+            stats = self.endpoints[f"{event.method} {event.endpoint}"]
+            stats["requests"] += 1
+            stats["wire"] += event.wire_bytes
+            stats["decoded"] += event.response_bytes
+            stats["elapsed"] += event.elapsed
+            stats["encodings"].add(event.content_encoding or "identity")
+
+    def pytest_sessionfinish(self, session: pytest.Session) -> None:
+        client.remove_listener(self.record)
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        terminalreporter.section("http transfer")
+        terminalreporter.write_line(f"Accept-Encoding: {client.ACCEPT_ENCODING if client.settings.compression else 'identity'}")
+        terminalreporter.write_line(f"  {'wire KiB':>10} {'decoded KiB':>12} {'ratio':>6} {'mean ms':>8} {'n':>5}  endpoint")
+        for key, stats in sorted(self.endpoints.items(), key=lambda kv: kv[1]["decoded"], reverse=True):
+            ratio = stats["decoded"] / stats["wire"] if stats["wire"] else 1.0
+            terminalreporter.write_line(
+                f"  {stats['wire'] / KIB:10.1f} {stats['decoded'] / KIB:12.1f} {ratio:6.2f} "
+                f"{stats['elapsed'] / stats['requests'] * 1000:8.1f} {stats['requests']:5}  "
+                f"{key} ({', '.join(sorted(stats['encodings']))})")
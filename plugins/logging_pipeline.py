@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+
+import pytest
+
+from api.common import logs
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("logging-pipeline")
+    group.addoption("--log-rotate-bytes", action="store", type=int, default=5 * 1024 * 1024,
+                    help="Rotate a module log file once it reaches this size (default 5 MiB)")
+    group.addoption("--log-rotate-backups", action="store", type=int, default=3,
+                    help="Number of rotated log files to keep per module (default 3)")
+    group.addoption("--log-debug-burst", action="store", type=int, default=20,
+                    help="DEBUG records allowed per message template before rate limiting kicks in; "
+                         "0 disables the limit (default 20)")
+    group.addoption("--log-debug-interval", action="store", type=float, default=1.0,
+                    help="Once rate limited, emit at most one DEBUG record per template per interval (seconds)")
+    group.addoption("--log-dir", action="store", default=None,
+                    help="Write the per-module step logs into this directory instead of next to their step "
+                         "modules (relative to the rootdir)")
+    group.addoption("--log-console-level", action="store", default="INFO",
+                    help="Also write records at or above this level to stderr, where pytest captures them with "
+                         "the test that logged them; NONE disables it (default INFO; DEBUG only goes to the files)")
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config: pytest.Config) -> None:
+    log_dir = config.getoption("--log-dir")
+    console_level = config.getoption("--log-console-level").upper()
+    if console_level != "NONE" and not isinstance(logging.getLevelName(console_level), int):
+        raise pytest.UsageError(f"--log-console-level: unknown level {console_level!r}")
+    logs.setup(config.rootpath / Path(config.getoption("--reports-dir")) / "run.log",
+               max_bytes=config.getoption("--log-rotate-bytes"),
+               backups=config.getoption("--log-rotate-backups"),
+               debug_burst=config.getoption("--log-debug-burst"),
+               debug_interval=config.getoption("--log-debug-interval"),
+               log_dir=config.rootpath / Path(log_dir) if log_dir else None,
+               # Each xdist worker logs to its own <name>.<worker>.log files.
+               worker=getattr(config, "workerinput", {}).get("workerid"),
+               console_level=None if console_level == "NONE" else logging.getLevelName(console_level))
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_unconfigure(config: pytest.Config) -> None:
+    logs.shutdown()
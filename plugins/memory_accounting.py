@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import json
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+
+import pytest
+
+MIB = 1024 * 1024
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("memory-accounting")
+    group.addoption("--memory-accounting", action="store_true", default=False,
+                    help="Record peak and retained memory per scenario and per step (tracemalloc)")
+    group.addoption("--memory-budget-mb", action="store", type=float, default=None,
+                    help="Fail a scenario whose peak traced memory exceeds this many MiB")
+    group.addoption("--memory-retained-budget-mb", action="store", type=float, default=None,
+                    help="Fail a scenario that leaves more than this many MiB allocated when it ends")
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    peak_budget = config.getoption("--memory-budget-mb")
+    retained_budget = config.getoption("--memory-retained-budget-mb")
+    if not (config.getoption("--memory-accounting") or peak_budget or retained_budget):
+        return
+    accountant = MemoryAccountant(config.rootpath / Path(config.getoption("--reports-dir")), peak_budget, retained_budget)
+    config.pluginmanager.register(accountant, "memory-accountant")
+
+
+class MemoryAccountant:
+    def __init__(self, out_dir: Path, peak_budget_mb: float | None, retained_budget_mb: float | None) -> None:
+        self.out_dir = out_dir
+        self.peak_budget = peak_budget_mb * MIB if peak_budget_mb else None
+        self.retained_budget = retained_budget_mb * MIB if retained_budget_mb else None
+        self.scenarios: dict[str, dict] = {}
+        self.steps: dict[str, dict] = defaultdict(lambda: {"calls": 0, "peak": 0, "retained": 0, "example": ""})
+        self._baseline = 0
+        self._scenario_peak = 0
+        self._step_start = 0
+        self._step_failed = False
+        self._started_tracing = False
+
+    def pytest_sessionstart(self, session: pytest.Session) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_bdd_before_scenario(self, request, feature, scenario):
+        tracemalloc.reset_peak()
+        self._baseline = tracemalloc.get_traced_memory()[0]
+        self._scenario_peak = self._baseline
+        self._step_failed = False
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_bdd_before_step_call(self, request, feature, scenario, step, step_func, step_func_args):
+        current, peak = tracemalloc.get_traced_memory()
+        self._scenario_peak = max(self._scenario_peak, peak)
+        tracemalloc.reset_peak()
+        self._step_start = current
+
+    def _end_step(self, step, step_func) -> None:
+        current, peak = tracemalloc.get_traced_memory()
+        self._scenario_peak = max(self._scenario_peak, peak)
+        stats = self.steps[f"{step.type} {step_func.__module__}.{step_func.__name__}"]
+        stats["calls"] += 1
+        stats["peak"] = max(stats["peak"], peak - self._step_start)
+        stats["retained"] = max(stats["retained"], current - self._step_start)
+        stats["example"] = stats["example"] or f"{step.keyword} {step.name}"
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_bdd_after_step(self, request, feature, scenario, step, step_func, step_func_args):
+        self._end_step(step, step_func)
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_bdd_step_error(self, request, feature, scenario, step, step_func, step_func_args, exception):
+        self._end_step(step, step_func)
+        self._step_failed = True
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_bdd_after_scenario(self, request, feature, scenario):
+        current, peak = tracemalloc.get_traced_memory()
+        peak = max(self._scenario_peak, peak) - self._baseline
+        retained = current - self._baseline
+        self.scenarios[request.node.nodeid] = {"peak": peak, "retained": retained}
+
+        # Don't mask the step failure that is already propagating.
+        if self._step_failed:
+            return
+        if self.peak_budget and peak > self.peak_budget:
+            pytest.fail(f"Scenario peak memory {peak / MIB:.1f} MiB exceeds budget {self.peak_budget / MIB:.1f} MiB")
+        if self.retained_budget and retained > self.retained_budget:
+            pytest.fail(f"Scenario retained {retained / MIB:.1f} MiB after completion, "
+                        f"budget is {self.retained_budget / MIB:.1f} MiB")
+
+    def pytest_sessionfinish(self, session: pytest.Session) -> None:
+        if self._started_tracing:
+            tracemalloc.stop()
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        report = {"scenarios": self.scenarios, "steps": dict(self.steps)}
+        (self.out_dir / "memory_accounting.json").write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        terminalreporter.section("memory accounting")
+        top_scenarios = sorted(self.scenarios.items(), key=lambda kv: kv[1]["peak"], reverse=True)[:10]
+        terminalreporter.write_line("top scenarios by peak:")
+        for nodeid, stats in top_scenarios:
+            terminalreporter.write_line(
+                f"  {stats['peak'] / MIB:9.2f} MiB peak {stats['retained'] / MIB:9.2f} MiB retained  {nodeid}")
+        top_steps = sorted(self.steps.items(), key=lambda kv: kv[1]["peak"], reverse=True)[:10]
+        terminalreporter.write_line("top allocating steps:")
+        for key, stats in top_steps:
+            terminalreporter.write_line(
+                f"  {stats['peak'] / MIB:9.2f} MiB peak {stats['retained'] / MIB:9.2f} MiB retained  "
+                f"x{stats['calls']:<4} {key}")
@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import pytest
+from _pytest.config import create_terminal_writer
+
+from api.common import client, jsonio, merkle, stats
+
+CAPTURE_DIR = "reports/envs"
+# File options a child would otherwise share with its siblings; each child writes them into its env dir.
+PATH_OPTIONS = ("--metrics-textfile", "--trace-spans", "--junitxml", "--junit-xml", "--html")
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("multi-env")
+    group.addoption("--env-capture", action="store", default=None,
+                    help="Write status codes, response shapes and latencies of this run to a JSON file "
+                         "(set for each child run by --env a,b,...)")
+    group.addoption("--env-latency-ratio", action="store", type=float, default=2.0,
+                    help="With --env a,b,...: flag endpoints whose median latency differs by this factor or more")
+
+
+def envs(config: pytest.Config) -> list[str]:
+    return [env.strip() for env in config.getoption("--env").split(",") if env.strip()]
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_cmdline_main(config: pytest.Config) -> int | None:
+    selected = envs(config)
+    if len(selected) < 2 or config.option.help or config.option.version:
+        return None
+    missing = [env for env in selected if not (config.rootpath / "env" / f"{env}.env").is_file()]
+    if missing:
+        raise pytest.UsageError(f"No env file for {', '.join(missing)} in {config.rootpath / 'env'}")
+    return MultiEnvRun(config, selected).run()
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    path = config.getoption("--env-capture")
+    if path:
+        path = config.rootpath / Path(path)
+        worker = getattr(config, "workerinput", {}).get("workerid")
+        if worker:
+            path = path.with_name(f"{path.stem}.{worker}{path.suffix}")
+        config.pluginmanager.register(EnvCapture(path, config.getoption("--env")), "env-capture")
+
+
+def _child_args(args: list[str], env: str, out_dir: Path) -> list[str]:
+    """The invocation's own arguments with --env replaced, file options moved into this env's directory, and
+    its capture, latency history, reports and step logs kept there too."""
+    kept, pending = [], None
+    for arg in args:
+        name, eq, value = arg.partition("=")
+        if pending == "--env":
+            pending = None
+        elif pending:
+            kept += [pending, str(out_dir / Path(arg).name)]
+            pending = None
+        elif arg == "--env" or arg in PATH_OPTIONS:
+            pending = arg
+        elif name == "--env" and eq:
+            continue
+        elif name in PATH_OPTIONS and eq:
+            kept.append(f"{name}={out_dir / Path(value).name}")
+        else:
+            kept.append(arg)
+    return [*kept, "--env", env, "--env-capture", str(out_dir / "capture.json"),
+            "--latency-history", str(out_dir / "latency_history.json"),
+            "--reports-dir", str(out_dir), "--log-dir", str(out_dir / "logs")]
+
+
+class MultiEnvRun:
+    """Runs the selected tests once per environment, concurrently, then diffs what the environments returned.
+
+    Every environment gets its own pytest process: its own env file, client settings, connection pools,
+    breakers and latency history. Output goes to reports/envs/<env>/output.txt, next to that run's reports
+    (run.log, snapshot and fuzz results, profiles, file options such as --metrics-textfile) and step logs.
+    """
+
+    def __init__(self, config: pytest.Config, selected: list[str]) -> None:
+        self.config = config
+        self.envs = selected
+        self.out_dir = config.rootpath / CAPTURE_DIR
+        # Runs before pytest_configure, so there is no terminal reporter to borrow a writer from.
+        self.tw = create_terminal_writer(config, sys.stdout)
+
+    def run(self) -> int:
+        args = list(self.config.invocation_params.args)
+        procs = {}
+        start = time.perf_counter()
+        for env in self.envs:
+            env_dir = self.out_dir / env
+            env_dir.mkdir(parents=True, exist_ok=True)
+            for stale in env_dir.glob("capture*.json"):
+                stale.unlink()
+            output = open(env_dir / "output.txt", "wb")
+            cmd = [sys.executable, "-m", "pytest", *_child_args(args, env, env_dir)]
+            procs[env] = (subprocess.Popen(cmd, cwd=self.config.invocation_params.dir, stdout=output,
+                                           stderr=subprocess.STDOUT, env={**os.environ, "PYTHONUNBUFFERED": "1"}),
+                          output)
+            self.tw.line(f"[{env}] started: {' '.join(cmd[3:])}")
+        codes = {}
+        for env, (proc, output) in procs.items():
+            codes[env] = proc.wait()
+            output.close()
+        self.tw.sep("=", f"{len(self.envs)} environments in {time.perf_counter() - start:.2f}s")
+        for env in self.envs:
+            self.tw.line(f"[{env}] exit {codes[env]}: {self._last_line(env)}  ({self.out_dir / env / 'output.txt'})",
+                         red=codes[env] != 0)
+        captures = {env: self._load(env) for env in self.envs}
+        report = compare({env: capture for env, capture in captures.items() if capture},
+                         self.config.getoption("--env-latency-ratio"))
+        (self.out_dir / "diff.json").write_text(json.dumps(report, indent=2), encoding="utf-8")
+        self._print(report)
+        return max(codes.values())
+
+    def _last_line(self, env: str) -> str:
+        lines = (self.out_dir / env / "output.txt").read_text(encoding="utf-8", errors="replace").splitlines()
+        return next((line.strip("= ") for line in reversed(lines) if line.strip()), "no output")
+
+    def _load(self, env: str) -> dict | None:
+        # One file per process: the run itself, plus one per xdist worker.
+        parts = []
+        for path in sorted((self.out_dir / env).glob("capture*.json")):
+            try:
+                parts.append(json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                self.tw.line(f"[{env}] unreadable capture {path}; skipped", yellow=True)
+        if not parts:
+            self.tw.line(f"[{env}] no capture in {self.out_dir / env}; left out of the diff", yellow=True)
+            return None
+        return merge_captures(parts)
+
+    def _print(self, report: dict) -> None:
+        self.tw.sep("=", f"cross-environment diff (baseline {report['baseline']})")
+        if not any(report[section] for section in ("outcomes", "status", "shapes", "coverage", "latency_flagged")):
+            self.tw.line("no differences in outcomes, status codes, response shapes or latency")
+        for nodeid, by_env in report["outcomes"].items():
+            self.tw.line(f"outcome  {nodeid}: {_by_env(by_env)}", red=True)
+        for key, by_env in report["status"].items():
+            self.tw.line(f"status   {key}: {_by_env(by_env)}", red=True)
+        for key, changes in report["shapes"].items():
+            self.tw.line(f"shape    {key}:", red=True)
+            for change in changes:
+                self.tw.line(f"           {change}")
+        for key, absent in report["coverage"].items():
+            self.tw.line(f"coverage {key}: not requested in {', '.join(absent)}", yellow=True)
+        if report["latency"]:
+            self.tw.line("latency p50 / p95 ms per endpoint:")
+            for endpoint, by_env in report["latency"].items():
+                flag = "!" if endpoint in report["latency_flagged"] else " "
+                cells = "  ".join(f"{env} {s['p50'] * 1000:7.1f} / {s['p95'] * 1000:7.1f}" for env, s in by_env.items())
+                self.tw.line(f"  {flag} {endpoint:<45} {cells}", red=flag == "!")
+
+
+def _by_env(by_env: dict) -> str:
+    return ", ".join(f"{env} {value}" for env, value in by_env.items())
+
+
+def merge_captures(parts: list[dict]) -> dict:
+    merged = {"requests": {}, "latency": defaultdict(list), "outcomes": {}}
+    for part in parts:
+        merged["outcomes"].update(part["outcomes"])
+        for endpoint, samples in part["latency"].items():
+            merged["latency"][endpoint] += samples
+        for key, entry in part["requests"].items():
+            into = merged["requests"].setdefault(key, {"status": {}, "shape": None, "count": 0})
+            for status, n in entry["status"].items():
+                into["status"][status] = into["status"].get(status, 0) + n
+            into["count"] += entry["count"]
+            into["shape"] = merkle.merge_shapes(into["shape"], entry["shape"])
+    return merged
+
+
+def compare(captures: dict[str, dict], latency_ratio: float) -> dict:
+    """Differences between environments' captures, each compared with the first (the baseline)."""
+    names = list(captures)
+    report = {"baseline": names[0] if names else None, "envs": names, "outcomes": {}, "status": {}, "shapes": {},
+              "coverage": {}, "latency": {}, "latency_flagged": []}
+    if len(names) < 2:
+        return report
+    baseline = names[0]
+
+    nodeids = sorted({nodeid for capture in captures.values() for nodeid in capture["outcomes"]})
+    for nodeid in nodeids:
+        by_env = {env: captures[env]["outcomes"].get(nodeid, "not run") for env in names}
+        if len(set(by_env.values())) > 1:
+            report["outcomes"][nodeid] = by_env
+
+    keys = sorted({key for capture in captures.values() for key in capture["requests"]})
+    for key in keys:
+        present = {env: captures[env]["requests"][key] for env in names if key in captures[env]["requests"]}
+        absent = [env for env in names if env not in present]
+        if absent:
+            report["coverage"][key] = absent
+        statuses = {env: ",".join(sorted(entry["status"])) for env, entry in present.items()}
+        if len(set(statuses.values())) > 1:
+            report["status"][key] = statuses
+        if baseline not in present:
+            continue
+        # Compare whole shape trees by root digest first; only differing ones are walked, subtree by subtree.
+        base_digest = merkle.tree(present[baseline]["shape"] or {}).digest
+        changes = []
+        for env, entry in present.items():
+            if env != baseline and merkle.tree(entry["shape"] or {}).digest != base_digest:
+                changes += [f"{env}: {change}"
+                            for change in merkle.shape_diff(present[baseline]["shape"], entry["shape"], (baseline, env))]
+        if changes:
+            report["shapes"][key] = changes
+
+    endpoints = sorted({endpoint for capture in captures.values() for endpoint in capture["latency"]})
+    for endpoint in endpoints:
+        by_env = {env: stats.summarize(captures[env]["latency"][endpoint])
+                  for env in names if captures[env]["latency"].get(endpoint)}
+        report["latency"][endpoint] = by_env
+        medians = [summary["p50"] for summary in by_env.values() if summary["p50"] > 0]
+        if len(medians) > 1 and max(medians) / min(medians) >= latency_ratio:
+            report["latency_flagged"].append(endpoint)
+    return report
+
+
+class EnvCapture:
+    """What one environment returned: per test and endpoint the status codes and merged response shape,
+    per endpoint the latencies, and every test's outcome."""
+
+    def __init__(self, path: Path, env: str) -> None:
+        self.path = path
+        self.env = env
+        self.nodeid = ""
+        self._lock = threading.Lock()
+        self.requests: dict[str, dict] = {}
+        self.latency: dict[str, list[float]] = defaultdict(list)
+        self.outcomes: dict[str, str] = {}
+        client.add_listener(self.record)
+
+    def _shape(self, resp) -> dict | None:
+        # Streamed bodies belong to the test; reading them here would consume them.
+        if resp is None or not getattr(resp, "_content_consumed", False):
+            return None
+        if not resp.content:
+            return {"empty": None}
+        try:
+            return merkle.shape(jsonio.loads(resp.content))
+        except ValueError:
+            return {"text": None}
+
+    def record(self, event: client.RequestEvent) -> None:
+        shape = self._shape(event.response)
+        status = str(event.status) if event.status is not None else "error"
+        with self._lock:
+            entry = self.requests.setdefault(f"{self.nodeid} {event.method} {event.endpoint}",
+                                             {"status": Counter(), "shape": None, "count": 0})
+            entry["status"][status] += 1
+            entry["count"] += 1
+            entry["shape"] = merkle.merge_shapes(entry["shape"], shape)
+            if event.status is not None:
+                self.latency[f"{event.method} {event.endpoint}"].append(event.elapsed)
+
+    def pytest_runtest_setup(self, item: pytest.Item) -> None:
+        self.nodeid = item.nodeid
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        if report.when == "call" or not report.passed:
+            self.outcomes[report.nodeid] = report.outcome
+
+    def pytest_sessionfinish(self, session: pytest.Session) -> None:
+        client.remove_listener(self.record)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        capture = {"env": self.env, "requests": self.requests, "latency": self.latency, "outcomes": self.outcomes}
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(capture), encoding="utf-8")
+        os.replace(tmp, self.path)
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import pytest
+
+from api.common import client
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("openmetrics")
+    group.addoption("--metrics-textfile", action="store", default=None,
+                    help="Write run telemetry as a Prometheus/OpenMetrics textfile to this path at session end "
+                         "(e.g. the node exporter textfile collector directory); under xdist one file per worker, "
+                         "<name>.<worker>.prom, labelled with the worker")
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    path = config.getoption("--metrics-textfile")
+    if path:
+        path = Path(path)
+        worker = getattr(config, "workerinput", {}).get("workerid")
+        if worker:
+            path = path.with_name(f"{path.stem}.{worker}{path.suffix}")
+        exporter = OpenMetricsExporter(path, env=config.getoption("--env"), worker=worker)
+        config.pluginmanager.register(exporter, "openmetrics-exporter")
+
+
+def _labels(**labels: object) -> str:
+    def escape(value: object) -> str:
+        return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels.items()) + "}"
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+    def lines(self, name: str, labels: dict) -> list[str]:
+        out = [f"{name}_bucket{_labels(**labels, le=bound)} {n}" for bound, n in zip(self.buckets, self.counts)]
+        out.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {self.count}")
+        out.append(f"{name}_sum{_labels(**labels)} {self.total}")
+        out.append(f"{name}_count{_labels(**labels)} {self.count}")
+        return out
+
+
+class OpenMetricsExporter:
+    def __init__(self, path: Path, env: str, worker: str | None = None) -> None:
+        self.path = path
+        self.env = env
+        self.worker = worker
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self.requests: dict[tuple, int] = defaultdict(int)
+        self.retries: dict[str, int] = defaultdict(int)
+        self.latency: dict[tuple, Histogram] = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.query_latency: dict[str, Histogram] = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.sizes: dict[str, Histogram] = defaultdict(lambda: Histogram(SIZE_BUCKETS))
+        self.transfer: dict[str, list[int]] = defaultdict(lambda: [0, 0])
+        self.outcomes: dict[tuple, int] = defaultdict(int)
+        self.markers: set[str] = set()
+        client.add_listener(self.record)
+
+    def record(self, event: client.RequestEvent) -> None:
+        status = event.status if event.status is not None else "error"
+        with self._lock:
+            self.requests[(event.endpoint, event.method, status)] += 1
+            self.retries[event.endpoint] += event.retries
+            self.latency[(event.endpoint, event.method)].observe(event.elapsed)
+            if event.query:
+                self.query_latency[event.query].observe(event.elapsed)
+            self.sizes[event.endpoint].observe(event.response_bytes)
+            self.transfer[event.endpoint][0] += event.wire_bytes
+            self.transfer[event.endpoint][1] += event.response_bytes
+
+    def pytest_sessionstart(self, session: pytest.Session) -> None:
+        self.markers = {line.split(":")[0].strip() for line in session.config.getini("markers")}
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_makereport(self, item: pytest.Item, call):
+        report = yield
+        if report.when == "call" or (report.when == "setup" and not report.passed):
+            for marker in {m.name for m in item.iter_markers()} & self.markers:
+                self.outcomes[(marker, report.outcome)] += 1
+        return report
+
+    def render(self) -> str:
+        env = {"env": self.env, "worker": self.worker} if self.worker else {"env": self.env}
+        lines = ["# HELP qa_http_requests_total HTTP requests sent by the QA suite.",
+                 "# TYPE qa_http_requests_total counter"]
+        for (endpoint, method, status), n in sorted(self.requests.items(), key=str):
+            lines.append(f"qa_http_requests_total{_labels(**env, endpoint=endpoint, method=method, status=status)} {n}")
+
+        lines += ["# HELP qa_http_retries_total Retries performed for idempotent requests.",
+                  "# TYPE qa_http_retries_total counter"]
+        for endpoint, n in sorted(self.retries.items()):
+            lines.append(f"qa_http_retries_total{_labels(**env, endpoint=endpoint)} {n}")
+
+        lines += ["# HELP qa_http_request_duration_seconds Client-side request latency per endpoint.",
+                  "# TYPE qa_http_request_duration_seconds histogram"]
+        for (endpoint, method), hist in sorted(self.latency.items()):
+            lines += hist.lines("qa_http_request_duration_seconds", {**env, "endpoint": endpoint, "method": method})
+
+        lines += ["# HELP qa_metrics_query_duration_seconds Client-side latency per metrics query.",
+                  "# TYPE qa_metrics_query_duration_seconds histogram"]
+        for query, hist in sorted(self.query_latency.items()):
+            lines += hist.lines("qa_metrics_query_duration_seconds", {**env, "query": query})
+
+        lines += ["# HELP qa_http_response_size_bytes Decoded response body size per endpoint.",
+                  "# TYPE qa_http_response_size_bytes histogram"]
+        for endpoint, hist in sorted(self.sizes.items()):
+            lines += hist.lines("qa_http_response_size_bytes", {**env, "endpoint": endpoint})
+
+        lines += ["# HELP qa_http_response_wire_bytes_total Response bytes received on the wire (compressed) per endpoint.",
+                  "# TYPE qa_http_response_wire_bytes_total counter"]
+        for endpoint, (wire, _) in sorted(self.transfer.items()):
+            lines.append(f"qa_http_response_wire_bytes_total{_labels(**env, endpoint=endpoint)} {wire}")
+
+        lines += ["# HELP qa_http_response_decoded_bytes_total Response bytes after content decoding per endpoint.",
+                  "# TYPE qa_http_response_decoded_bytes_total counter"]
+        for endpoint, (_, decoded) in sorted(self.transfer.items()):
+            lines.append(f"qa_http_response_decoded_bytes_total{_labels(**env, endpoint=endpoint)} {decoded}")
+
+        lines += ["# HELP qa_http_compression_ratio Decoded over wire bytes per endpoint for this run.",
+                  "# TYPE qa_http_compression_ratio gauge"]
+        for endpoint, (wire, decoded) in sorted(self.transfer.items()):
+            if wire:
+                lines.append(f"qa_http_compression_ratio{_labels(**env, endpoint=endpoint)} {decoded / wire:.3f}")
+
+        lines += ["# HELP qa_http_hedged_requests_total Duplicate GETs sent because the first outlived the p95.",
+                  "# TYPE qa_http_hedged_requests_total counter",
+                  f"qa_http_hedged_requests_total{_labels(**env)} {client.hedging.sent}",
+                  "# HELP qa_http_hedge_wasted_total Responses discarded because the other copy answered first.",
+                  "# TYPE qa_http_hedge_wasted_total counter",
+                  f"qa_http_hedge_wasted_total{_labels(**env)} {client.hedging.wasted}"]
+
+        lines += ["# HELP qa_tests_total Test outcomes per marker.",
+                  "# TYPE qa_tests_total counter"]
+        for (marker, outcome), n in sorted(self.outcomes.items()):
+            lines.append(f"qa_tests_total{_labels(**env, marker=marker, outcome=outcome)} {n}")
+
+        lines += ["# HELP qa_run_duration_seconds Wall time of the test run.",
+                  "# TYPE qa_run_duration_seconds gauge",
+                  f"qa_run_duration_seconds{_labels(**env)} {time.time() - self.started:.3f}",
+                  "# HELP qa_run_timestamp_seconds Unix time the run finished.",
+                  "# TYPE qa_run_timestamp_seconds gauge",
+                  f"qa_run_timestamp_seconds{_labels(**env)} {time.time():.3f}",
+                  "# EOF"]
+        return "\n".join(lines) + "\n"
+
+    def pytest_sessionfinish(self, session: pytest.Session) -> None:
+        client.remove_listener(self.record)
+        # Under xdist the controller sends no requests; each worker exports its own file.
+        if session.config.pluginmanager.hasplugin("dsession"):
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so the node exporter never scrapes a half-written file.
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(self.render(), encoding="utf-8")
+        os.replace(tmp, self.path)
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import pytest
+from dotenv import dotenv_values
+
+from api.common import client
+
+# Env-file keys holding the base URLs the suite talks to.
+BASE_URL_KEYS = ("izo_mcn_url", "izo_iac_url", "PING_API_URL", "BASE_URL")
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("preflight")
+    group.addoption("--no-preflight", action="store_true", default=False,
+                    help="Skip probing the configured base URLs before the first test")
+    group.addoption("--preflight-timeout", action="store", type=float, default=5.0,
+                    help="Seconds to wait for each base URL to answer the preflight probe (default 5)")
+    group.addoption("--breaker-threshold", action="store", type=int, default=3,
+                    help="Consecutive connection failures that open a host's circuit breaker; 0 disables it")
+    group.addoption("--down-host-action", action="store", choices=("fail", "skip"), default="fail",
+                    help="Report tests short-circuited by an open breaker as failed (default) or skipped")
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    client.settings.breaker_threshold = config.getoption("--breaker-threshold")
+    config.pluginmanager.register(Preflight(config), "preflight")
+
+
+def base_urls(env_file: Path) -> dict[str, str]:
+    """One URL per host from the env file, keyed by host."""
+    if not env_file.is_file():
+        return {}
+    values = dotenv_values(env_file)
+    urls = {}
+    for key in BASE_URL_KEYS:
+        url = values.get(key)
+        if url:
+            urls.setdefault(urlsplit(url).netloc, url)
+    return urls
+
+
+class Preflight:
+    def __init__(self, config: pytest.Config) -> None:
+        self.enabled = not config.getoption("--no-preflight")
+        self.timeout = config.getoption("--preflight-timeout")
+        self.action = config.getoption("--down-host-action")
+        self.env_file = config.rootpath / "env" / f"{config.getoption('--env')}.env"
+        self.results: dict[str, tuple[str | None, float]] = {}
+
+    def _probe(self, url: str) -> tuple[str | None, float]:
+        start = time.perf_counter()
+        error = client.probe(url, self.timeout)
+        return error, time.perf_counter() - start
+
+    def pytest_collection_finish(self, session: pytest.Session) -> None:
+        if not self.enabled or session.config.option.collectonly or not session.items:
+            return
+        urls = base_urls(self.env_file)
+        if not urls:
+            return
+        with ThreadPoolExecutor(max_workers=len(urls), thread_name_prefix="preflight") as pool:
+            results = dict(zip(urls, pool.map(self._probe, urls.values())))
+        for host, (error, elapsed) in results.items():
+            state = client.breaker(host)
+            state.probed = True
+            if error:
+                client.trip(host, f"preflight probe failed: {error}")
+        self.results = results
+
+    def pytest_runtest_setup(self, item: pytest.Item) -> None:
+        client.last_short_circuit = None
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_makereport(self, item: pytest.Item, call):
+        report = yield
+        reason = client.last_short_circuit
+        if reason and report.failed:
+            # Replace the traceback with the breaker's reason; the root cause is the host, not the step.
+            if self.action == "skip":
+                report.outcome = "skipped"
+                report.longrepr = (str(item.path), item.location[1] or 0, f"Skipped: {reason}")
+            else:
+                report.longrepr = f"Short-circuited: {reason}"
+        return report
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        if not self.results:
+            return
+        terminalreporter.section("preflight")
+        for host, (error, elapsed) in sorted(self.results.items()):
+            status = f"DOWN ({error})" if error else "up"
+            terminalreporter.write_line(f"  {host:<40} {elapsed * 1000:8.1f} ms  {status}")
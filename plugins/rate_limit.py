@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from dotenv import dotenv_values
+
+from api.common import client
+from api.common.ratelimit import RateLimiter, parse_limits
+
+# Env-file keys, e.g. RATE_LIMIT_HOSTS=*=20,qa-metrics.example:8080=5/s:10 and RATE_LIMIT_TENANTS=*=10
+HOST_LIMITS_KEY = "RATE_LIMIT_HOSTS"
+TENANT_LIMITS_KEY = "RATE_LIMIT_TENANTS"
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("rate-limit")
+    group.addoption("--no-rate-limit", action="store_true", default=False,
+                    help=f"Ignore {HOST_LIMITS_KEY} / {TENANT_LIMITS_KEY} from the env file")
+    group.addoption("--rate-limit-hosts", action="store", default=None,
+                    help=f"Per-host limits overriding {HOST_LIMITS_KEY}, e.g. '*=20,localhost:3000=50/s:100'")
+    group.addoption("--rate-limit-tenants", action="store", default=None,
+                    help=f"Per-tenant (X-TenantID) limits overriding {TENANT_LIMITS_KEY}, e.g. '*=10'")
+    group.addoption("--rate-limit-dir", action="store", default="reports/.ratelimit",
+                    help="Directory holding the token buckets shared by threads and xdist workers (relative to the rootdir)")
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    if config.getoption("--no-rate-limit"):
+        return
+    env_file = config.rootpath / "env" / f"{config.getoption('--env')}.env"
+    values = dotenv_values(env_file) if env_file.is_file() else {}
+    try:
+        hosts = parse_limits(config.getoption("--rate-limit-hosts") or values.get(HOST_LIMITS_KEY))
+        tenants = parse_limits(config.getoption("--rate-limit-tenants") or values.get(TENANT_LIMITS_KEY))
+    except ValueError as e:
+        raise pytest.UsageError(str(e)) from None
+    if not hosts and not tenants:
+        return
+    limiter = RateLimiter(config.rootpath / Path(config.getoption("--rate-limit-dir")), hosts, tenants)
+    client.settings.rate_limiter = limiter
+    config.pluginmanager.register(RateLimitSummary(limiter), "rate-limit")
+
+
+class RateLimitSummary:
+    def __init__(self, limiter: RateLimiter) -> None:
+        self.limiter = limiter
+
+    def pytest_unconfigure(self, config: pytest.Config) -> None:
+        client.settings.rate_limiter = None
+        self.limiter.close()
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        buckets = [(key, bucket) for key, bucket in self.limiter.buckets.items() if bucket and bucket.acquired]
+        if not buckets:
+            return
+        terminalreporter.section("rate limit")
+        for (kind, name), bucket in sorted(buckets):
+            terminalreporter.write_line(
+                f"  {kind:<6} {name:<40} {bucket.limit.rate:g}/s burst {bucket.limit.burst:g}  "
+                f"{bucket.acquired:6} requests  {bucket.waited:8.2f} s throttled")
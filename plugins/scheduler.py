@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import heapq
+import re
+from collections import defaultdict
+
+import pytest
+
+# Scenario tags declaring shared state, e.g. "@provides:cloud-<cloud>". Example placeholders are
+# filled in per parametrized row, so the aws and azure rows of an outline form separate branches.
+DEPENDENCY_TAGS = ("provides", "requires", "releases")
+# user_properties key set by plugins that skip a provider because its state already exists;
+# such a skip satisfies the dependents instead of skipping them too.
+REUSED = "reused_state"
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("scheduler")
+    group.addoption("--no-dag", action="store_true", default=False,
+                    help="Keep file order and ignore @provides/@requires/@releases scenario tags")
+    group.addoption("--show-dag", action="store_true", default=False,
+                    help="Print the dependency branches and the order scenarios will run in")
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    config.addinivalue_line("markers", "provides(resource): scenario creates state other scenarios use")
+    config.addinivalue_line("markers", "requires(resource): scenario runs after, and only if, the providers passed")
+    config.addinivalue_line("markers", "releases(resource): scenario tears the state down after all its users ran")
+    if config.getoption("--no-dag"):
+        return
+    if config.pluginmanager.hasplugin("xdist") and getattr(config.option, "dist", "no") == "load":
+        # Each branch is pinned to one worker via xdist_group; plain "load" would ignore that.
+        config.option.dist = "loadgroup"
+    config.pluginmanager.register(Scheduler(config), "scenario-dag")
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_bdd_apply_tag(tag: str, function):
+    kind, sep, resource = tag.partition(":")
+    if not sep or kind not in DEPENDENCY_TAGS or not resource:
+        return None
+    getattr(pytest.mark, kind)(resource)(function)
+    return True
+
+
+def scenario_resources(item: pytest.Item, kind: str) -> set[str]:
+    callspec = getattr(item, "callspec", None)
+    example = callspec.params.get("_pytest_bdd_example", {}) if callspec else {}
+    return {re.sub(r"<(\w+)>", lambda m: str(example.get(m.group(1), m.group(0))), mark.args[0])
+            for mark in item.iter_markers(kind)}
+
+
+class Scheduler:
+    def __init__(self, config: pytest.Config) -> None:
+        self.config = config
+        self.xdist = config.pluginmanager.hasplugin("xdist")
+        self.providers: dict[str, list[str]] = {}
+        self.requires: dict[str, set[str]] = {}
+        self.failed: dict[str, str] = {}
+        self.branches: list[list[pytest.Item]] = []
+
+    def _graph(self, items: list[pytest.Item]) -> dict[int, set[int]]:
+        provides, requires, releases = ({i: scenario_resources(item, kind) for i, item in enumerate(items)}
+                                        for kind in DEPENDENCY_TAGS)
+        providers: dict[str, set[int]] = defaultdict(set)
+        users: dict[str, set[int]] = defaultdict(set)
+        for i in range(len(items)):
+            for resource in provides[i]:
+                providers[resource].add(i)
+            for resource in requires[i]:
+                users[resource].add(i)
+        deps: dict[int, set[int]] = {i: set() for i in range(len(items))}
+        for i in range(len(items)):
+            for resource in requires[i] | releases[i]:
+                deps[i] |= providers[resource]
+            for resource in releases[i]:
+                deps[i] |= users[resource]
+            deps[i].discard(i)
+        self.providers = {r: [items[i].nodeid for i in sorted(ids)] for r, ids in providers.items()}
+        self.requires = {items[i].nodeid: requires[i] | releases[i] for i in range(len(items))
+                         if requires[i] | releases[i]}
+        return deps
+
+    def _order(self, deps: dict[int, set[int]], items: list[pytest.Item]) -> list[int]:
+        """Topological order that keeps collection order wherever the dependencies allow."""
+        dependents: dict[int, set[int]] = defaultdict(set)
+        remaining = {i: len(d) for i, d in deps.items()}
+        for i, d in deps.items():
+            for dep in d:
+                dependents[dep].add(i)
+        ready = [i for i, n in remaining.items() if not n]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            i = heapq.heappop(ready)
+            order.append(i)
+            for j in dependents[i]:
+                remaining[j] -= 1
+                if not remaining[j]:
+                    heapq.heappush(ready, j)
+        if len(order) < len(items):
+            cycle = sorted(items[i].nodeid for i, n in remaining.items() if n)
+            raise pytest.UsageError("Scenario dependency cycle between:\n  " + "\n  ".join(cycle))
+        return order
+
+    @staticmethod
+    def _components(deps: dict[int, set[int]]) -> dict[int, int]:
+        parent = {i: i for i in deps}
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i, d in deps.items():
+            for dep in d:
+                parent[find(i)] = find(dep)
+        return {i: find(i) for i in deps}
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_modifyitems(self, items: list[pytest.Item]) -> None:
+        deps = self._graph(items)
+        if not any(deps.values()):
+            return
+        order = self._order(deps, items)
+        roots = self._components(deps)
+        branches: dict[int, list[pytest.Item]] = defaultdict(list)
+        for i in order:
+            branches[roots[i]].append(items[i])
+        self.branches = [branch for branch in branches.values() if len(branch) > 1]
+        if self.xdist:
+            for n, branch in enumerate(self.branches):
+                for item in branch:
+                    item.add_marker(pytest.mark.xdist_group(f"dag-{n}"))
+        items[:] = [items[i] for i in order]
+
+    def pytest_collection_finish(self, session: pytest.Session) -> None:
+        if not self.config.getoption("--show-dag"):
+            return
+        reporter = self.config.pluginmanager.get_plugin("terminalreporter")
+        if reporter is None:
+            return
+        reporter.write_line(f"scenario DAG: {len(self.branches)} dependent branches, "
+                            f"{len(session.items) - sum(map(len, self.branches))} independent scenarios")
+        for n, branch in enumerate(self.branches):
+            reporter.write_line(f"  dag-{n}:")
+            for item in branch:
+                needs = ", ".join(sorted(self.requires.get(item.nodeid, ()))) or "-"
+                reporter.write_line(f"    {item.nodeid}  (needs: {needs})")
+
+    def pytest_runtest_setup(self, item: pytest.Item) -> None:
+        for resource in sorted(self.requires.get(item.nodeid, ())):
+            if resource in self.failed:
+                pytest.skip(f"requires '{resource}', but {self.failed[resource]} did not pass")
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        if report.passed or (report.skipped and any(key == REUSED for key, _ in report.user_properties)):
+            return
+        for resource, nodeids in self.providers.items():
+            if report.nodeid in nodeids:
+                self.failed.setdefault(resource, report.nodeid)
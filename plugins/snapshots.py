@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import json
+import threading
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+from api.common import client, jsonio, merkle, snapshots
+
+DIFF_FILE = "snapshot_diff.json"
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("snapshots")
+    group.addoption("--snapshot", action="store", choices=("check", "update"), default=None,
+                    help="check: compare every response with its golden snapshot and fail on differences; "
+                         "update: store this run's responses as the new golden snapshots")
+    group.addoption("--snapshot-dir", action="store", default="snapshots/{env}",
+                    help="Golden snapshot store (relative to the rootdir; {env} is replaced by --env)")
+    group.addoption("--snapshot-mask", action="append", default=[],
+                    help="Also mask the values of this response key (repeatable); IDs, timestamps and "
+                         "UUIDs are masked already")
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    mode = config.getoption("--snapshot")
+    if not mode:
+        return
+    directory = config.rootpath / Path(config.getoption("--snapshot-dir").format(env=config.getoption("--env")))
+    try:
+        store = snapshots.SnapshotStore(directory).load()
+    except ValueError as e:
+        raise pytest.UsageError(str(e)) from None
+    config.pluginmanager.register(Snapshots(config, mode, store), "snapshots")
+
+
+class Snapshots:
+    """Snapshots every response as {"status", "body"} with volatile values masked, keyed by the test's
+    nodeid and "<METHOD> <endpoint> #<n>" (the n-th such request of the test).
+
+    Nothing is written while tests run: documents are kept once per address, and in check mode only for
+    addresses that differ from the baseline. The store is written, or compared, at session end; under
+    xdist by each worker for the tests it ran, never by the controller. In check mode each worker writes
+    its own diff file, which the controller merges into DIFF_FILE, reports, and fails the run on.
+    """
+
+    def __init__(self, config: pytest.Config, mode: str, store: snapshots.SnapshotStore) -> None:
+        self.config = config
+        self.mode = mode
+        self.store = store
+        self.mask = config.getoption("--snapshot-mask")
+        self.nodeid = ""
+        self.ran: set[str] = set()
+        self.seen: dict[str, dict[str, str]] = {}
+        self.objects: dict[str, object] = {}
+        self.trees: dict[str, merkle.Node] = {}
+        self.result: dict[str, object] = {}
+        self._counts: Counter[tuple[str, str]] = Counter()
+        self._lock = threading.Lock()
+        self.path = config.rootpath / Path(config.getoption("--reports-dir")) / DIFF_FILE
+        worker = getattr(config, "workerinput", {}).get("workerid")
+        if worker:
+            self.path = self.path.with_name(f"{self.path.stem}.{worker}{self.path.suffix}")
+        elif getattr(config.option, "dist", "no") != "no":
+            # The controller merges whatever worker files it finds; drop those of an earlier run.
+            for stale in self.worker_files():
+                stale.unlink(missing_ok=True)
+        client.add_listener(self.record)
+
+    def record(self, event: client.RequestEvent) -> None:
+        resp = event.response
+        # Streamed bodies belong to the test; reading them here would consume them.
+        if not self.nodeid or resp is None or not getattr(resp, "_content_consumed", False):
+            return
+        try:
+            body = jsonio.loads(resp.content) if resp.content else None
+        except ValueError:
+            body = resp.text
+        document = {"status": event.status, "body": snapshots.normalize(body, self.mask)}
+        node = merkle.tree(document)
+        addr = snapshots.address(node)
+        with self._lock:
+            request = f"{event.method} {event.endpoint}"
+            self._counts[self.nodeid, request] += 1
+            key = f"{request} #{self._counts[self.nodeid, request]}"
+            self.seen.setdefault(self.nodeid, {})[key] = addr
+            if self.mode == "update":
+                self.objects.setdefault(addr, document)
+            elif self.store.index.get(self.nodeid, {}).get(key) not in (None, addr):
+                self.trees.setdefault(addr, node)
+
+    def pytest_runtest_setup(self, item: pytest.Item) -> None:
+        self.nodeid = item.nodeid
+        self.ran.add(item.nodeid)
+
+    def pytest_runtest_teardown(self, item: pytest.Item) -> None:
+        self.nodeid = ""
+
+    def update(self) -> None:
+        # Tests that did not run keep their snapshots; tests that ran are replaced by what they sent now.
+        written = self.store.save({nodeid: self.seen.get(nodeid, {}) for nodeid in self.ran}, self.objects)
+        addresses = [addr for keys in self.seen.values() for addr in keys.values()]
+        self.result = {"snapshots": len(addresses), "distinct": len(set(addresses)),
+                       "written": written, "pruned": self.store.prune()}
+
+    def check(self) -> None:
+        changed, new, total = {}, [], 0
+        for nodeid, keys in sorted(self.seen.items()):
+            stored = self.store.index.get(nodeid, {})
+            for key, addr in sorted(keys.items()):
+                total += 1
+                baseline = stored.get(key)
+                if baseline is None:
+                    new.append(f"{nodeid} {key}")
+                elif baseline != addr:
+                    try:
+                        lines = snapshots.changes(self.store.tree(baseline), self.trees[addr])
+                    except FileNotFoundError:
+                        lines = [f"baseline object {baseline} is missing from {self.store.directory}"]
+                    changed[f"{nodeid} {key}"] = lines
+        missing = sorted(f"{nodeid} {key}" for nodeid in self.ran
+                         for key in self.store.index.get(nodeid, {}) if key not in self.seen.get(nodeid, {}))
+        self.result = {"snapshots": total, "matched": total - len(changed) - len(new),
+                       "changed": changed, "new": new, "missing": missing}
+        self.write()
+
+    def worker_files(self) -> list[Path]:
+        return sorted(self.path.parent.glob(f"{self.path.stem}.*{self.path.suffix}"))
+
+    def merge(self) -> None:
+        self.result = snapshots.merge_results(json.loads(path.read_text(encoding="utf-8"))
+                                              for path in self.worker_files())
+        self.write()
+
+    def write(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self.result, indent=2), encoding="utf-8")
+
+    def pytest_sessionfinish(self, session: pytest.Session) -> None:
+        client.remove_listener(self.record)
+        # Under xdist the controller runs no tests; its empty view would drop every worker's snapshots.
+        controller = session.config.pluginmanager.hasplugin("dsession")
+        if self.mode == "update":
+            if not controller:
+                self.update()
+            return
+        if controller:
+            self.merge()
+        else:
+            self.check()
+        if (self.result["changed"] or self.result["missing"]) and session.exitstatus == pytest.ExitCode.OK:
+            session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        result = self.result
+        if not result:
+            return
+        terminalreporter.section("snapshots")
+        if self.mode == "update":
+            terminalreporter.write_line(
+                f"{result['snapshots']} snapshots ({result['distinct']} distinct) in {self.store.directory}: "
+                f"{result['written']} objects written, {result['pruned']} unreferenced removed")
+            return
+        terminalreporter.write_line(
+            f"{result['matched']} matched, {len(result['changed'])} changed, {len(result['new'])} without baseline, "
+            f"{len(result['missing'])} no longer requested  ({self.store.directory})")
+        for key, lines in result["changed"].items():
+            terminalreporter.write_line(f"  changed  {key}", red=True)
+            for line in lines:
+                terminalreporter.write_line(f"             {line}")
+        for key in result["missing"]:
+            terminalreporter.write_line(f"  missing  {key}", red=True)
+        if result["new"] and self.config.option.verbose > 0:
+            for key in result["new"]:
+                terminalreporter.write_line(f"  new      {key}", yellow=True)
+        elif result["new"]:
+            terminalreporter.write_line(f"  {len(result['new'])} without baseline (--snapshot update to store them)",
+                                        yellow=True)
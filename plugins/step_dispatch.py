@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import importlib
+from typing import Any, Iterable
+
+import pytest
+from _pytest.fixtures import FixtureDef, FixtureManager
+from pytest_bdd.compat import getfixturedefs
+from pytest_bdd.parser import Step
+
+from api.common.stepindex import StepIndex
+
+# `pytest_bdd.scenario` the attribute is the decorator; the module is where steps are resolved.
+bdd_scenario = importlib.import_module("pytest_bdd.scenario")
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("step-dispatch")
+    group.addoption("--no-step-index", action="store_true", default=False,
+                    help="Let pytest-bdd try every step definition's parser for each step instead of the prebuilt index")
+    group.addoption("--check-steps", action="store_true", default=False,
+                    help="After collection, fail if a scenario step has no definition or is matched by several "
+                         "equally specific definitions (one silently shadowing the others)")
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    dispatch = StepDispatch(index=not config.getoption("--no-step-index"), check=config.getoption("--check-steps"))
+    config.pluginmanager.register(dispatch, "step-dispatch")
+
+
+def _describe(context) -> str:
+    func = context.step_func
+    return f"{func.__module__}.{func.__name__} ({context.parser.name!r})"
+
+
+class StepDispatch:
+    def __init__(self, index: bool, check: bool) -> None:
+        self.index = index
+        self.check = check
+        self.issues: list[str] = []
+        self._original = bdd_scenario.find_fixturedefs_for_step
+        self._cache: tuple[int, int, StepIndex] | None = None
+        if index:
+            bdd_scenario.find_fixturedefs_for_step = self.find_fixturedefs_for_step
+
+    def _step_index(self, fixturemanager: FixtureManager) -> StepIndex:
+        """Built once per fixture manager; rebuilt only if fixtures were registered since."""
+        key = (id(fixturemanager), len(fixturemanager._arg2fixturedefs))
+        if self._cache is None or self._cache[:2] != key:
+            entries = []
+            for fixturename, fixturedefs in list(fixturemanager._arg2fixturedefs.items()):
+                for fixturedef in fixturedefs:
+                    context = getattr(fixturedef.func, "_pytest_bdd_step_context", None)
+                    if context is not None:
+                        entries.append((context.type, context.parser, (fixturename, fixturedef)))
+            self._cache = (*key, StepIndex(entries))
+        return self._cache[2]
+
+    def find_fixturedefs_for_step(self, step: Step, fixturemanager: FixtureManager, node) -> Iterable[FixtureDef[Any]]:
+        """Same results and order as pytest-bdd's linear scan, trying only the indexed candidates."""
+        for fixturename, fixturedef in self._step_index(fixturemanager).matches(step.type, step.name):
+            if fixturedef in (getfixturedefs(fixturemanager, fixturename, node) or []):
+                yield fixturedef
+
+    def pytest_unconfigure(self, config: pytest.Config) -> None:
+        bdd_scenario.find_fixturedefs_for_step = self._original
+
+    def _check_item(self, item: pytest.Item, seen: set) -> None:
+        templated = getattr(getattr(item, "obj", None), "__scenario__", None)
+        if templated is None:
+            return
+        callspec = getattr(item, "callspec", None)
+        scenario = templated.render(callspec.params.get("_pytest_bdd_example", {}) if callspec else {})
+        fixturemanager = item.session._fixturemanager
+        for step in scenario.steps:
+            key = (item.path, step.type, step.name)
+            if key in seen:
+                continue
+            seen.add(key)
+            found = list(bdd_scenario.find_fixturedefs_for_step(step, fixturemanager, item))
+            where = f"{item.path.name}: {step.keyword} {step.name}"
+            if not found:
+                self.issues.append(f"{where}\n      no step definition matches")
+                continue
+            # pytest-bdd uses the most specific (deepest baseid) definition; ties fall back to fixture order.
+            depth = max(len(fixturedef.baseid) for fixturedef in found)
+            tied = [fixturedef for fixturedef in found if len(fixturedef.baseid) == depth]
+            if len(tied) > 1:
+                names = ", ".join(_describe(fixturedef.func._pytest_bdd_step_context) for fixturedef in tied)
+                self.issues.append(f"{where}\n      ambiguous, matched by: {names}")
+
+    def pytest_collection_finish(self, session: pytest.Session) -> None:
+        if not self.check:
+            return
+        seen: set = set()
+        for item in session.items:
+            self._check_item(item, seen)
+
+    def pytest_sessionfinish(self, session: pytest.Session) -> None:
+        if self.issues and session.exitstatus == pytest.ExitCode.OK:
+            session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        if not self.check:
+            return
+        terminalreporter.section("step definitions")
+        if not self.issues:
+            terminalreporter.write_line("every scenario step resolves to exactly one definition")
+        for issue in self.issues:
+            terminalreporter.write_line(f"  {issue}", red=True)
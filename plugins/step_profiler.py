@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import pytest
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("step-profiling")
+    group.addoption("--profile-steps", action="store_true", default=False,
+                    help="Profile every given/when/then step and write per-step stats into --reports-dir")
+    group.addoption("--profile-flamegraph", action="store_true", default=False,
+                    help="With --profile-steps, also sample stacks and write collapsed stacks for flame graphs")
+    group.addoption("--profile-interval", action="store", type=float, default=0.005,
+                    help="Stack sampling interval in seconds for --profile-flamegraph (default 0.005)")
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    if not config.getoption("--profile-steps"):
+        return
+    interval = config.getoption("--profile-interval") if config.getoption("--profile-flamegraph") else None
+    profiler = StepProfiler(config.rootpath / Path(config.getoption("--reports-dir")), sample_interval=interval)
+    config.pluginmanager.register(profiler, "step-profiler")
+
+
+def _step_key(step, step_func) -> str:
+    return f"{step.type} {step_func.__module__}.{step_func.__name__}"
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", text).strip("_")
+
+
+class _StackSampler(threading.Thread):
+    """Samples the test thread's stack while a step is running."""
+
+    def __init__(self, interval: float) -> None:
+        super().__init__(name="step-stack-sampler", daemon=True)
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self._target: int | None = None
+        self._label: str | None = None
+        self._done = threading.Event()
+
+    def track(self, thread_id: int | None, label: str | None) -> None:
+        self._target, self._label = thread_id, label
+
+    def run(self) -> None:
+        while not self._done.wait(self.interval):
+            target, label = self._target, self._label
+            if target is None:
+                continue
+            frame = sys._current_frames().get(target)
+            frames = []
+            # Stop at pytest-bdd's step call so only the step's own frames are kept.
+            while frame is not None and frame.f_code.co_name != "call_fixture_func":
+                code = frame.f_code
+                frames.append(f"{Path(code.co_filename).stem}:{code.co_name}")
+                frame = frame.f_back
+            frames.append(label)
+            self.stacks[";".join(reversed(frames))] += 1
+
+    def stop(self) -> None:
+        self._done.set()
+        self.join()
+
+
+class StepProfiler:
+    def __init__(self, out_dir: Path, sample_interval: float | None = None) -> None:
+        self.out_dir = out_dir
+        self.profiles: dict[str, cProfile.Profile] = {}
+        self.samples: dict[str, list[tuple[float, float]]] = defaultdict(list)
+        self.examples: dict[str, str] = {}
+        self._active: tuple[str, float, float] | None = None
+        self.sampler = _StackSampler(sample_interval) if sample_interval else None
+        if self.sampler:
+            self.sampler.start()
+
+    def _start(self, step, step_func) -> None:
+        key = _step_key(step, step_func)
+        self.examples.setdefault(key, f"{step.keyword} {step.name}")
+        profile = self.profiles.setdefault(key, cProfile.Profile())
+        if self.sampler:
+            self.sampler.track(threading.get_ident(), key.replace(" ", ":"))
+        self._active = (key, time.perf_counter(), time.thread_time())
+        profile.enable()
+
+    def _stop(self) -> None:
+        if self._active is None:
+            return
+        key, wall_start, cpu_start = self._active
+        self.profiles[key].disable()
+        self.samples[key].append((time.perf_counter() - wall_start, time.thread_time() - cpu_start))
+        self._active = None
+        if self.sampler:
+            self.sampler.track(None, None)
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_bdd_before_step_call(self, request, feature, scenario, step, step_func, step_func_args):
+        self._start(step, step_func)
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_bdd_after_step(self, request, feature, scenario, step, step_func, step_func_args):
+        self._stop()
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_bdd_step_error(self, request, feature, scenario, step, step_func, step_func_args, exception):
+        self._stop()
+
+    def rows(self) -> list[tuple[str, int, float, float, float]]:
+        rows = []
+        for key, samples in self.samples.items():
+            wall = sum(s[0] for s in samples)
+            cpu = sum(s[1] for s in samples)
+            rows.append((key, len(samples), wall, cpu, cpu / wall if wall else 0.0))
+        return sorted(rows, key=lambda r: r[3], reverse=True)
+
+    def write(self) -> None:
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        prof_dir = self.out_dir / "step_profiles"
+        prof_dir.mkdir(exist_ok=True)
+
+        out = io.StringIO()
+        out.write(f"{'step':<80} {'calls':>6} {'wall s':>9} {'cpu s':>9} {'cpu/wall':>8}\n")
+        for key, calls, wall, cpu, ratio in self.rows():
+            out.write(f"{key:<80} {calls:>6} {wall:>9.4f} {cpu:>9.4f} {ratio:>8.2f}\n")
+        for key, *_ in self.rows():
+            profile = self.profiles[key]
+            profile.dump_stats(prof_dir / f"{_slug(key)}.prof")
+            out.write(f"\n=== {key}\n    e.g. {self.examples[key]}\n")
+            pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(15)
+        (self.out_dir / "step_profile.txt").write_text(out.getvalue(), encoding="utf-8")
+
+        if self.sampler:
+            lines = (f"{stack} {count}" for stack, count in sorted(self.sampler.stacks.items()))
+            (self.out_dir / "step_profile.collapsed").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    def pytest_sessionfinish(self, session: pytest.Session) -> None:
+        if self.sampler:
+            self.sampler.stop()
+        self.write()
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        terminalreporter.section("step profile (top 10 by CPU)")
+        for key, calls, wall, cpu, ratio in self.rows()[:10]:
+            terminalreporter.write_line(f"{cpu:8.4f}s cpu {wall:8.4f}s wall {ratio:5.2f}  x{calls:<4} {key}")
+        terminalreporter.write_line(f"stats written to {self.out_dir / 'step_profile.txt'}")
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import json
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pytest
+
+from api.common import client
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+STATUS_ERROR = 2
+
+_STOP = object()
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("tracing")
+    group.addoption("--trace-spans", action="store", default=None,
+                    help="Export feature/scenario/step/HTTP spans as OTLP JSON lines to this file; under xdist "
+                         "each worker writes <name>.<worker><suffix>")
+    group.addoption("--trace-batch-size", action="store", type=int, default=256,
+                    help="Maximum spans per exported OTLP batch (default 256)")
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    path = config.getoption("--trace-spans")
+    worker = getattr(config, "workerinput", {}).get("workerid")
+    # The xdist controller runs no scenarios; it must not truncate a file the workers write.
+    if not path or (getattr(config.option, "dist", "no") != "no" and not worker):
+        return
+    path = Path(path)
+    resource = {"service.name": "mcn-qa-pytest", "deployment.environment": config.getoption("--env")}
+    if worker:
+        path = path.with_name(f"{path.stem}.{worker}{path.suffix}")
+        resource["service.instance.id"] = worker
+    exporter = BatchSpanExporter(path, config.getoption("--trace-batch-size"), resource=resource)
+    config.pluginmanager.register(ScenarioTracer(exporter), "scenario-tracer")
+
+
+def _new_id(n_bytes: int) -> str:
+    return os.urandom(n_bytes).hex()
+
+
+def _attr(key: str, value: object) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    parent_id: str | None = None
+    kind: int = SPAN_KIND_INTERNAL
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int | None = None
+    span_id: str = field(default_factory=lambda: _new_id(8))
+    attributes: dict = field(default_factory=dict)
+    error: str | None = None
+
+    def end(self, end_ns: int | None = None) -> None:
+        self.end_ns = end_ns or time.time_ns()
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [_attr(k, v) for k, v in self.attributes.items() if v is not None],
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.error:
+            span["status"] = {"code": STATUS_ERROR, "message": self.error}
+        return span
+
+
+class BatchSpanExporter:
+    """Buffers finished spans on a queue and writes them from a background thread."""
+
+    def __init__(self, path: Path, batch_size: int, resource: dict, flush_interval: float = 1.0,
+                 max_queue: int = 100_000) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.resource = [_attr(k, v) for k, v in resource.items()]
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text("", encoding="utf-8")
+        self._worker = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._worker.start()
+
+    def export(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _write(self, batch: list[Span]) -> None:
+        payload = {"resourceSpans": [{
+            "resource": {"attributes": self.resource},
+            "scopeSpans": [{"scope": {"name": "mcn-qa-pytest"}, "spans": [s.to_otlp() for s in batch]}],
+        }]}
+        with self.path.open("a", encoding="utf-8") as fh:
+            fh.write(json.dumps(payload, separators=(",", ":")) + "\n")
+
+    def _run(self) -> None:
+        batch: list[Span] = []
+        while True:
+            try:
+                span = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                span = None
+            if span is _STOP:
+                if batch:
+                    self._write(batch)
+                return
+            if span is not None:
+                batch.append(span)
+            # Flush on a full batch, or whenever the queue goes idle.
+            if batch and (span is None or len(batch) >= self.batch_size):
+                self._write(batch)
+                batch = []
+
+    def shutdown(self) -> None:
+        self._queue.put(_STOP)
+        self._worker.join()
+
+
+class ScenarioTracer:
+    """One span per feature file, however its scenarios are interleaved with other features' (the scheduler
+    may reorder them); each feature span ends with its last scenario and is exported at session end."""
+
+    def __init__(self, exporter: BatchSpanExporter) -> None:
+        self.exporter = exporter
+        self.features: dict[str, Span] = {}
+        self.feature_span: Span | None = None
+        self.scenario_span: Span | None = None
+        self.step_span: Span | None = None
+        client.add_listener(self.record_http)
+
+    def _finish(self, span: Span | None, end_ns: int | None = None) -> None:
+        if span is not None:
+            span.end(end_ns)
+            self.exporter.export(span)
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_bdd_before_scenario(self, request, feature, scenario):
+        if feature.filename not in self.features:
+            self.features[feature.filename] = Span(f"Feature: {feature.name}", trace_id=_new_id(16), attributes={
+                "bdd.feature.name": feature.name, "bdd.feature.file": feature.rel_filename})
+        self.feature_span = self.features[feature.filename]
+        self.scenario_span = Span(f"Scenario: {scenario.name}", trace_id=self.feature_span.trace_id,
+                                  parent_id=self.feature_span.span_id, attributes={
+                                      "bdd.scenario.name": scenario.name, "test.nodeid": request.node.nodeid,
+                                      "bdd.scenario.tags": ",".join(sorted(scenario.tags))})
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_bdd_after_scenario(self, request, feature, scenario):
+        self._finish(self.step_span)
+        self._finish(self.scenario_span)
+        if self.scenario_span is not None:
+            self.feature_span.end(self.scenario_span.end_ns)
+        self.step_span = self.scenario_span = None
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_bdd_before_step_call(self, request, feature, scenario, step, step_func, step_func_args):
+        parent = self.scenario_span
+        self.step_span = Span(f"{step.keyword} {step.name}", trace_id=parent.trace_id, parent_id=parent.span_id,
+                              attributes={"bdd.step.type": step.type, "bdd.step.text": step.name,
+                                          "code.function": f"{step_func.__module__}.{step_func.__name__}"})
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_bdd_after_step(self, request, feature, scenario, step, step_func, step_func_args):
+        self._finish(self.step_span)
+        self.step_span = None
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_bdd_step_error(self, request, feature, scenario, step, step_func, step_func_args, exception):
+        for span in (self.step_span, self.scenario_span):
+            if span is not None:
+                span.error = f"{type(exception).__name__}: {exception}"
+        self._finish(self.step_span)
+        self.step_span = None
+
+    def record_http(self, event: client.RequestEvent) -> None:
+        parent = self.step_span or self.scenario_span or self.feature_span
+        if parent is None:
+            return
+        start_ns = int(event.started * 1e9)
+        span = Span(f"{event.method} {event.endpoint}", trace_id=parent.trace_id, parent_id=parent.span_id,
+                    kind=SPAN_KIND_CLIENT, start_ns=start_ns, error=event.error, attributes={
+                        "http.request.method": event.method,
+                        "http.route": event.endpoint,
+                        "url.full": event.url,
+                        "http.request.params": json.dumps(event.params, sort_keys=True) if event.params else None,
+                        "http.response.status_code": event.status,
+                        "http.request.body.size": event.request_bytes,
+                        "http.response.body.size": event.wire_bytes,
+                        "http.response.body.decoded_size": event.response_bytes,
+                        "http.response.header.content-encoding": event.content_encoding,
+                        "http.retry_count": event.retries or None,
+                    })
+        self._finish(span, start_ns + int(event.elapsed * 1e9))
+
+    def pytest_sessionfinish(self, session: pytest.Session) -> None:
+        client.remove_listener(self.record_http)
+        for span in self.features.values():
+            self._finish(span, span.end_ns)
+        self.features.clear()
+        self.feature_span = None
+        self.exporter.shutdown()
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        dropped = f" ({self.exporter.dropped} spans dropped)" if self.exporter.dropped else ""
+        terminalreporter.write_line(f"trace spans written to {self.exporter.path}{dropped}")
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from api.common.stats import format_summary
+
+REPORT_FILE = "tunnel_benchmark.json"
+# user_properties key the benchmark steps record each run under (record_property).
+RUN = "tunnel_benchmark"
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("tunnel-benchmark")
+    group.addoption("--benchmark", action="store_true", default=False,
+                    help="Run the @benchmark scenarios: create 4, 16 and 64 tunnels against the configured backend "
+                         "and report the degradation at session end (skipped otherwise)")
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    config.pluginmanager.register(BenchmarkReport(config), "tunnel-benchmark")
+
+
+def degradation(runs: list[dict]) -> list[dict]:
+    """The runs by tunnel count, with throughput and p95 time-to-connected relative to the smallest run."""
+    runs = sorted(runs, key=lambda run: run["tunnels"])
+    baseline = runs[0]
+    for run in runs:
+        run["throughput_ratio"] = (run["throughput_per_s"] / baseline["throughput_per_s"]
+                                   if baseline["throughput_per_s"] else None)
+        run["p95_convergence_ratio"] = (run["time_to_connected"]["p95"] / baseline["time_to_connected"]["p95"]
+                                        if baseline["time_to_connected"]["p95"] else None)
+    return runs
+
+
+class BenchmarkReport:
+    """Collects the runs the benchmark scenarios record as user properties and reports the degradation once
+    all of them are in. Reports reach the xdist controller too, so there it covers every worker's runs."""
+
+    def __init__(self, config: pytest.Config) -> None:
+        self.config = config
+        self.runs: list[dict] = []
+        self.path = config.rootpath / Path(config.getoption("--reports-dir")) / REPORT_FILE
+
+    def pytest_collection_modifyitems(self, config: pytest.Config, items: list[pytest.Item]) -> None:
+        if config.getoption("--benchmark"):
+            return
+        skip = pytest.mark.skip(reason="the tunnel benchmark is opt-in (--benchmark to run)")
+        for item in items:
+            if item.get_closest_marker("benchmark") is not None:
+                item.add_marker(skip)
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        if report.when == "call":
+            self.runs += [value for key, value in report.user_properties if key == RUN]
+
+    def pytest_sessionfinish(self, session: pytest.Session) -> None:
+        # Workers leave the report to the controller, which sees all their runs.
+        if not self.runs or getattr(self.config, "workerinput", None) is not None:
+            return
+        self.runs = degradation(self.runs)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"baseline_tunnels": self.runs[0]["tunnels"], "runs": self.runs}, indent=2),
+                       encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        if not self.runs or "throughput_ratio" not in self.runs[0]:
+            return
+        terminalreporter.section("tunnel benchmark")
+        for run in self.runs:
+            terminalreporter.write_line(
+                f"K={run['tunnels']:>4} concurrency={run['concurrency']:>3}: "
+                f"{run['throughput_per_s']:8.2f} tunnels/s (x{run['throughput_ratio'] or 0:.2f}), "
+                f"time-to-connected {format_summary(run['time_to_connected'])} "
+                f"(p95 x{run['p95_convergence_ratio'] or 0:.2f})")
+        terminalreporter.write_line(f"details: {self.path}")
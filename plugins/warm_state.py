@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from dotenv import dotenv_values
+
+from api.common import warmstate
+from plugins.scheduler import REUSED, scenario_resources
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("warm-state")
+    group.addoption("--fresh-state", action="store_true", default=False,
+                    help="Provision everything again instead of reusing resources created by earlier runs")
+    group.addoption("--warm-state-file", action="store", default="reports/warm_state.json",
+                    help="File holding resource IDs created by @setup scenarios (relative to the rootdir)")
+    group.addoption("--warm-state-ttl", action="store", type=float, default=24.0,
+                    help="Hours after which a cached resource is provisioned again even if it still exists; 0 = never")
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    env = config.getoption("--env")
+    env_file = config.rootpath / "env" / f"{env}.env"
+    values = dotenv_values(env_file) if env_file.is_file() else {}
+    warmstate.state = warmstate.WarmState(
+        config.rootpath / Path(config.getoption("--warm-state-file")),
+        key=f"{env}:{warmstate.config_hash(values)}",
+        ttl=config.getoption("--warm-state-ttl") * 3600,
+        fresh=config.getoption("--fresh-state"),
+    )
+    warmstate.state.load()
+    config.pluginmanager.register(WarmStateReuse(), "warm-state")
+
+
+class WarmStateReuse:
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_finish(self, session: pytest.Session) -> None:
+        if session.config.option.collectonly:
+            return
+        provided = set()
+        for item in session.items:
+            provided |= scenario_resources(item, "provides")
+        warmstate.state.validate(provided)
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_setup(self, item: pytest.Item) -> None:
+        if item.get_closest_marker("setup") is None:
+            return
+        resources = scenario_resources(item, "provides")
+        if resources and all(map(warmstate.state.is_warm, resources)):
+            reused = ", ".join(f"{r} id={warmstate.state.resource_id(r)}" for r in sorted(resources))
+            item.user_properties.append((REUSED, reused))
+            pytest.skip(f"warm state: reusing {reused} (--fresh-state to provision again)")
+
+    def pytest_sessionfinish(self, session: pytest.Session) -> None:
+        warmstate.state.save()
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        state = warmstate.state
+        if not state.warm and not state.stale:
+            return
+        terminalreporter.section("warm state")
+        for resource, entry in sorted(state.warm.items()):
+            terminalreporter.write_line(f"  reused       {resource:<24} id={entry['id']}")
+        for resource, reason in sorted(state.stale.items()):
+            terminalreporter.write_line(f"  provisioned  {resource:<24} ({reason})")
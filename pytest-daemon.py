@@ -0,0 +1,228 @@
+"""Keep a warm pytest process around and fork test runs from it.
+
+    python pytest-daemon.py serve [-- <pytest args used to warm up, e.g. --env dev>]
+    python pytest-daemon.py run -- <pytest args>
+    python pytest-daemon.py stop
+
+`serve` imports requests/pytest_bdd/dotenv, conftest, the plugins and every step module once by running
+a collect-only session, then listens on a unix socket. The warm-up session runs without the plugins that
+write files (logs, latency history, warm state, feature cache, reports); their modules are only imported. Each `run` forks that process, so the child starts
+with everything imported and the features parsed; output is streamed back and the exit code returned.
+Before forking, changed .feature and .py files under api/ and plugins/ (and conftest.py) are dropped from
+the module and feature caches: an edited step module or feature only re-imports that step module, any
+other edited project module re-imports the project modules, never the third-party ones.
+
+The daemon serves one run at a time: a `run` sent while another is still going is turned away with exit
+code 2 instead of queueing behind it.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import socket
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+SOCKET = ROOT / "reports" / ".pytest-daemon.sock"
+WATCHED = ("api", "plugins")
+EXIT_MARKER = b"\0pytest-daemon-exit:"
+BUSY = 2
+# Plugins whose configure/sessionfinish hooks rotate logs or write state and reports; a warm-up must not
+# touch the files a real run reads.
+STATEFUL_PLUGINS = (
+    "plugins.logging_pipeline",
+    "plugins.step_profiler",
+    "plugins.memory_accounting",
+    "plugins.http_client",
+    "plugins.warm_state",
+    "plugins.feature_cache",
+    "plugins.collection_profile",
+    "plugins.multi_env",
+    "plugins.snapshots",
+    "plugins.fuzz",
+    "plugins.openmetrics",
+    "plugins.tracing",
+)
+
+
+def _sources() -> dict[Path, float]:
+    paths = [ROOT / "conftest.py"]
+    for top in WATCHED:
+        paths += (ROOT / top).rglob("*.py")
+        paths += (ROOT / top).rglob("*.feature")
+    return {path: path.stat().st_mtime_ns for path in paths if path.is_file()}
+
+
+def _project_modules() -> dict[str, Path]:
+    modules = {}
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, "__file__", None)
+        if not path:
+            continue
+        path = Path(path).resolve()
+        if path.is_relative_to(ROOT) and not path.is_relative_to(ROOT / "venv"):
+            modules[name] = path
+    return modules
+
+
+class Daemon:
+    def __init__(self, warm_args: list[str]) -> None:
+        self.warm_args = warm_args
+        self.sources: dict[Path, float] = {}
+        self.child: int | None = None
+
+    def warm(self) -> float:
+        import pytest
+
+        start = time.perf_counter()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+            blocked = [arg for name in STATEFUL_PLUGINS for arg in ("-p", f"no:{name}")]
+            pytest.main(["--collect-only", "-q", "-p", "no:cacheprovider", *blocked, *self.warm_args])
+        for name in STATEFUL_PLUGINS:
+            importlib.import_module(name)
+        self.sources = _sources()
+        return time.perf_counter() - start
+
+    def invalidate(self) -> list[Path]:
+        """Forget modules and parsed features whose files changed since the last warm-up."""
+        from pytest_bdd import feature as bdd_feature
+
+        current = _sources()
+        changed = [path for path, mtime in current.items() if self.sources.get(path) != mtime]
+        changed += [path for path in self.sources if path not in current]
+        if not changed:
+            return []
+        modules = _project_modules()
+        features = [path for path in changed if path.suffix == ".feature"]
+        code = {path for path in changed if path.suffix == ".py"}
+        for path in features:
+            bdd_feature.features.pop(str(path), None)
+        if any(not path.name.startswith("test_") for path in code):
+            # A helper, plugin or conftest may be imported anywhere in the project; reload all of it.
+            drop = set(modules)
+        else:
+            drop = {name for name, path in modules.items() if path in code}
+            # Step modules turn their features into test functions at import time.
+            for name, path in modules.items():
+                if path.name.startswith("test_") and path.is_file():
+                    source = path.read_text(encoding="utf-8", errors="replace")
+                    if any(feature.name in source for feature in features):
+                        drop.add(name)
+        for name in drop:
+            sys.modules.pop(name, None)
+        return changed
+
+    def busy(self) -> bool:
+        """Whether the last forked run is still going; reaps it once it has finished."""
+        if self.child is None:
+            return False
+        if os.waitpid(self.child, os.WNOHANG)[0] == 0:
+            return True
+        self.child = None
+        return False
+
+    def _run(self, conn: socket.socket, request: dict) -> None:
+        pid = os.fork()
+        if pid:
+            # The child owns the connection now and sends the exit code; serve() reaps it later.
+            self.child = pid
+            return
+        code = 1
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(conn.fileno(), 1)
+            os.dup2(conn.fileno(), 2)
+            os.chdir(request.get("cwd") or ROOT)
+            import pytest
+
+            code = int(pytest.main(request.get("args", [])))
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            with contextlib.suppress(OSError):
+                conn.sendall(EXIT_MARKER + str(code).encode())
+            os._exit(0)
+
+    def serve(self) -> None:
+        took = self.warm()
+        SOCKET.parent.mkdir(parents=True, exist_ok=True)
+        with contextlib.suppress(FileNotFoundError):
+            SOCKET.unlink()
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(str(SOCKET))
+        listener.listen()
+        print(f"pytest daemon warm in {took:.2f}s, listening on {SOCKET}", flush=True)
+        try:
+            while True:
+                conn, _ = listener.accept()
+                with conn:
+                    request = json.loads(conn.makefile("rb").readline() or b"{}")
+                    if request.get("cmd") == "stop":
+                        if self.child is not None:
+                            os.waitpid(self.child, 0)
+                        conn.sendall(EXIT_MARKER + b"0")
+                        break
+                    if self.busy():
+                        conn.sendall(b"pytest daemon is busy with another run; try again when it finishes\n"
+                                     + EXIT_MARKER + str(BUSY).encode())
+                        continue
+                    changed = self.invalidate()
+                    if changed:
+                        names = ", ".join(str(path.relative_to(ROOT)) for path in changed[:5])
+                        print(f"changed: {names}{' ...' if len(changed) > 5 else ''}; re-warmed in {self.warm():.2f}s",
+                              flush=True)
+                    self._run(conn, request)
+        finally:
+            listener.close()
+            with contextlib.suppress(FileNotFoundError):
+                SOCKET.unlink()
+
+
+def send(request: dict) -> int:
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(str(SOCKET))
+    except OSError as e:
+        print(f"pytest daemon is not running ({e}); start it with: python pytest-daemon.py serve", file=sys.stderr)
+        return 2
+    with conn, contextlib.suppress(BrokenPipeError):
+        conn.sendall(json.dumps(request).encode() + b"\n")
+        tail = b""
+        while chunk := conn.recv(65536):
+            data = tail + chunk
+            # Hold back enough bytes that a marker split across two reads is still recognised.
+            keep = len(EXIT_MARKER) + 4
+            sys.stdout.buffer.write(data[:-keep])
+            sys.stdout.buffer.flush()
+            tail = data[-keep:]
+        output, marker, code = tail.partition(EXIT_MARKER)
+        sys.stdout.buffer.write(output)
+        sys.stdout.buffer.flush()
+        return int(code) if marker and code.isdigit() else 1
+    return 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=("serve", "run", "stop"))
+    parser.add_argument("pytest_args", nargs=argparse.REMAINDER, help="Arguments passed to pytest, after --")
+    args = parser.parse_args()
+    pytest_args = args.pytest_args[1:] if args.pytest_args[:1] == ["--"] else args.pytest_args
+    if args.command == "serve":
+        sys.path.insert(0, str(ROOT))
+        os.chdir(ROOT)
+        Daemon(pytest_args).serve()
+        return 0
+    if args.command == "stop":
+        return send({"cmd": "stop"})
+    return send({"args": pytest_args, "cwd": os.getcwd()})
+
+
+if __name__ == "__main__":
+    sys.exit(main())
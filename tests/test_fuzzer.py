@@ -0,0 +1,18 @@
+import socket
+
+from api.common import client, fuzz
+
+
+def _closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_fuzzing_a_failing_host_leaves_its_breaker_closed():
+    host = f"127.0.0.1:{_closed_port()}"
+    target = fuzz.Target("closed", f"http://{host}/metrics", {"id": "1"}, {}, {"id": "id"})
+    result = fuzz.Fuzzer(cases=10, parallelism=2, shrink_requests=5).run(target)
+    assert set(result.statuses) == {"ConnectionError"}
+    assert not client.breaker(host).open and client.breaker(host).failures == 0
+    assert all(finding.slowest > 0 for finding in result.findings)
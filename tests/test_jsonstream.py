@@ -0,0 +1,47 @@
+import json
+import tracemalloc
+
+import pytest
+
+from api.common import jsonstream
+
+DOCUMENT = [{"id": 1, "value": 0.5}, 123, -7, 1e3, 2.5e-3, "text", True, False, None, [4, 5]]
+
+
+def chunked(data: bytes, size: int) -> list[bytes]:
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", range(1, 12))
+def test_items_split_at_every_chunk_boundary(size):
+    data = json.dumps(DOCUMENT).encode()
+    assert list(jsonstream.iter_items(chunked(data, size))) == list(jsonstream.flatten(DOCUMENT))
+
+
+@pytest.mark.parametrize("number", ["0.5", "1e3", "-12", "1.25E+10"])
+def test_number_cut_inside_its_exponent_or_fraction(number):
+    data = f"[{number}, 1]".encode()
+    for cut in range(1, len(data)):
+        assert list(jsonstream.iter_items([data[:cut], data[cut:]])) == [json.loads(number), 1]
+
+
+def test_multibyte_character_split_across_chunks():
+    data = json.dumps(["züri 中"], ensure_ascii=False).encode()
+    assert list(jsonstream.iter_items(chunked(data, 1))) == ["züri 中"]
+
+
+def test_truncated_stream_raises():
+    with pytest.raises(ValueError):
+        list(jsonstream.iter_items([b'[1, 2']))
+
+
+def test_consume_keeps_an_outer_tracers_peak():
+    tracemalloc.start()
+    try:
+        held = bytearray(1024 * 1024)
+        del held
+        peak_before = tracemalloc.get_traced_memory()[1]
+        jsonstream.consume("streamed", lambda: jsonstream.iter_items([b"[1, 2]"]), lambda item: None, 0.0)
+        assert tracemalloc.get_traced_memory()[1] >= peak_before
+    finally:
+        tracemalloc.stop()
@@ -0,0 +1,27 @@
+import json
+
+from api.common.latency import LatencyHistory
+
+
+def test_save_merges_samples_from_concurrent_writers(tmp_path):
+    path = tmp_path / "latency_history.json"
+    path.write_text(json.dumps({"GET /a": [0.1]}), encoding="utf-8")
+    first, second = LatencyHistory(path), LatencyHistory(path)
+    first.load()
+    second.load()
+    first.record("GET /a", 0.2)
+    second.record("GET /a", 0.3)
+    second.record("GET /b", 0.4)
+    first.save()
+    second.save()
+    assert json.loads(path.read_text(encoding="utf-8")) == {"GET /a": [0.1, 0.2, 0.3], "GET /b": [0.4]}
+
+
+def test_save_keeps_the_most_recent_samples(tmp_path):
+    path = tmp_path / "latency_history.json"
+    history = LatencyHistory(path, max_samples=3)
+    for seconds in (0.1, 0.2, 0.3, 0.4):
+        history.record("GET /a", seconds)
+    history.save()
+    history.save()
+    assert json.loads(path.read_text(encoding="utf-8")) == {"GET /a": [0.2, 0.3, 0.4]}
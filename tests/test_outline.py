@@ -0,0 +1,38 @@
+import itertools
+
+from api.common.outline import pairwise, stratified
+
+DIMENSIONS = {"source": ["vr-1", "vr-2", "vr-3"], "peer": ["vr-1", "vr-2", "vr-3"],
+              "metric": ["status", "latency"], "window": ["1h", "1d"]}
+
+
+def _pairs(rows, dimensions):
+    return {(a, row[a], b, row[b]) for row in rows for a, b in itertools.combinations(dimensions, 2)}
+
+
+def test_pairwise_covers_every_pair_in_fewer_rows_than_the_product():
+    rows = list(pairwise(DIMENSIONS))
+    every_pair = {(a, x, b, y) for a, b in itertools.combinations(DIMENSIONS, 2)
+                  for x in DIMENSIONS[a] for y in DIMENSIONS[b]}
+    assert _pairs(rows, DIMENSIONS) == every_pair
+    assert len(rows) < 3 * 3 * 2 * 2
+
+
+def test_pairwise_respects_the_constraint_and_still_covers_every_allowed_pair():
+    def distinct(row):
+        return "source" not in row or "peer" not in row or row["source"] != row["peer"]
+
+    rows = list(pairwise(DIMENSIONS, distinct))
+    assert rows and all(row["source"] != row["peer"] for row in rows)
+    allowed = {(a, x, b, y) for a, b in itertools.combinations(DIMENSIONS, 2)
+               for x in DIMENSIONS[a] for y in DIMENSIONS[b] if distinct({a: x, b: y})}
+    assert _pairs(rows, DIMENSIONS) == allowed
+
+
+def test_stratified_is_deterministic_for_a_seed():
+    def draw(seed):
+        return list(stratified(DIMENSIONS, "metric", 3, seed))
+
+    assert draw(7) == draw(7)
+    assert [row["metric"] for row in draw(7)] == ["status"] * 3 + ["latency"] * 3
+    assert any(draw(seed) != draw(7) for seed in range(8))
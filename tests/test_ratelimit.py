@@ -0,0 +1,12 @@
+from api.common.ratelimit import Limit, RateLimiter
+
+
+def test_a_refusing_tenant_bucket_returns_the_host_token(tmp_path):
+    limiter = RateLimiter(tmp_path, {"*": Limit(0.001, 2)}, {"*": Limit(0.001, 1)})
+    assert limiter.try_acquire("api.qa", "tenant-a")
+    assert not limiter.try_acquire("api.qa", "tenant-a")
+    # The host bucket still has its second token for another tenant.
+    assert limiter.try_acquire("api.qa", "tenant-b")
+    assert not limiter.try_acquire("api.qa", "tenant-c")
+    assert limiter.buckets["host", "api.qa"].acquired == 2
+    limiter.close()
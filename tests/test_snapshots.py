@@ -0,0 +1,30 @@
+import json
+
+from api.common.snapshots import SnapshotStore, merge_results
+
+
+def test_save_replaces_only_the_tests_it_was_given(tmp_path):
+    first, second = SnapshotStore(tmp_path).load(), SnapshotStore(tmp_path).load()
+    first.save({"a.py::test_one": {"GET /x (fuzz) #1": "aa01"}}, {"aa01": {"status": 200}})
+    second.save({"a.py::test_two": {"GET /y #1": "bb02"}}, {"bb02": {"status": 404}})
+    assert SnapshotStore(tmp_path).load().index == {"a.py::test_one": {"GET /x (fuzz) #1": "aa01"},
+                                                    "a.py::test_two": {"GET /y #1": "bb02"}}
+
+
+def test_a_test_that_sent_nothing_loses_its_snapshots(tmp_path):
+    store = SnapshotStore(tmp_path).load()
+    store.save({"a.py::test_one": {"GET /x #1": "aa01"}, "a.py::test_two": {"GET /y #1": "bb02"}},
+               {"aa01": {}, "bb02": {}})
+    store.save({"a.py::test_one": {}}, {})
+    assert store.prune() == 1
+    assert json.loads(store.index_path.read_text(encoding="utf-8"))["snapshots"] == {"a.py::test_two": {"GET /y #1": "bb02"}}
+    assert not store.object_path("aa01").exists() and store.object_path("bb02").exists()
+
+
+def test_merge_results_combines_the_workers_checks():
+    gw0 = {"snapshots": 3, "matched": 1, "changed": {"b.py::t GET /y #1": ["status: 200 -> 500"]},
+           "new": ["b.py::t GET /z #1"], "missing": []}
+    gw1 = {"snapshots": 2, "matched": 2, "changed": {}, "new": [], "missing": ["a.py::t GET /x #2"]}
+    assert merge_results([gw0, gw1]) == {"snapshots": 5, "matched": 3, "changed": gw0["changed"],
+                                         "new": ["b.py::t GET /z #1"], "missing": ["a.py::t GET /x #2"]}
+    assert merge_results([]) == {"snapshots": 0, "matched": 0, "changed": {}, "new": [], "missing": []}
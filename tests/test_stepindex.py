@@ -0,0 +1,24 @@
+import pytest
+
+from api.common.stepindex import StepTable, StepTableError
+
+
+def test_distinct_rows_validate_and_resolve():
+    table = StepTable("metric", [("the connection status", "status"),
+                                 ("the latency of {peer}", "latency"),
+                                 ("the loss of {peer} over {window}", "loss")])
+    assert table.validate() == []
+    assert table.resolve("the connection status") == ("status", {})
+    assert table.resolve("the loss of vr-2 over 1h") == ("loss", {"peer": "vr-2", "window": "1h"})
+    assert table.resolve("the jitter of vr-2") is None
+
+
+def test_overlapping_rows_are_rejected():
+    with pytest.raises(StepTableError) as error:
+        StepTable("metric", [("the latency of {peer}", "latency"), ("the latency of {peer} in ms", "ms")])
+    assert "'the latency of {peer}' (row 0) and 'the latency of {peer} in ms' (row 1)" in str(error.value)
+
+
+def test_a_literal_row_shadowed_by_a_pattern_is_rejected():
+    with pytest.raises(StepTableError, match="both match 'the latency of x'"):
+        StepTable("metric", [("the latency of {peer}", "latency"), ("the latency of x", "x")])